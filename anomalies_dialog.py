@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+from PyQt5 import QtWidgets, QtCore
+
+ANOMALY_BUCKET_CHOICES = [('1 minute', 60 * 10**9), ('5 minutes', 5 * 60 * 10**9),
+                          ('15 minutes', 15 * 60 * 10**9), ('1 hour', 3600 * 10**9)]
+
+
+class AnomaliesDialog(QtWidgets.QDialog):
+    """Top bursts of the loaded dataset (an AnomalyReport given by AppLogic), highest score first.
+
+    Clicking a row emits anomaly_selected; the main window applies its time range as the timeline filter.
+    """
+    bucket_changed = QtCore.pyqtSignal()
+    anomaly_selected = QtCore.pyqtSignal(object)  # Anomaly
+
+    COLUMNS = ["Message Type", "Start", "End", "Messages", "Expected / bucket", "Score"]
+
+    def __init__(self, parent=None, report=None):
+        super().__init__(parent)
+        self.report = None
+        self.setWindowTitle("Bursts and Anomalies")
+        self.setMinimumSize(760, 420)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        bucket_layout = QtWidgets.QHBoxLayout()
+        bucket_layout.addWidget(QtWidgets.QLabel("Rate per:"))
+        self.bucket_combo = QtWidgets.QComboBox()
+        for label, bucket_ns in ANOMALY_BUCKET_CHOICES:
+            self.bucket_combo.addItem(label, bucket_ns)
+        self.bucket_combo.currentIndexChanged.connect(lambda index: self.bucket_changed.emit())
+        bucket_layout.addWidget(self.bucket_combo)
+        bucket_layout.addStretch(1)
+        layout.addLayout(bucket_layout)
+
+        self.status_label = QtWidgets.QLabel()
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.table.cellClicked.connect(self._on_cell_clicked)
+        layout.addWidget(self.table)
+
+        self.set_report(report)
+
+    @property
+    def bucket_ns(self):
+        return self.bucket_combo.currentData()
+
+    def set_report(self, report):
+        """Lists a new report; None while the detection is running."""
+        self.report = report
+        self.table.setRowCount(0)
+        if report is None:
+            self.status_label.setText("Detecting bursts...")
+            return
+        if not report.anomalies:
+            self.status_label.setText("No burst found: no message type ran well above its usual rate.")
+            return
+        self.status_label.setText(
+            f"{len(report.anomalies)} strongest bursts. Score: how many standard deviations the rate rose above "
+            f"the type's recent average. Click a row to show its messages.")
+        self.table.setRowCount(len(report.anomalies))
+        for row, anomaly in enumerate(report.anomalies):
+            values = [anomaly.logger_name, anomaly.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                      anomaly.end_time.strftime('%Y-%m-%d %H:%M:%S'), f"{anomaly.count:,}",
+                      f"{anomaly.expected:.1f}", f"{anomaly.score:.1f}"]
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem(value)
+                if column >= 3:
+                    item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.table.resizeColumnsToContents()
+
+    def _on_cell_clicked(self, row, column):
+        if self.report is not None and 0 <= row < len(self.report.anomalies):
+            self.anomaly_selected.emit(self.report.anomalies[row])
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+from PyQt5 import QtCore
+
+ANOMALY_BUCKET_NS = 60 * 10**9  # Rates are compared minute by minute unless another width is asked for
+
+
+class Anomaly:
+    """A burst: consecutive buckets where one logger ran well above its own recent rate."""
+
+    def __init__(self, logger_name, start_ns, end_ns, score, count, expected):
+        self.logger_name = logger_name
+        self.start_ns = int(start_ns)
+        self.end_ns = int(end_ns)  # Exclusive: end of the last bucket of the burst
+        self.score = float(score)  # Highest z-score of the burst
+        self.count = int(count)  # Messages of the logger during the burst
+        self.expected = float(expected)  # Baseline per bucket at the peak
+
+    @property
+    def start_time(self):
+        return pd.Timestamp(self.start_ns).to_pydatetime()
+
+    @property
+    def end_time(self):
+        return pd.Timestamp(self.end_ns).to_pydatetime()
+
+
+class AnomalyReport:
+    """Top bursts of one dataset at one bucket width, as cached by AppLogic."""
+
+    def __init__(self, fingerprint, bucket_ns, anomalies):
+        self.fingerprint = fingerprint
+        self.bucket_ns = int(bucket_ns)
+        self.anomalies = anomalies  # Highest score first
+
+    @property
+    def nbytes(self):
+        return 200 * len(self.anomalies)
+
+
+def _anscombe(counts):
+    """Variance-stabilizing transform of Poisson counts: about normal with unit variance, whatever the rate."""
+    return 2.0 * np.sqrt(counts + 0.375)
+
+
+def _anscombe_rate(transformed_mean):
+    """Poisson rate whose Anscombe transform has the given mean (inverse of the first-order expansion)."""
+    return np.maximum((transformed_mean / 2.0) ** 2 - 0.125, 0.0)
+
+
+def detect_anomalies(cube, logger_names, top_n=20, halflife_buckets=30, z_threshold=None, min_count=5,
+                     false_alarm_rate=0.01, clip_z=2.0, chunk_buckets=2048):
+    """Top `top_n` bursts of a TimeBucketCube, as Anomaly objects with the highest score first.
+
+    Counts are scored in the Anscombe domain, where Poisson noise has unit variance at any rate:
+    z = (transformed count - baseline) / std. The baseline is an EWMA (half-life in buckets) of each
+    logger's transformed counts, with an EWMA variance for overdispersion (std floored at the Poisson
+    1). The update runs bucket by bucket but on all loggers at once, over chunks of the cube so the
+    [bucket × logger] matrix is never built whole.
+    The mean update is winsorized at `clip_z` std: a burst barely moves its own baseline, while a
+    lasting change of rate is absorbed within a few half-lives. Only buckets under the threshold
+    update the variance, and empty buckets update nothing, so a logger that is idle at night is
+    compared with its daytime rate in the morning. Baselines start from each logger's average rate
+    over its non-empty buckets.
+    Without `z_threshold`, the threshold makes `false_alarm_rate` the expected number of noise
+    buckets over the whole cube (Gaussian tail bound, one test per bucket and logger).
+    A burst is a run of buckets of one logger with z >= z_threshold / 2, gaps of one bucket allowed,
+    holding at least one bucket with z >= z_threshold and min_count messages: the lower bar to stay
+    in a burst keeps a change of rate, whose z falls slowly while the baseline follows, from being
+    cut into many.
+    """
+    n_buckets, n_loggers = cube.counts.shape[:2]
+    if not n_buckets or not n_loggers:
+        return []
+    if z_threshold is None:
+        z_threshold = np.sqrt(2.0 * np.log(n_buckets * n_loggers / false_alarm_rate))
+    z_end = z_threshold / 2.0
+    alpha = 1.0 - 0.5 ** (1.0 / halflife_buckets)
+    active_buckets = np.zeros(n_loggers, dtype=np.int64)
+    for start in range(0, n_buckets, chunk_buckets):
+        active_buckets += np.count_nonzero(cube.counts_by_logger(start=start, stop=start + chunk_buckets), axis=0)
+    mean = _anscombe(cube.counts.sum(axis=(0, 2), dtype=np.int64) / np.maximum(active_buckets, 1))
+    var = np.ones(n_loggers)
+    std = np.empty(n_loggers)
+    hits = []  # (buckets, logger codes, z, counts, baselines) of the buckets with z >= z_end, per chunk
+    for start in range(0, n_buckets, chunk_buckets):
+        rates = cube.counts_by_logger(start=start, stop=start + chunk_buckets).astype(np.float64)
+        transformed = _anscombe(rates)
+        z = np.empty_like(rates)
+        baselines = np.empty_like(rates)
+        for i, x in enumerate(transformed):
+            baselines[i] = mean
+            np.sqrt(np.maximum(var, 1.0), out=std)
+            diff = x - mean
+            np.divide(diff, std, out=z[i])
+            np.clip(diff, -clip_z * std, clip_z * std, out=diff)
+            active = rates[i] > 0
+            diff *= active
+            mean += alpha * diff
+            var = np.where(active & (z[i] < z_threshold), (1.0 - alpha) * (var + alpha * diff * diff), var)
+        buckets, codes = np.nonzero(z >= z_end)
+        hits.append((buckets + start, codes, z[buckets, codes], rates[buckets, codes],
+                     _anscombe_rate(baselines[buckets, codes])))
+    buckets, codes, scores, counts, baselines = (np.concatenate(column) for column in zip(*hits))
+    if not len(buckets):
+        return []
+
+    # Runs of buckets of the same logger, at most one bucket apart, form one burst
+    order = np.lexsort((buckets, codes))
+    buckets, codes, scores, counts, baselines = buckets[order], codes[order], scores[order], counts[order], baselines[order]
+    run_starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (buckets[1:] > buckets[:-1] + 2)])
+    run_stops = np.r_[run_starts[1:], len(buckets)]
+    run_scores = np.maximum.reduceat(scores, run_starts)
+    flagged = np.maximum.reduceat(((scores >= z_threshold) & (counts >= min_count)).view(np.int8), run_starts)
+    runs = np.flatnonzero(flagged)
+
+    anomalies = []
+    for run in runs[np.argsort(-run_scores[runs], kind='stable')][:top_n]:
+        first, stop = run_starts[run], run_stops[run]
+        peak = first + int(np.argmax(scores[first:stop]))
+        code, first_bucket, stop_bucket = codes[first], int(buckets[first]), int(buckets[stop - 1]) + 1
+        count = cube.counts_by_logger([code], start=first_bucket, stop=stop_bucket).sum()  # Gap buckets included
+        anomalies.append(Anomaly(logger_names[code], cube.origin_ns + first_bucket * cube.bucket_ns,
+                                 cube.origin_ns + stop_bucket * cube.bucket_ns, run_scores[run], count, baselines[peak]))
+    return anomalies
+
+
+def anomaly_at(anomalies, timestamp_ns, tolerance_ns=0):
+    """Highest-scored anomaly whose window, widened by `tolerance_ns`, contains `timestamp_ns`; None if none does."""
+    for anomaly in anomalies:  # Highest score first
+        if anomaly.start_ns - tolerance_ns <= timestamp_ns < anomaly.end_ns + tolerance_ns:
+            return anomaly
+    return None
+
+
+class AnomalyDetectionThread(QtCore.QThread):
+    """Runs detect_anomalies() over a LogIndex cube off the GUI thread."""
+    detected = QtCore.pyqtSignal(object)  # AnomalyReport
+
+    def __init__(self, log_index, bucket_ns=ANOMALY_BUCKET_NS, parent=None):
+        super().__init__(parent)
+        self.log_index = log_index
+        self.bucket_ns = bucket_ns
+
+    def run(self):
+        cube = self.log_index.bucket_cube_ns(self.bucket_ns)
+        anomalies = detect_anomalies(cube, self.log_index.logger_names)
+        self.detected.emit(AnomalyReport(self.log_index.fingerprint, self.bucket_ns, anomalies))
@@ -1,13 +1,34 @@
 # app_logic.py
 import sqlite3
+import numpy as np
 import pandas as pd
 from PyQt5 import QtCore  # Assurez-vous que QtCore est importé
 from collections import Counter
 from datetime import datetime
-from ui_widgets import SortableTreeWidgetItem
+from anomaly_detection import ANOMALY_BUCKET_NS, AnomalyDetectionThread
+from dataset_stats import DatasetStats, DatasetStatsThread
+from log_index import LogIndex
+from filter_history import FilterState, FilterHistory, FilterResultCache
+from timeline_canvas import ns_to_date_num
 
 
 class AppLogic(QtCore.QObject):
+    # Stages of the filter pipeline, in the order they run during a recompute pass.
+    STAGE_FILTER = 'filter'      # Level + full-text search mask (the base the facets are counted on)
+    STAGE_FACETS = 'facets'      # Message types list rebuilt from the base mask
+    STAGE_LIST = 'list'          # Type selection + time window applied, messages list refreshed
+    STAGE_TIMELINE = 'timeline'  # Timeline redrawn for the selected types and granularity
+    STAGE_STATS = 'stats'        # Statistics dialog refreshed for the filtered rows (only while it is open)
+    PIPELINE_STAGES = (STAGE_FILTER, STAGE_FACETS, STAGE_LIST, STAGE_TIMELINE, STAGE_STATS)
+    # A dirty stage always dirties the stages that consume its output.
+    _STAGE_DOWNSTREAM = {
+        STAGE_FILTER: (STAGE_FACETS, STAGE_LIST, STAGE_TIMELINE, STAGE_STATS),
+        STAGE_FACETS: (STAGE_LIST, STAGE_TIMELINE, STAGE_STATS),
+        STAGE_LIST: (STAGE_STATS,),
+        STAGE_TIMELINE: (),
+        STAGE_STATS: (),
+    }
+
     def __init__(self, main_window):
         super().__init__()
         self.mw = main_window
@@ -16,17 +37,263 @@ class AppLogic(QtCore.QObject):
         self.timeline_filter_active = False
         self.timeline_filter_start_time = None
         self.timeline_filter_end_time = None
-        self.filtered_df = pd.DataFrame()
+        self.log_index = None  # LogIndex of mw.log_entries_full, see get_log_index()
+        self._log_index_source = None
+        self.base_filter_rows = None  # RowBitmap of the level + full-text search filter
+        self.filtered_rows = None  # RowBitmap of the rows shown in the messages list
         self.current_search_text = ""
         self.fts_db_conn = None
 
+        # Back/forward through filter states; computed row sets are reused from an LRU cache
+        self.filter_history = FilterHistory()
+        self.result_cache = FilterResultCache()
+        self._pending_type_selection = None  # Types to check on the next facets rebuild (history navigation)
+        self._stats_thread = None  # DatasetStatsThread of the loaded dataset, started after loading
+        self._anomaly_thread = None  # AnomalyDetectionThread, started from the anomalies dialog
+        self._wanted_anomaly_bucket_ns = ANOMALY_BUCKET_NS  # Bucket width of the report the dialog waits for
+
+        # Dirty-flag scheduler: controls only invalidate stages, the pipeline runs once per event-loop tick.
+        self._dirty_stages = set()
+        self._select_all_types_on_rebuild = False
+        self.recompute_count = 0  # Number of pipeline passes, handy to check how many recomputes an action costs
+        self.stage_run_counts = Counter()
+        self._recompute_timer = QtCore.QTimer()
+        self._recompute_timer.setSingleShot(True)
+        self._recompute_timer.setInterval(0)
+        self._recompute_timer.timeout.connect(self._run_pipeline)
+
+    def invalidate(self, *stages, select_all_types=False):
+        """Marks pipeline stages (and everything downstream) dirty and schedules a single recompute."""
+        for stage in stages:
+            self._dirty_stages.add(stage)
+            self._dirty_stages.update(self._STAGE_DOWNSTREAM[stage])
+        if select_all_types:
+            self._select_all_types_on_rebuild = True
+        if not self._recompute_timer.isActive():
+            self._recompute_timer.start()
+
+    def flush_pending_recompute(self):
+        """Runs a scheduled recompute right away instead of waiting for the next event-loop tick."""
+        if self._recompute_timer.isActive():
+            self._recompute_timer.stop()
+            self._run_pipeline()
+
+    def _run_pipeline(self):
+        if not self._dirty_stages:
+            return
+        dirty = self._dirty_stages
+        select_all_types = self._select_all_types_on_rebuild
+        self._dirty_stages = set()
+        self._select_all_types_on_rebuild = False
+
+        self.recompute_count += 1
+        if self.STAGE_FILTER in dirty:
+            self.stage_run_counts[self.STAGE_FILTER] += 1
+            self._compute_base_filter_rows()
+        if self.STAGE_FACETS in dirty:
+            self.stage_run_counts[self.STAGE_FACETS] += 1
+            self._rebuild_message_types_data_and_list(select_all_visible=select_all_types)
+        if self.STAGE_LIST in dirty:
+            self.stage_run_counts[self.STAGE_LIST] += 1
+            self._apply_filters_and_update_views()
+        if self.STAGE_TIMELINE in dirty:
+            self.stage_run_counts[self.STAGE_TIMELINE] += 1
+            self.trigger_timeline_update_from_selection()
+        if self.STAGE_STATS in dirty:
+            self.stage_run_counts[self.STAGE_STATS] += 1
+            self.refresh_stats_dialog()
+        self._record_filter_state()
+
+    def capture_filter_state(self):
+        """Snapshot of the current filter controls."""
+        time_window = None
+        if self.timeline_filter_active and self.timeline_filter_start_time and self.timeline_filter_end_time:
+            time_window = (self.timeline_filter_start_time, self.timeline_filter_end_time)
+        granularity = self.mw.granularity_combo.currentText() if self.mw.granularity_combo else 'minute'
+        active_levels = [level for level, active in self.selected_log_levels.items() if active]
+        return FilterState(active_levels, self._get_checked_message_types(), time_window,
+                           self.current_search_text, granularity)
+
+    def _record_filter_state(self):
+        if self.mw.log_entries_full.empty:
+            return
+        self.filter_history.push(self.capture_filter_state())
+        self._update_history_actions()
+
+    def _update_history_actions(self):
+        back_action = getattr(self.mw, 'history_back_action', None)
+        forward_action = getattr(self.mw, 'history_forward_action', None)
+        if back_action: back_action.setEnabled(self.filter_history.can_go_back())
+        if forward_action: forward_action.setEnabled(self.filter_history.can_go_forward())
+
+    def go_back_in_filter_history(self):
+        self._restore_filter_state(self.filter_history.back())
+
+    def go_forward_in_filter_history(self):
+        self._restore_filter_state(self.filter_history.forward())
+
+    def _restore_filter_state(self, state):
+        """Puts every filter control back to `state`; cached row sets make the recompute instant."""
+        if state is None or self.mw.log_entries_full.empty:
+            return
+        self.mw._enter_batch_update()
+        try:
+            self.selected_log_levels = {level: level in state.levels for level in self.selected_log_levels}
+            self.update_log_summary_display()  # Level buttons reflect the restored levels
+
+            self.current_search_text = state.search_text
+            fts_search_widget = getattr(self.mw, 'fts_search_widget', None)
+            if fts_search_widget: fts_search_widget.set_search_text_silently(state.search_text)
+
+            self.timeline_filter_active = state.time_window is not None
+            self.timeline_filter_start_time, self.timeline_filter_end_time = state.time_window or (None, None)
+
+            if self.mw.granularity_combo:
+                self.mw.granularity_combo.blockSignals(True)
+                self.mw.granularity_combo.setCurrentText(state.granularity)
+                self.mw.granularity_combo.blockSignals(False)
+            self._pending_type_selection = set(state.selected_types)
+        finally:
+            self.mw._exit_batch_update()
+        self._update_history_actions()
+        self.invalidate(self.STAGE_FILTER)
+        if self.mw.statusBar():
+            self.mw.statusBar().showMessage(f"Filtres: {state.describe()}", 3000)
+
+    def get_log_index(self):
+        """Returns the LogIndex of the loaded data, (re)building it if the data changed."""
+        log_entries = self.mw.log_entries_full
+        if self.log_index is None or self._log_index_source is not log_entries:
+            self.log_index = LogIndex(log_entries)
+            self._log_index_source = log_entries
+        return self.log_index
+
+    def dataset_stats(self):
+        """DatasetStats of the loaded data, or None while they are still being computed."""
+        return self.result_cache.get(('dataset_stats', self.get_log_index().fingerprint))
+
+    def start_dataset_stats(self):
+        """Computes the StatsDialog aggregates in the background unless they are cached already."""
+        log_index = self.get_log_index()
+        if not log_index.row_count or self.result_cache.get(('dataset_stats', log_index.fingerprint)) is not None:
+            return
+        if self._stats_thread is not None and self._stats_thread.log_index is log_index and self._stats_thread.isRunning():
+            return  # Already computing this dataset
+        self.wait_for_dataset_stats()  # A QThread must not be dropped while running; this takes well under a second
+        self._stats_thread = DatasetStatsThread(log_index)
+        self._stats_thread.computed.connect(self._on_dataset_stats_computed)
+        self._stats_thread.start()
+
+    def wait_for_dataset_stats(self):
+        if self._stats_thread is not None:
+            self._stats_thread.wait()
+
+    def _on_dataset_stats_computed(self, stats):
+        self.result_cache.put(('dataset_stats', stats.fingerprint), stats)
+        self.refresh_stats_dialog()  # Opened while the stats were computing
+
+    def _cached_logger_counts(self, rows_key, rows):
+        """Per-logger counts of a row set (bincount over the codes), shared by the type facets and the statistics."""
+        key = ('logger_counts', rows_key)
+        logger_counts = self.result_cache.get(key)
+        if logger_counts is None:
+            logger_counts = self.get_log_index().logger_counts(rows)
+            self.result_cache.put(key, logger_counts)
+        return logger_counts
+
+    def view_stats(self):
+        """DatasetStats of the filtered rows (the messages list), cached per filter state."""
+        rows = self.filtered_rows
+        if rows is None or rows.is_full():
+            return self.dataset_stats()  # Nothing filtered out: same as the whole dataset
+        state = self.capture_filter_state()
+        # Without a type or time narrowing these are the base rows: reuse the counts of the type facets
+        rows_key = self._current_base_key() if rows is self.base_filter_rows else state.rows_key()
+        stats = self.result_cache.get(('stats', rows_key))
+        if stats is None:
+            stats = DatasetStats(self.get_log_index(), rows, self._cached_logger_counts(rows_key, rows))
+            self.result_cache.put(('stats', rows_key), stats)
+        stats.description = f"Current view: {state.describe()}"
+        return stats
+
+    def refresh_stats_dialog(self):
+        """Gives the open statistics dialog the stats of its scope: the filtered rows or the whole dataset."""
+        stats_dialog = self.mw.stats_dialog
+        if stats_dialog is None or not stats_dialog.isVisible() or self.mw.log_entries_full.empty:
+            return
+        stats_dialog.set_stats(self.view_stats() if stats_dialog.scope == 'view' else self.dataset_stats())
+
+    def start_anomaly_detection(self, bucket_ns=ANOMALY_BUCKET_NS):
+        """Finds the top bursts of the loaded dataset in the background; cached reports are shown at once."""
+        log_index = self.get_log_index()
+        self._wanted_anomaly_bucket_ns = bucket_ns
+        if not log_index.row_count:
+            return
+        report = self.result_cache.get(('anomalies', log_index.fingerprint, bucket_ns))
+        if report is not None:
+            self._show_anomalies(report)
+            return
+        if self._anomaly_thread is not None and self._anomaly_thread.isRunning():
+            return  # _on_anomalies_detected starts the wanted one next
+        self._anomaly_thread = AnomalyDetectionThread(log_index, bucket_ns)
+        self._anomaly_thread.detected.connect(self._on_anomalies_detected)
+        self._anomaly_thread.start()
+
+    def wait_for_anomaly_detection(self):
+        if self._anomaly_thread is not None:
+            self._anomaly_thread.wait()
+
+    def _on_anomalies_detected(self, report):
+        self.result_cache.put(('anomalies', report.fingerprint, report.bucket_ns), report)
+        if self.mw.anomalies_dialog is not None and self.mw.anomalies_dialog.isVisible():
+            # Shows this report, or starts the wanted one if another width was picked meanwhile
+            self.start_anomaly_detection(self._wanted_anomaly_bucket_ns)
+
+    def _show_anomalies(self, report):
+        """Lists the report in the open anomalies dialog and highlights its bursts on the timeline."""
+        anomalies_dialog = self.mw.anomalies_dialog
+        if anomalies_dialog is None or not anomalies_dialog.isVisible():
+            return
+        anomalies_dialog.set_report(report)
+        self.mw.timeline_canvas.set_anomalies(report.anomalies)
+
+    def apply_anomaly_time_filter(self, anomaly):
+        """Shows the messages of a burst: its time range becomes the timeline filter, and an off-screen burst is panned to."""
+        self.on_timeline_bar_clicked(anomaly.start_time, anomaly.end_time)
+        timeline = self.mw.timeline_canvas
+        if timeline.full_time_min_num is not None and timeline.full_time_max_num is not None:
+            start_num, end_num = ns_to_date_num([anomaly.start_ns, anomaly.end_ns])
+            view_min_num, view_max_num = timeline.get_view_xlim()
+            if end_num < view_min_num or start_num > view_max_num:
+                span = view_max_num - view_min_num
+                view_min_num = min(max((start_num + end_num - span) / 2, timeline.full_time_min_num),
+                                   timeline.full_time_max_num - span)
+                timeline.set_view_xlim(view_min_num, view_min_num + span)
+                self.mw.sync_sliders_to_timeline_view(view_min_num, view_min_num + span)
+        if self.mw.statusBar():
+            self.mw.statusBar().showMessage(
+                f"Pic de {anomaly.logger_name} : {anomaly.count} messages (score {anomaly.score:.1f})", 3000)
+
+    @property
+    def filtered_df(self):
+        """The filtered rows as a DataFrame, materialized on demand only."""
+        if self.filtered_rows is None or self.mw.log_entries_full.empty:
+            return self.mw.log_entries_full.iloc[0:0]
+        return self.mw.log_entries_full.take(self.filtered_rows.to_indices())
+
     def reset_for_new_data(self):
         """Resets the entire UI and internal state in preparation for loading a new log file."""
         self.mw._enter_batch_update()
         try:
             # 1. Reset internal data models
             self.mw.log_entries_full = pd.DataFrame()
-            self.filtered_df = pd.DataFrame()
+            self.log_index = None
+            self.base_filter_rows = None
+            self.filtered_rows = None
+            self.filter_history.clear()
+            self.result_cache.clear()
+            self._pending_type_selection = None
+            self._update_history_actions()
             self.message_types_data_for_list = pd.DataFrame(columns=['logger_name', 'count'])
             if self.fts_db_conn:
                 try:
@@ -45,7 +312,7 @@ class AppLogic(QtCore.QObject):
             # 3. Clear UI widgets
             if hasattr(self.mw, 'search_widget') and self.mw.search_widget: self.mw.search_widget.clear_search()
             if hasattr(self.mw, 'message_type_search_input') and self.mw.message_type_search_input: self.mw.message_type_search_input.clear()
-            if hasattr(self.mw, 'message_types_list') and self.mw.message_types_list: self.mw.message_types_list.clear()
+            if hasattr(self.mw, 'message_types_model') and self.mw.message_types_model: self.mw.message_types_model.set_logger_names([])
             if hasattr(self.mw, 'selected_messages_list') and self.mw.selected_messages_list: self.mw.selected_messages_list.set_all_items_data([])
             if hasattr(self.mw, 'details_text') and self.mw.details_text: self.mw.details_text.clear()
 
@@ -131,34 +398,18 @@ class AppLogic(QtCore.QObject):
                 self.mw.granularity_combo.blockSignals(False)
 
             if self.mw.search_widget: self.mw.search_widget.clear_search() # Clears UI
+            fts_search_widget = getattr(self.mw, 'fts_search_widget', None)
+            if fts_search_widget: fts_search_widget.set_search_text_silently("")
             # selected_messages_list will be updated by _apply_filters_and_update_views
             if self.mw.details_text: self.mw.details_text.clear()
 
         finally:
             self.mw._exit_batch_update()
 
-        # Apply all (now reset) filters to update the main list and timeline
-        self._apply_filters_and_update_views()
-
-        # This rebuilds the message type tree and selects all by default, now using the correctly populated self.filtered_df
-        self._rebuild_message_types_data_and_list(select_all_visible=True)
-        
-        # Update timeline display based on current (likely all) message types and granularity
-        # This needs to happen *after* _apply_filters_and_update_views if that method doesn't already handle it
-        # or if the timeline needs a specific update based on the full dataset view after reset.
-        current_granularity = self.mw.granularity_combo.currentText() if self.mw.granularity_combo else 'minute'
+        # Rebuild the whole pipeline once: base filter, message types (all selected), list and timeline
+        self.invalidate(self.STAGE_FILTER, select_all_types=True)
         log_data_exists = hasattr(self.mw, 'log_entries_full') and not self.mw.log_entries_full.empty
 
-        selected_types_for_timeline = set()
-        if self.mw.message_types_tree:
-            for i in range(self.mw.message_types_tree.topLevelItemCount()):
-                item = self.mw.message_types_tree.topLevelItem(i)
-                if item.checkState(0) == QtCore.Qt.Checked: # Should be all checked after reset
-                    selected_types_for_timeline.add(item.text(0))
-        
-        if self.mw.timeline_canvas:
-            self.mw.timeline_canvas.update_display_config(selected_types_for_timeline, current_granularity)
-
         if initial_load and not log_data_exists:
             self.update_timeline_sliders_range(0, 0)
         # If log_data_exists, the timeline range should be updated by update_display_config or a subsequent call
@@ -231,67 +482,42 @@ class AppLogic(QtCore.QObject):
                     btn.style().polish(btn)
 
     def _rebuild_message_types_data_and_list(self, select_all_visible=False):
+        model = getattr(self.mw, 'message_types_model', None)
         if not hasattr(self.mw, 'log_entries_full') or self.mw.log_entries_full.empty:
             self.message_types_data_for_list = pd.DataFrame(columns=['logger_name', 'count'])
-            if self.mw.message_types_tree:
-                self.mw.message_types_tree.clear()
+            if model:
+                model.set_logger_names([])
             return
 
-        # Use the already filtered DataFrame from the main logic, which includes search and level filters.
-        filtered_df = self.filtered_df
-        
-        if filtered_df.empty:
-            self.message_types_data_for_list = pd.DataFrame(columns=['logger_name', 'count'])
-        else:
-            # Calculate logger counts
-            logger_counts_series = filtered_df['logger_name'].value_counts()
-            
-            # Filter by search text if any
-            search_text = self.mw.message_type_search_input.text().lower() if self.mw.message_type_search_input else ""
-            if search_text:
-                # Ensure index is string type before using .str accessor
-                if not logger_counts_series.empty and pd.api.types.is_string_dtype(logger_counts_series.index.dtype):
-                    logger_counts_series = logger_counts_series[logger_counts_series.index.str.lower().str.contains(search_text, regex=False)]
-                elif not logger_counts_series.empty: # Handle non-string indices if they occur, though logger_name should be string
-                    logger_counts_series = logger_counts_series[[str(idx).lower().find(search_text) != -1 for idx in logger_counts_series.index]]
-
-
-            # Convert to DataFrame and store
-            if logger_counts_series.empty:
-                self.message_types_data_for_list = pd.DataFrame(columns=['logger_name', 'count'])
-            else:
-                self.message_types_data_for_list = logger_counts_series.reset_index()
-                self.message_types_data_for_list.columns = ['logger_name', 'count']
-                self.message_types_data_for_list['count'] = self.message_types_data_for_list['count'].astype(int)
-
-        if self.mw.message_types_tree:
-            tree = self.mw.message_types_tree
-            tree.clear()
-            tree.setSortingEnabled(False) # Disable sorting while populating
-            
-            items = []
-            # Iterate over the DataFrame (value_counts sorts by count descending by default)
-            for index, row in self.message_types_data_for_list.iterrows():
-                logger_name = str(row['logger_name']) # Ensure logger_name is string for display
-                count = int(row['count']) # Ensure count is int
-                item = SortableTreeWidgetItem([logger_name, str(count)])
-                item.setCheckState(0, QtCore.Qt.Unchecked) # Default to unchecked
-                items.append(item)
-            
-            tree.addTopLevelItems(items)
-            tree.setSortingEnabled(True) # Re-enable sorting
-            
-            if select_all_visible:
-                self.set_check_state_for_visible_types(QtCore.Qt.Checked)
+        # Count types over the base filter (levels + full-text search) so the type selection never hides other types.
+        log_index = self.get_log_index()
+        if self.base_filter_rows is None:
+            self._compute_base_filter_rows()
+        logger_counts = self._cached_logger_counts(self._current_base_key(), self.base_filter_rows)
+
+        present = logger_counts > 0
+        self.message_types_data_for_list = pd.DataFrame({'logger_name': log_index.logger_names[present],
+                                                         'count': logger_counts[present]})
+
+        if model:
+            if model.logger_names is not log_index.logger_names:
+                model.set_logger_names(log_index.logger_names)
+                select_all_visible = select_all_visible or self._pending_type_selection is None
+            if self._pending_type_selection is not None:
+                model.set_checked_names(self._pending_type_selection)
+                self._pending_type_selection = None
+            elif select_all_visible:
+                model.set_checked_mask(present)
+            # Otherwise the check state array is kept as is: checked types stay checked when they come back.
+            model.set_counts(logger_counts)
+
+    def _get_checked_message_types(self):
+        model = getattr(self.mw, 'message_types_model', None)
+        return model.selected_names() if model else set()
 
     def trigger_timeline_update_from_selection(self):
         if self.mw._is_batch_updating_ui or not self.mw.timeline_canvas: return
-        selected_types = set()
-        if self.mw.message_types_tree:
-            for i in range(self.mw.message_types_tree.topLevelItemCount()):
-                item = self.mw.message_types_tree.topLevelItem(i)
-                if item.checkState(0) == QtCore.Qt.Checked:
-                    selected_types.add(item.text(0))
+        selected_types = self._get_checked_message_types()
 
         granularity = self.mw.granularity_combo.currentText() if self.mw.granularity_combo else 'minute'
         self.mw.timeline_canvas.update_display_config(selected_types, granularity)
@@ -302,7 +528,7 @@ class AppLogic(QtCore.QObject):
         if self.mw.pan_slider: self.mw.pan_slider.setValue(0)
         if self.mw.zoom_slider: self.mw.zoom_slider.setValue(self.mw.slider_scale_factor)
         self.mw._exit_batch_update()
-        self.trigger_timeline_update_from_selection()
+        self.invalidate(self.STAGE_TIMELINE)
         if self.mw.statusBar(): self.mw.statusBar().showMessage(f"Granularité: {self.mw.granularity_combo.currentText()}", 2000)
 
     def on_slider_value_changed(self):
@@ -355,109 +581,103 @@ class AppLogic(QtCore.QObject):
             self.mw.statusBar().showMessage(f"Filtrage types: '{text}'" if text else "Filtre types effacé", 2000)
 
     def apply_message_type_filter(self):
-        if not self.mw.message_types_tree or not self.mw.message_type_search_input: return
-        search_text = self.mw.message_type_search_input.text().lower()
-        for i in range(self.mw.message_types_tree.topLevelItemCount()):
-            item = self.mw.message_types_tree.topLevelItem(i)
-            item.setHidden(bool(search_text and search_text not in item.text(0).lower()))
-        # The visibility of items in the tree has changed, which affects what _apply_filters_and_update_views considers.
-        self._apply_filters_and_update_views()
-
-    def on_message_type_item_changed(self, item, column):
+        if not self.mw.message_types_model or not self.mw.message_type_search_input: return
+        # Only the checked types the name filter shows drive the list and the timeline
+        self.mw.message_types_model.set_name_filter(self.mw.message_type_search_input.text())
+        self.invalidate(self.STAGE_LIST, self.STAGE_TIMELINE)
+
+    def on_message_type_check_state_changed(self):
         if not self.mw._is_batch_updating_ui:
-            # A change in the message type tree selection is a filter change.
-            self._apply_filters_and_update_views()
-            
-            # Also, the timeline needs to be updated based on the new selection of message types.
-            selected_types_for_timeline = set()
-            if self.mw.message_types_tree:
-                for i in range(self.mw.message_types_tree.topLevelItemCount()):
-                    tree_item = self.mw.message_types_tree.topLevelItem(i)
-                    # Consider only items that are checked AND not hidden by the message type search filter
-                    if tree_item.checkState(0) == QtCore.Qt.Checked and not tree_item.isHidden():
-                        selected_types_for_timeline.add(tree_item.text(0))
-            
-            current_granularity = self.mw.granularity_combo.currentText() if self.mw.granularity_combo else 'minute'
-            if self.mw.timeline_canvas:
-                self.mw.timeline_canvas.update_display_config(selected_types_for_timeline, current_granularity)
+            # A change in the message type tree selection is a filter change for both the list and the timeline.
+            self.invalidate(self.STAGE_LIST, self.STAGE_TIMELINE)
 
     def on_search_changed(self, search_text):
         self.current_search_text = search_text.strip()
-        # _apply_filters_and_update_views will handle empty log_entries_full or empty search_text
-        self._apply_filters_and_update_views()
-        self._rebuild_message_types_data_and_list(select_all_visible=True) # Rebuild types based on search results
+        # Search results change the base filter: types are rebuilt from them and all selected.
+        self.invalidate(self.STAGE_FILTER, select_all_types=True)
         
-        # Status bar message is now handled by _apply_filters_and_update_views, 
-        # but we can add a specific search status message here if desired, or let the generic one suffice.
         if self.mw.statusBar():
             if self.current_search_text:
                 self.mw.statusBar().showMessage(f"Filtre de recherche appliqué: '{self.current_search_text}'", 2000)
             else:
                 self.mw.statusBar().showMessage("Filtre de recherche effacé", 2000)
 
-    def _apply_filters_and_update_views(self):
-        if self.mw.log_entries_full.empty or self.mw._is_batch_updating_ui:
-            if self.mw.selected_messages_list: self.mw.selected_messages_list.set_all_items_data([])
-            # Potentially update status bar or other UI elements for empty/no results
+    def _current_base_key(self):
+        active_levels = [level for level, active in self.selected_log_levels.items() if active]
+        return FilterState.base_key_for(active_levels, self.current_search_text)
+
+    def _compute_base_filter_rows(self):
+        """Computes the level + full-text search row set shared by the message types facets and the list."""
+        base_key = self._current_base_key()
+        cached_rows = self.result_cache.get(base_key)
+        if cached_rows is not None:
+            self.base_filter_rows = cached_rows
             return
 
-        # Start with a mask that includes all entries
-        combined_mask = pd.Series([True] * len(self.mw.log_entries_full), index=self.mw.log_entries_full.index)
+        log_index = self.get_log_index()
+        # Start with a row set that includes all entries
+        base_rows = log_index.all_rows()
 
         # 1. Apply Log Level Filter
         active_levels = [level for level, active in self.selected_log_levels.items() if active]
         if len(active_levels) < len(self.selected_log_levels): # Only filter if not all levels are selected
-            combined_mask &= self.mw.log_entries_full['log_level'].isin(active_levels)
-
-        # 2. Apply Message Type Filter (from tree)
-        tree_selected_types = set()
-        if self.mw.message_types_tree:
-            for i in range(self.mw.message_types_tree.topLevelItemCount()):
-                item = self.mw.message_types_tree.topLevelItem(i)
-                if item.checkState(0) == QtCore.Qt.Checked:
-                    tree_selected_types.add(item.text(0))
-        
-        if tree_selected_types: # Only filter if some types are selected
-            # Check if all types from the tree are selected. If so, no need to filter by type.
-            all_possible_types_in_tree = set()
-            if self.mw.message_types_tree:
-                for i in range(self.mw.message_types_tree.topLevelItemCount()):
-                    all_possible_types_in_tree.add(self.mw.message_types_tree.topLevelItem(i).text(0))
-            
-            if tree_selected_types != all_possible_types_in_tree:
-                 combined_mask &= self.mw.log_entries_full['logger_name'].isin(tree_selected_types)
-
-        # 3. Apply Timeline Time Filter
-        if self.timeline_filter_active and self.timeline_filter_start_time and self.timeline_filter_end_time:
-            combined_mask &= (self.mw.log_entries_full['datetime_obj'] >= self.timeline_filter_start_time) & \
-                             (self.mw.log_entries_full['datetime_obj'] < self.timeline_filter_end_time)
+            base_rows &= log_index.level_rows(active_levels)
 
-        # 4. Apply Full-Text Search Filter
+        # 2. Apply Full-Text Search Filter
         if self.current_search_text and self.current_search_text.strip():
             matching_indices = self._search_fts_index(self.current_search_text)
-            
-            # Create a boolean mask based on FTS results.
-            # If search_text was provided but FTS found no matches, fts_mask will be all False.
-            # If FTS found matches, fts_mask will be True for those indices.
-            # self.mw.log_entries_full.index should correspond to rowids in FTS.
-            fts_mask = self.mw.log_entries_full.index.isin(list(matching_indices))
-            combined_mask &= fts_mask
+            # If search_text was provided but FTS found no matches, the row set will be empty.
+            # FTS rowids are the log_entries_full index labels.
+            base_rows &= log_index.rows_from_labels(matching_indices)
         # If current_search_text is empty or only whitespace, no FTS filtering is applied here.
+        self.base_filter_rows = base_rows
+        self.result_cache.put(base_key, base_rows)
+
+    def _apply_filters_and_update_views(self):
+        if self.mw.log_entries_full.empty or self.mw._is_batch_updating_ui:
+            if self.mw.selected_messages_list: self.mw.selected_messages_list.set_all_items_data([])
+            # Potentially update status bar or other UI elements for empty/no results
+            return
+
+        log_index = self.get_log_index()
+        if self.base_filter_rows is None or self.base_filter_rows.size != log_index.row_count:
+            self._compute_base_filter_rows()
+        rows_key = self.capture_filter_state().rows_key()
+        filtered_rows = self.result_cache.get(rows_key)
+        if filtered_rows is None:
+            filtered_rows = self._compute_filtered_rows(log_index)
+            self.result_cache.put(rows_key, filtered_rows)
 
-        # Apply the combined mask
-        filtered_df = self.mw.log_entries_full[combined_mask]
-        self.filtered_df = filtered_df # Store the filtered df for other parts of the app to use
-        filtered_entries_list = filtered_df.to_dict('records')
+        # Store the row set for other parts of the app; the list only materializes the rows it displays
+        self.filtered_rows = filtered_rows
 
         if self.mw.selected_messages_list:
-            self.mw.selected_messages_list.set_all_items_data(filtered_entries_list)
+            self.mw.selected_messages_list.set_row_source(self.mw.log_entries_full, filtered_rows)
         
         if self.mw.statusBar():
-            status_message = f"{len(filtered_entries_list)} messages affichés."
+            status_message = f"{len(filtered_rows)} messages affichés."
             if self.timeline_filter_active:
                 status_message += f" (Intervalle: {self.timeline_filter_start_time.strftime('%H:%M:%S')} - {self.timeline_filter_end_time.strftime('%H:%M:%S')})"
             self.mw.statusBar().showMessage(status_message, 3000)
 
+    def _compute_filtered_rows(self, log_index):
+        """Narrows the base row set with the message type selection and the timeline time window."""
+        filtered_rows = self.base_filter_rows
+
+        # Apply Message Type Filter (from the types model)
+        model = self.mw.message_types_model
+        if model:
+            present = model.present_mask()
+            selected_codes = model.selected_codes()
+            # Only filter if some types are checked and not all listed ones are selected (shown and checked)
+            if np.any(model.checked & present) and len(selected_codes) < int(np.count_nonzero(present)):
+                filtered_rows &= log_index.logger_rows_for_codes(selected_codes)
+
+        # Apply Timeline Time Filter (binary search on the sorted timestamps)
+        if self.timeline_filter_active and self.timeline_filter_start_time and self.timeline_filter_end_time:
+            filtered_rows &= log_index.time_rows(self.timeline_filter_start_time, self.timeline_filter_end_time)
+        return filtered_rows
+
     def on_timeline_bar_clicked(self, time_start, time_end):
         if self.mw._is_batch_updating_ui: return
         
@@ -465,7 +685,7 @@ class AppLogic(QtCore.QObject):
         self.timeline_filter_start_time = time_start
         self.timeline_filter_end_time = time_end
         
-        self._apply_filters_and_update_views()
+        self.invalidate(self.STAGE_LIST)
 
     def on_message_selected(self):
         if not self.mw.selected_messages_list or not self.mw.details_text: return
@@ -490,47 +710,27 @@ class AppLogic(QtCore.QObject):
             self.mw.details_text.clear()
 
     def _get_currently_visible_message_types_sorted_by_count(self):
-        if not self.mw.message_types_tree: return []
-        visible_types_with_counts = []
-        for i in range(self.mw.message_types_tree.topLevelItemCount()):
-            item = self.mw.message_types_tree.topLevelItem(i)
-            if not item.isHidden():
-                try:
-                    count = int(item.text(1))
-                    visible_types_with_counts.append((item.text(0), count))
-                except (ValueError, TypeError):
-                    continue
-        visible_types_with_counts.sort(key=lambda x: (-x[1], x[0]))
-        return [name for name, count in visible_types_with_counts]
+        model = self.mw.message_types_model
+        if not model: return []
+        codes = model.visible_codes()
+        order = np.lexsort((model.logger_names[codes].astype(str), -model.counts[codes]))
+        return list(model.logger_names[codes[order]])
 
     def _select_top_n_types_logic(self, top_n):
-        if not self.mw.message_types_tree or self.mw.log_entries_full.empty:
+        model = self.mw.message_types_model
+        if not model or self.mw.log_entries_full.empty:
             return
 
-        # Get currently selected levels
-        selected_levels = {level for level, is_selected in self.selected_log_levels.items() if is_selected}
-        df = self.mw.log_entries_full[self.mw.log_entries_full['log_level'].isin(selected_levels)]
-
-        if df.empty:
+        # Top N of the types shown under the type search, by frequency under the current levels and search
+        codes = model.visible_codes()
+        if not len(codes):
             return
-
-        # Get top N logger names by frequency
-        top_types = df['logger_name'].value_counts().nlargest(top_n).index.to_list()
-        top_types_set = set(top_types)
-
-        self.mw._enter_batch_update()
-        try:
-            tree = self.mw.message_types_tree
-            for i in range(tree.topLevelItemCount()):
-                item = tree.topLevelItem(i)
-                logger_name = item.text(0)
-                if logger_name in top_types_set:
-                    item.setCheckState(0, QtCore.Qt.Checked)
-                else:
-                    item.setCheckState(0, QtCore.Qt.Unchecked)
-        finally:
-            self.mw._exit_batch_update()
-        self.trigger_timeline_update_from_selection()
+        top_n = min(top_n, len(codes))
+        top_codes = codes[np.argpartition(-model.counts[codes], top_n - 1)[:top_n]]
+        top_mask = np.zeros(len(model.counts), dtype=bool)
+        top_mask[top_codes] = True
+        model.set_checked_mask(top_mask)
+        self.invalidate(self.STAGE_LIST, self.STAGE_TIMELINE)
 
     def select_top5_message_types(self):
         self._select_top_n_types_logic(5)
@@ -539,35 +739,22 @@ class AppLogic(QtCore.QObject):
         self._select_top_n_types_logic(10)
 
     def set_check_state_for_all_types(self, check_state):
-        if self.mw._is_batch_updating_ui or not self.mw.message_types_tree: return
-        self.mw._enter_batch_update()
-        self.mw.message_types_tree.blockSignals(True)
-        for i in range(self.mw.message_types_tree.topLevelItemCount()):
-            item = self.mw.message_types_tree.topLevelItem(i)
-            if item.checkState(0) != check_state:
-                item.setCheckState(0, check_state)
-        self.mw.message_types_tree.blockSignals(False)
-        self.mw._exit_batch_update()
-        self.trigger_timeline_update_from_selection()
+        if self.mw._is_batch_updating_ui or not self.mw.message_types_model: return
+        model = self.mw.message_types_model
+        model.set_checked_mask(np.full(len(model.logger_names), check_state == QtCore.Qt.Checked))
+        self.invalidate(self.STAGE_LIST, self.STAGE_TIMELINE)
 
     def set_check_state_for_visible_types(self, check_state):
-        if self.mw._is_batch_updating_ui: return
-        self.mw._enter_batch_update()
-        self.mw.message_types_tree.blockSignals(True)
-        for i in range(self.mw.message_types_tree.topLevelItemCount()):
-            item = self.mw.message_types_tree.topLevelItem(i)
-            if not item.isHidden():
-                if item.checkState(0) != check_state:
-                    item.setCheckState(0, check_state)
-        self.mw.message_types_tree.blockSignals(False)
-        self.mw._exit_batch_update()
-        self.trigger_timeline_update_from_selection() # This will call _apply_filters_and_update_views indirectly
+        if self.mw._is_batch_updating_ui or not self.mw.message_types_model: return
+        model = self.mw.message_types_model
+        model.set_checked_codes(model.visible_codes(), check_state == QtCore.Qt.Checked)
+        self.invalidate(self.STAGE_LIST, self.STAGE_TIMELINE)
 
     def toggle_log_level_filter(self, level_name, widget, is_checked):
+        if self.mw._is_batch_updating_ui: return  # Buttons are being synced to the state, not clicked
         if level_name in self.selected_log_levels:
             self.selected_log_levels[level_name] = is_checked
-            self._rebuild_message_types_data_and_list(select_all_visible=True)
-            self._apply_filters_and_update_views()
+            self.invalidate(self.STAGE_FILTER, select_all_types=True)
 
             # Update QCheckBox visual state via dynamic property
             if widget: # widget is the QCheckBox instance passed from the signal
@@ -592,8 +779,7 @@ class AppLogic(QtCore.QObject):
             for lvl in self.selected_log_levels:
                 self.selected_log_levels[lvl] = (lvl == level_name)
             
-            self._rebuild_message_types_data_and_list(select_all_visible=True)
-            self._apply_filters_and_update_views()
+            self.invalidate(self.STAGE_FILTER, select_all_types=True)
             # Update button states in UI (MainWindow needs a method for this)
             if hasattr(self.mw, 'update_log_level_button_states'): # Check if main window has this method
                 self.mw.update_log_level_button_states(self.selected_log_levels)
@@ -620,20 +806,20 @@ class AppLogic(QtCore.QObject):
             filtered_df = self.mw.log_entries_full[mask]
 
         if self.mw.timeline_canvas:
-            self.mw.timeline_canvas.set_full_log_data(filtered_df)
+            if filtered_df is self.mw.log_entries_full:
+                subset_index = self.get_log_index()
+            elif filtered_df.empty:
+                subset_index = None
+            else:
+                subset_index = LogIndex(filtered_df, logger_colors=self.get_log_index().logger_colors)
+            self.mw.timeline_canvas.set_full_log_data(filtered_df, subset_index)
 
     def set_granularity(self, granularity):
         # Update the timeline granularity and refresh the view
         if hasattr(self.mw, 'timeline_canvas') and self.mw.timeline_canvas:
             self.mw.timeline_canvas.current_time_granularity = granularity
             # Refresh the plot with selected types
-            selected_types = set()
-            if self.mw.message_types_tree:
-                for i in range(self.mw.message_types_tree.topLevelItemCount()):
-                    item = self.mw.message_types_tree.topLevelItem(i)
-                    if item.checkState(0) == QtCore.Qt.Checked:
-                        selected_types.add(item.text(0))
-            self.mw.timeline_canvas.update_display_config(selected_types, granularity)
+            self.mw.timeline_canvas.update_display_config(self._get_checked_message_types(), granularity)
 
     def pan_timeline_left(self):
         self._pan_timeline(direction=-1)
@@ -644,10 +830,10 @@ class AppLogic(QtCore.QObject):
     def _pan_timeline(self, direction):
         # direction: -1 for left, 1 for right
         canvas = getattr(self.mw, 'timeline_canvas', None)
-        if not canvas or not hasattr(canvas, 'ax'):
+        if not canvas or not hasattr(canvas, 'get_view_xlim'):
             return
         # Get current xlim (matplotlib date numbers)
-        xlim = canvas.ax.get_xlim()
+        xlim = canvas.get_view_xlim()
         view_width = xlim[1] - xlim[0]
         if view_width <= 0:
             return
@@ -677,8 +863,9 @@ class AppLogic(QtCore.QObject):
                 new_max = max_num
                 new_min = max_num - view_width
         # Update the view
-        if hasattr(canvas, 'plot_timeline'):
-            canvas.plot_timeline(xlim_override=(new_min, new_max))
+        canvas.set_view_xlim(new_min, new_max)
+        if hasattr(self.mw, 'sync_sliders_to_timeline_view'):
+            self.mw.sync_sliders_to_timeline_view(new_min, new_max)
 
     def _build_fts_index(self, df):
         if self.fts_db_conn:
@@ -743,8 +930,10 @@ class AppLogic(QtCore.QObject):
             self.fts_db_conn = None
 
     def _search_fts_index(self, search_text):
+        """Returns the rowids (log_entries_full index labels) matching search_text as an int64 array."""
+        no_match = np.empty(0, dtype=np.int64)
         if not self.fts_db_conn or not search_text or search_text.strip() == "":
-            return set()
+            return no_match
 
         try:
             cursor = self.fts_db_conn.cursor()
@@ -757,11 +946,11 @@ class AppLogic(QtCore.QObject):
             query = "SELECT rowid FROM log_index WHERE message_content MATCH ?"
             cursor.execute(query, (search_text,))
             
-            matching_indices = {row[0] for row in cursor.fetchall()}
+            matching_indices = np.fromiter((row[0] for row in cursor), dtype=np.int64)
             return matching_indices
         except sqlite3.Error as e:
             print(f"SQLite error during FTS search for '{search_text}': {e}")
-            return set()
+            return no_match
         except Exception as e:
             print(f"Unexpected error during FTS search for '{search_text}': {e}")
-            return set()
\ No newline at end of file
+            return no_match
\ No newline at end of file
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+from PyQt5 import QtCore
+
+
+class DatasetStats:
+    """Aggregates shown by StatsDialog, for a whole dataset or one filtered row set of it.
+
+    Bincounts over the LogIndex codes replace value_counts over the string columns, so this stays
+    well under a second on 10M rows. Whole-dataset stats run on DatasetStatsThread right after
+    loading; filtered ones are computed by AppLogic as the filters change, reusing the facet counts.
+    """
+
+    def __init__(self, log_index, rows=None, logger_counts=None, description="Whole dataset"):
+        if rows is not None and rows.is_full():
+            rows = None
+        self.fingerprint = log_index.fingerprint
+        self.description = description  # What the rows are, shown in the summary
+        self.row_count = log_index.row_count if rows is None else len(rows)
+        span_ns = log_index.time_span_ns(rows)
+        self.first_time, self.last_time = ((pd.Timestamp(span_ns[0]).to_pydatetime(), pd.Timestamp(span_ns[1]).to_pydatetime())
+                                           if span_ns else (None, None))
+        self.level_counts = pd.Series(log_index.level_counts(rows), index=log_index.level_names, name='count')
+        if logger_counts is None:
+            logger_counts = log_index.logger_counts(rows)
+        busiest_first = np.argsort(-logger_counts, kind='stable')
+        busiest_first = busiest_first[logger_counts[busiest_first] > 0]
+        self.logger_counts = pd.Series(logger_counts[busiest_first], index=log_index.logger_names[busiest_first],
+                                       name='count')
+        # Pareto line: share of all entries covered by the N busiest types
+        self.logger_cumulative_pct = np.cumsum(self.logger_counts.to_numpy()) / max(self.row_count, 1) * 100
+
+    @property
+    def nbytes(self):
+        return int(self.logger_counts.memory_usage(deep=True) + self.level_counts.memory_usage(deep=True) +
+                   self.logger_cumulative_pct.nbytes)
+
+
+class DatasetStatsThread(QtCore.QThread):
+    """Computes the DatasetStats of a LogIndex off the GUI thread."""
+    computed = QtCore.pyqtSignal(object)  # DatasetStats
+
+    def __init__(self, log_index, parent=None):
+        super().__init__(parent)
+        self.log_index = log_index
+
+    def run(self):
+        self.computed.emit(DatasetStats(self.log_index))
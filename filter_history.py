@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class FilterState:
+    """Immutable snapshot of every filter control: what back/forward navigation restores."""
+    __slots__ = ('levels', 'selected_types', 'time_window', 'search_text', 'granularity')
+
+    def __init__(self, levels, selected_types, time_window, search_text, granularity):
+        self.levels = frozenset(levels)  # Active log levels
+        self.selected_types = frozenset(selected_types)  # Checked message types
+        self.time_window = tuple(time_window) if time_window else None  # (start, end) datetimes or None
+        self.search_text = search_text or ""
+        self.granularity = granularity
+
+    @staticmethod
+    def base_key_for(levels, search_text):
+        return ('base', frozenset(levels), search_text or "")
+
+    def base_key(self):
+        """Key of the level + full-text search part, the only inputs of the base row set and facets."""
+        return self.base_key_for(self.levels, self.search_text)
+
+    def rows_key(self):
+        """Key of everything that decides the filtered rows (granularity only affects the timeline)."""
+        return ('rows', self.levels, self.search_text, self.selected_types, self.time_window)
+
+    def _key(self):
+        return self.rows_key() + (self.granularity,)
+
+    def __eq__(self, other):
+        return isinstance(other, FilterState) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def describe(self):
+        parts = [', '.join(sorted(self.levels)) or 'no level']
+        if self.search_text:
+            parts.append(f"'{self.search_text}'")
+        if self.time_window:
+            parts.append(f"{self.time_window[0].strftime('%H:%M:%S')}-{self.time_window[1].strftime('%H:%M:%S')}")
+        parts.append(f"{len(self.selected_types)} types")
+        parts.append(self.granularity)
+        return ' | '.join(parts)
+
+
+class FilterResultCache:
+    """LRU cache of computed filter results (row sets, facet counts) under a memory budget in bytes."""
+
+    def __init__(self, memory_budget_bytes=128 * 1024 * 1024):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size in bytes), least recently used first
+
+    @classmethod
+    def size_of(cls, value):
+        if isinstance(value, (tuple, list)):
+            return sum(cls.size_of(item) for item in value)
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, pd.Series):
+            return int(value.memory_usage(deep=True))
+        return int(getattr(value, 'nbytes', 0))
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        size = self.size_of(value)
+        if size > self.memory_budget_bytes:
+            return  # Would evict everything else for a single entry
+        if key in self._entries:
+            self.used_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self.used_bytes += size
+        while self.used_bytes > self.memory_budget_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.used_bytes -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.used_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FilterHistory:
+    """Undo/redo stack of FilterStates."""
+
+    def __init__(self, max_states=200):
+        self.max_states = max_states
+        self._states = []
+        self._position = -1  # Index of the current state in self._states
+
+    @property
+    def current(self):
+        return self._states[self._position] if self._position >= 0 else None
+
+    def push(self, state):
+        """Records a new current state; drops the redo branch. Returns False if nothing changed."""
+        if state == self.current:
+            return False
+        del self._states[self._position + 1:]
+        self._states.append(state)
+        if len(self._states) > self.max_states:
+            del self._states[0]
+        self._position = len(self._states) - 1
+        return True
+
+    def can_go_back(self):
+        return self._position > 0
+
+    def can_go_forward(self):
+        return self._position < len(self._states) - 1
+
+    def back(self):
+        if not self.can_go_back():
+            return None
+        self._position -= 1
+        return self.current
+
+    def forward(self):
+        if not self.can_go_forward():
+            return None
+        self._position += 1
+        return self.current
+
+    def clear(self):
+        self._states = []
+        self._position = -1
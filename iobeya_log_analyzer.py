@@ -10,9 +10,11 @@ import zipfile
 
 # Local imports
 from timeline_canvas import TimelineCanvas
+from timeline_painter import PainterTimeline, TimelineOverview
 from log_processing import LogLoaderThread
-from ui_widgets import SortableTreeWidgetItem, LoadingDialog, VirtualTreeWidget, SearchWidget, WelcomeWidget, AboutDialog
+from ui_widgets import MessageTypesModel, MessageTypesView, LoadingDialog, VirtualTreeWidget, SearchWidget, WelcomeWidget, AboutDialog
 from statistics_dialog import StatsDialog
+from anomalies_dialog import AnomaliesDialog
 from app_logic import AppLogic
 from date_selection_dialog import DateSelectionDialog
 
@@ -27,6 +29,7 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         self.selected_log_levels = {'INFO': False, 'WARN': False, 'ERROR': False, 'DEBUG': False}
         # self.top_loggers_for_selection_buttons = [] # This will be dynamically generated now
         self.stats_dialog = None
+        self.anomalies_dialog = None
         self.timeline_min_num_full_range = 0
         self.timeline_max_num_full_range = 100
         self.slider_scale_factor = 10000
@@ -122,12 +125,28 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         reset_view_action.triggered.connect(lambda: self.app_logic.reset_all_filters_and_view(initial_load=False))
         toolbar.addAction(reset_view_action)
 
+        # Filter history navigation (back/forward between filter states)
+        self.history_back_action = QtWidgets.QAction(self.style().standardIcon(QtWidgets.QStyle.SP_ArrowBack), "Previous Filters", self)
+        self.history_back_action.setToolTip("Go back to the previous filter state (Alt+Left)")
+        self.history_back_action.setShortcut(QtGui.QKeySequence.Back)
+        self.history_back_action.setEnabled(False)
+        self.history_back_action.triggered.connect(self.app_logic.go_back_in_filter_history)
+        toolbar.addAction(self.history_back_action)
+
+        self.history_forward_action = QtWidgets.QAction(self.style().standardIcon(QtWidgets.QStyle.SP_ArrowForward), "Next Filters", self)
+        self.history_forward_action.setToolTip("Go forward to the next filter state (Alt+Right)")
+        self.history_forward_action.setShortcut(QtGui.QKeySequence.Forward)
+        self.history_forward_action.setEnabled(False)
+        self.history_forward_action.triggered.connect(self.app_logic.go_forward_in_filter_history)
+        toolbar.addAction(self.history_forward_action)
+
         toolbar.addSeparator()
 
         # Search Widget (Main Search Bar)
         self.search_widget = SearchWidget(placeholder_text="Search all log messages (full-text)...")
         self.search_widget.search_changed.connect(self.app_logic.on_search_changed)
         self.search_widget.setMinimumWidth(300) # Give it some decent width
+        self.fts_search_widget = self.search_widget # Kept apart: self.search_widget is reassigned to the list search
         toolbar.addWidget(self.search_widget)
 
         toolbar.addSeparator()
@@ -206,6 +225,13 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         self.stats_button.clicked.connect(self.show_stats_panel)
         summary_info_layout.addWidget(self.stats_button)
 
+        self.anomalies_button = QtWidgets.QPushButton("⚡")
+        self.anomalies_button.setToolTip("Detect Bursts and Anomalies")
+        self.anomalies_button.setFixedSize(QtCore.QSize(22, 22))
+        self.anomalies_button.setStyleSheet("QPushButton { font-size: 14px; border: none; padding: 0px; } QPushButton:hover { background-color: #e0e0e0; }")
+        self.anomalies_button.clicked.connect(self.show_anomalies_panel)
+        summary_info_layout.addWidget(self.anomalies_button)
+
         summary_info_layout.addSpacing(10)
 
         self.total_label = QtWidgets.QLabel("0 entries")
@@ -245,17 +271,54 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         controls_layout.setContentsMargins(5, 2, 5, 2)
         controls_layout.addWidget(QtWidgets.QLabel("Time Granularity:"))
         self.granularity_combo = QtWidgets.QComboBox()
-        self.granularity_combo.addItems(['minute', 'hour', 'day'])
+        self.granularity_combo.addItems(['1s', '5s', '10s', '30s', 'minute', 'hour', 'day', 'auto'])
+        self.granularity_combo.setItemData(self.granularity_combo.findText('auto'),
+                                           "Bucket width follows the zoom level", QtCore.Qt.ToolTipRole)
         self.granularity_combo.setCurrentText('minute')
-        self.granularity_combo.currentTextChanged.connect(self.on_granularity_changed)
+        self.granularity_combo.currentTextChanged.connect(self.app_logic.on_granularity_changed)
         controls_layout.addWidget(self.granularity_combo)
         controls_layout.addStretch()
         section_layout.addWidget(controls_widget)
 
-        self.timeline_canvas = TimelineCanvas()
-        self.timeline_canvas.bar_clicked.connect(self.app_logic.on_timeline_bar_clicked)
-        self.timeline_canvas.time_range_updated.connect(self.update_timeline_sliders_range)
-        section_layout.addWidget(self.timeline_canvas)
+        # Two interchangeable timeline backends; self.timeline_canvas is the one shown, which is all AppLogic uses
+        self.matplotlib_timeline = TimelineCanvas()
+        self.painter_timeline = PainterTimeline()
+        self.timeline_stack = QtWidgets.QStackedWidget()
+        for timeline in (self.matplotlib_timeline, self.painter_timeline):
+            timeline.bar_clicked.connect(self.app_logic.on_timeline_bar_clicked)
+            timeline.time_range_updated.connect(self.update_timeline_sliders_range)
+            timeline.view_changed.connect(self.sync_sliders_to_timeline_view)
+            self.timeline_stack.addWidget(timeline)
+        self.timeline_canvas = self.matplotlib_timeline
+        section_layout.addWidget(self.timeline_stack)
+
+        self.timeline_overview = TimelineOverview()
+        self.timeline_overview.view_requested.connect(self.on_overview_view_requested)
+        section_layout.addWidget(self.timeline_overview)
+
+        self.background_render_checkbox = QtWidgets.QCheckBox("Background rendering")
+        self.background_render_checkbox.setToolTip("Draw the timeline on a worker thread so the window stays responsive")
+        self.background_render_checkbox.toggled.connect(self.matplotlib_timeline.set_background_rendering)
+        controls_layout.addWidget(self.background_render_checkbox)
+
+        controls_layout.addWidget(QtWidgets.QLabel("Display:"))
+        self.timeline_display_combo = QtWidgets.QComboBox()
+        self.timeline_display_combo.addItem('Bars', 'bars')
+        self.timeline_display_combo.addItem(f'Top {TimelineCanvas.TOP_K_SERIES} + Other', 'topk')
+        self.timeline_display_combo.addItem('Heatmap', 'heatmap')
+        self.timeline_display_combo.setItemData(1, "The busiest types in the visible window as their own stacks, the rest as Other; "
+                                                   "re-picked on every zoom and pan", QtCore.Qt.ToolTipRole)
+        self.timeline_display_combo.setItemData(2, "One row per message type, log-scale color; for many types", QtCore.Qt.ToolTipRole)
+        self.timeline_display_combo.currentIndexChanged.connect(
+            lambda index: self.matplotlib_timeline.set_display_mode(self.timeline_display_combo.itemData(index)))
+        controls_layout.addWidget(self.timeline_display_combo)
+
+        controls_layout.addWidget(QtWidgets.QLabel("Renderer:"))
+        self.timeline_renderer_combo = QtWidgets.QComboBox()
+        self.timeline_renderer_combo.addItems(['matplotlib', 'QPainter'])
+        self.timeline_renderer_combo.setItemData(1, "Paints the bars directly; wheel zooms, drag pans", QtCore.Qt.ToolTipRole)
+        self.timeline_renderer_combo.currentTextChanged.connect(self.on_timeline_renderer_changed)
+        controls_layout.addWidget(self.timeline_renderer_combo)
 
         slider_widget = QtWidgets.QWidget()
         slider_layout = QtWidgets.QGridLayout(slider_widget)
@@ -317,12 +380,16 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
                     self.deselect_all_visible_types_btn]: title_layout.addWidget(btn)
         layout.addLayout(title_layout)
 
-        self.message_types_tree = QtWidgets.QTreeWidget()
-        self.message_types_tree.setHeaderLabels(['Message Type', 'Count']);
+        # Model/view: counts and check state live in NumPy arrays, the view only paints visible rows
+        self.message_types_model = MessageTypesModel(self)
+        self.message_types_model.check_state_changed.connect(self.app_logic.on_message_type_check_state_changed)
+        self.message_types_tree = MessageTypesView()
+        self.message_types_tree.setModel(self.message_types_model)
+        self.message_types_tree.setRootIsDecorated(False)
+        self.message_types_tree.setUniformRowHeights(True)
         self.message_types_tree.setSortingEnabled(True)
         self.message_types_tree.setSelectionMode(
             QtWidgets.QAbstractItemView.ExtendedSelection)
-        self.message_types_tree.itemChanged.connect(self.app_logic.on_message_type_item_changed)
         header = self.message_types_tree.header();
         header.setStretchLastSection(False)
         header.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch);
@@ -386,6 +453,7 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
             lambda status_text, detail_text: self.loading_dialog.set_detail(detail_text))
         self.loader_thread.progress_bar_config.connect(self.loading_dialog.set_progress_range)
         self.loader_thread.progress_bar_update.connect(self.loading_dialog.set_progress_value)
+        self.loader_thread.counts_streamed.connect(self.on_counts_streamed)
         self.loader_thread.finished_loading.connect(self.on_log_data_loaded)
         self.loader_thread.error_occurred.connect(self.on_load_error)
         self.loader_thread.finished.connect(self.on_load_finished)
@@ -401,23 +469,12 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         self.message_type_search_timer.stop()
         self.message_type_search_timer.start(300)
 
-    def _apply_message_type_filter(self):
-        search_text = self.message_type_search_input.text().lower()
-        for i in range(self.message_types_tree.topLevelItemCount()):
-            item = self.message_types_tree.topLevelItem(i)
-            logger_name = item.text(0).lower()
-            if not search_text:
-                item.setHidden(False)
-            else:
-                item.setHidden(search_text not in logger_name)
-        # After filtering, top N buttons might need to be re-evaluated based on new visible set
-        # However, top_n logic is triggered by button click, so it will use current visible items.
-
     @QtCore.pyqtSlot(float, float)
     def update_timeline_sliders_range(self, min_num, max_num):
         self._enter_batch_update()
         self.timeline_min_num_full_range = min_num;
         self.timeline_max_num_full_range = max_num
+        self.timeline_overview.set_data(self.timeline_canvas.log_index, min_num, max_num)
 
         sliders_enabled = (
                     self.timeline_max_num_full_range > self.timeline_min_num_full_range + 1e-9)
@@ -440,6 +497,44 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         self._exit_batch_update()
         if not self._is_batch_updating_ui: self._apply_sliders_to_timeline_view()
 
+    def on_timeline_renderer_changed(self, renderer_name):
+        previous = self.timeline_canvas
+        timeline = self.painter_timeline if renderer_name == 'QPainter' else self.matplotlib_timeline
+        if timeline is previous:
+            return
+        self.timeline_canvas = timeline
+        self.timeline_stack.setCurrentWidget(timeline)
+        self.background_render_checkbox.setEnabled(timeline is self.matplotlib_timeline)
+        self.timeline_display_combo.setEnabled(timeline is self.matplotlib_timeline)  # Top K and heatmap are matplotlib-only
+        # The hidden backend got no updates: hand over the data and config (its time_range_updated resets the sliders)
+        timeline.set_full_log_data(previous.log_data_cache, previous.log_index)
+        timeline.update_display_config(previous.current_selected_message_types, previous.current_time_granularity)
+        timeline.set_anomalies(previous.anomalies)
+        if previous.streamed_counts is not None:  # Loading: keep the live preview going on the new backend
+            timeline.begin_streaming(previous.streamed_counts)
+            previous.end_streaming()
+
+    def sync_sliders_to_timeline_view(self, view_min_num, view_max_num):
+        """Moves the pan/zoom sliders to a view changed from the timeline itself, without feeding it back."""
+        total_data_span = self.timeline_max_num_full_range - self.timeline_min_num_full_range
+        if total_data_span <= 0:
+            return
+        view_width = view_max_num - view_min_num
+        pannable_range_num = total_data_span - view_width
+        zoom_value = round(view_width / total_data_span * self.slider_scale_factor)
+        pan_value = round((view_min_num - self.timeline_min_num_full_range) / pannable_range_num * self.slider_scale_factor) \
+            if pannable_range_num > 0 else 0
+        for slider, value in ((self.zoom_slider, zoom_value), (self.pan_slider, pan_value)):
+            slider.blockSignals(True)
+            slider.setValue(min(max(value, slider.minimum()), slider.maximum()))
+            slider.blockSignals(False)
+        self.timeline_overview.set_view(view_min_num, view_max_num)
+
+    def on_overview_view_requested(self, view_min_num, view_max_num):
+        # Moves the x-limits of the bars already built; nothing is recomputed
+        self.timeline_canvas.set_view_xlim(view_min_num, view_max_num)
+        self.sync_sliders_to_timeline_view(view_min_num, view_max_num)
+
     def on_slider_value_changed(self):
         if not self._is_batch_updating_ui:
             self._apply_sliders_to_timeline_view()
@@ -480,9 +575,11 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
 
         if view_start_num < view_end_num - 1e-9:
             self.timeline_canvas.set_time_window_from_sliders(view_start_num, view_end_num)
+            self.timeline_overview.set_view(view_start_num, view_end_num)
         elif total_data_span > 1e-9:
             self.timeline_canvas.set_time_window_from_sliders(self.timeline_min_num_full_range,
                                                               self.timeline_max_num_full_range)
+            self.timeline_overview.set_view(self.timeline_min_num_full_range, self.timeline_max_num_full_range)
 
     def load_log_file(self):
         file_path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -511,6 +608,16 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
                 else:
                     QtWidgets.QMessageBox.information(self, "No Files Selected", "No log files were found for the selected date range.")
 
+    def on_counts_streamed(self, new_logger_names, buckets, logger_codes, counts):
+        """Loader delta: the timeline shows the data as it is parsed, before the DataFrame exists."""
+        if self.centralWidget() == self.welcome_widget:
+            self.show_main_ui()
+        if self.timeline_canvas.streamed_counts is None:
+            self.timeline_canvas.begin_streaming()
+        self.timeline_canvas.append_counts(new_logger_names, buckets, logger_codes, counts)
+        if self.statusBar():
+            self.statusBar().showMessage(f"Chargement... {self.timeline_canvas.streamed_counts.row_count:,} entrées", 2000)
+
     def on_log_data_loaded(self, log_entries_df, failed_files_summary):
         if self.centralWidget() == self.welcome_widget and not log_entries_df.empty:
             self.show_main_ui()
@@ -523,21 +630,24 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         self.current_loaded_source_name = self.loader_thread.get_source_name() if self.loader_thread else "Unknown Source"
         self.setWindowTitle(f"iObeya Timeline Log Analyzer - {self.current_loaded_source_name}")
 
-        # Build FTS index using AppLogic
+        # Build FTS index and the column index (codes, sorted timestamps) using AppLogic
         if self.app_logic:
             self.app_logic._build_fts_index(self.log_entries_full)
+            self.app_logic.get_log_index()
+            self.app_logic.start_dataset_stats()  # Ready before the statistics panel is opened
 
         if self.stats_dialog and self.stats_dialog.isVisible():
             self.stats_dialog.close()
             self.stats_dialog = None
+        if self.anomalies_dialog and self.anomalies_dialog.isVisible():
+            self.anomalies_dialog.close()  # Also clears the highlights of the previous data
+            self.anomalies_dialog = None
 
-        self.timeline_canvas.set_full_log_data(self.log_entries_full)
+        self.timeline_canvas.set_full_log_data(self.log_entries_full,
+                                               self.app_logic.get_log_index() if self.app_logic else None)
+        # Schedules one pipeline pass (filters, types, list and timeline) for the new data
         self.app_logic.reset_all_filters_and_view(initial_load=True)
 
-        if not self.log_entries_full.empty and not self._is_batch_updating_ui:
-             self._trigger_timeline_update_from_selection()
-
-
         if failed_files_summary:
             error_details = "\n".join(
                 [f"- {fname}: {reason}" for fname, reason in failed_files_summary[:15]])
@@ -580,13 +690,15 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
                  self.selected_messages_list.set_all_items_data([])
             if hasattr(self, 'details_text'): self.details_text.clear()
             if hasattr(self, 'timeline_canvas'): self.timeline_canvas.clear_plot()
-            if hasattr(self, 'message_types_tree'): self.message_types_tree.clear()
+            if hasattr(self, 'message_types_model'): self.message_types_model.set_logger_names([])
             # Add other direct UI resets if necessary as a fallback
 
     def on_load_finished(self):
         """Called when the LogLoaderThread finishes, regardless of success or error."""
         if self.loading_dialog and self.loading_dialog.isVisible():
             self.loading_dialog.accept() # Ensure dialog is closed
+        # Cancelled or failed: no data replaced the live preview
+        self.timeline_canvas.end_streaming()
         # Further cleanup if loader_thread instance needs to be cleared, etc.
         # For now, just ensure dialog is closed.
 
@@ -628,88 +740,9 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
             total_entries = len(self.log_entries_full);
             self.total_label.setText(f"{total_entries:,} entries")
 
-    def _rebuild_message_types_data_and_list(self, select_all_visible=False):
-        if self.log_entries_full.empty: return
-
-        # Filter by selected log levels first
-        selected_levels = [level for level, is_selected in self.selected_log_levels.items() if is_selected]
-        if not selected_levels: return
-
-        filtered_df = self.log_entries_full[self.log_entries_full['log_level'].isin(selected_levels)]
-        if filtered_df.empty: return
-
-        # Get counts of logger_name
-        logger_counts = filtered_df['logger_name'].value_counts()
-
-        # Sort by count descending
-        sorted_loggers = logger_counts.sort_values(ascending=False).index.tolist()
-
-        current_checked_texts = set()
-        if not select_all_visible:
-            for i in range(self.message_types_tree.topLevelItemCount()):
-                item = self.message_types_tree.topLevelItem(i)
-                if item.checkState(0) == QtCore.Qt.Checked:
-                    current_checked_texts.add(item.text(0))
-
-        self.message_types_tree.blockSignals(True);
-        self.message_types_tree.clear();
-        items_to_add = []
-        for logger_name, data in self.message_types_data_for_list.items():
-            if data['count'] > 0:
-                item = SortableTreeWidgetItem([logger_name, str(data['count'])])
-                item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
-                item.setCheckState(0, QtCore.Qt.Checked if (
-                            select_all_visible or logger_name in current_checked_texts) else QtCore.Qt.Unchecked)
-                items_to_add.append(item)
-        if items_to_add: self.message_types_tree.addTopLevelItems(items_to_add)
-
-        current_sort_col = self.message_types_tree.sortColumn()
-        current_sort_order = self.message_types_tree.header().sortIndicatorOrder()
-        self.message_types_tree.sortItems(current_sort_col if current_sort_col != -1 else 1,
-                                          current_sort_order if current_sort_col != -1 else QtCore.Qt.DescendingOrder)
-        self.message_types_tree.blockSignals(False)
-        self._apply_message_type_filter()
-
-    def on_message_type_item_changed(self, item, column):
-        if not self._is_batch_updating_ui:
-            self._trigger_timeline_update_from_selection()
-
-    # Changed: New method to set check state for ALL types (hidden or not)
-    def set_check_state_for_all_types(self, check_state):
-        if self._is_batch_updating_ui: return
-        self._enter_batch_update()
-        self.message_types_tree.blockSignals(True)
-        for i in range(self.message_types_tree.topLevelItemCount()):
-            item = self.message_types_tree.topLevelItem(i)
-            # Operates on all items, regardless of hidden status
-            if item.checkState(0) != check_state:
-                item.setCheckState(0, check_state)
-        self.message_types_tree.blockSignals(False)
-        self._exit_batch_update()
-        self._trigger_timeline_update_from_selection()
-
-    # Changed: Renamed and modified to only act on VISIBLE (non-hidden) types
-    def set_check_state_for_visible_types(self, check_state):
-        if self._is_batch_updating_ui: return
-        self._enter_batch_update()
-        self.message_types_tree.blockSignals(True)
-        for i in range(self.message_types_tree.topLevelItemCount()):
-            item = self.message_types_tree.topLevelItem(i)
-            if not item.isHidden(): # Only operate on non-hidden items
-                if item.checkState(0) != check_state: item.setCheckState(0, check_state)
-        self.message_types_tree.blockSignals(False)
-        self._exit_batch_update()
-        self._trigger_timeline_update_from_selection()
-
     def _trigger_timeline_update_from_selection(self):
         if self._is_batch_updating_ui: return
-        selected_types = set()
-        for i in range(self.message_types_tree.topLevelItemCount()):
-            item = self.message_types_tree.topLevelItem(i)
-            if item.checkState(0) == QtCore.Qt.Checked:
-                 selected_types.add(item.text(0))
-
-        self.timeline_canvas.update_display_config(selected_types, self.granularity_combo.currentText())
+        self.app_logic.invalidate(AppLogic.STAGE_TIMELINE)
 
     def on_granularity_changed(self):
         if self._is_batch_updating_ui: return
@@ -719,54 +752,6 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
         self._exit_batch_update()
         self._trigger_timeline_update_from_selection()
 
-    def reset_all_filters_and_view(self, initial_load=False):
-        self._enter_batch_update()
-        try:
-            self.selected_log_levels = {'INFO': True, 'WARN': True, 'ERROR': True, 'DEBUG': True}
-            self.update_log_summary()
-
-            if hasattr(self, 'message_type_search_input'):
-                self.message_type_search_input.blockSignals(True)
-                self.message_type_search_input.clear()
-                self.message_type_search_input.blockSignals(False)
-
-            self._rebuild_message_types_data_and_list(select_all_visible=True)
-
-            if hasattr(self, 'pan_slider') and hasattr(self, 'zoom_slider'):
-                self.pan_slider.setValue(0);
-                self.zoom_slider.setValue(self.slider_scale_factor)
-
-            if hasattr(self, 'granularity_combo'):
-                self.granularity_combo.blockSignals(True)
-                default_granularity = 'minute'
-                if self.log_entries_full and self.loaded_source_type:
-                    if self.loaded_source_type == "archive":
-                        default_granularity = 'day'
-                    elif self.loaded_source_type == "single_file":
-                        default_granularity = 'hour'
-                self.granularity_combo.setCurrentText(default_granularity)
-                self.granularity_combo.blockSignals(False)
-
-            if hasattr(self, 'search_widget'): self.search_widget.clear_search()
-            if hasattr(self.selected_messages_list,
-                       'set_all_items_data'): self.selected_messages_list.set_all_items_data([])
-            if hasattr(self, 'details_text'): self.details_text.clear()
-        finally:
-            self._exit_batch_update()
-
-        if initial_load and self.log_entries_full.empty:
-            current_granularity = self.granularity_combo.currentText() if hasattr(self, 'granularity_combo') else 'minute'
-            self.timeline_canvas.update_display_config(set(), current_granularity)
-            self.update_timeline_sliders_range(0, 0)
-        elif not self.log_entries_full.empty:
-            self._trigger_timeline_update_from_selection()
-        else:
-            current_granularity = self.granularity_combo.currentText() if hasattr(self, 'granularity_combo') else 'minute'
-            self.timeline_canvas.update_display_config(set(), current_granularity)
-            self.update_timeline_sliders_range(0, 0)
-
-
-
     def on_message_selected(self):
         selected_items = self.selected_messages_list.selectedItems()
         if not selected_items: self.details_text.clear(); return
@@ -783,11 +768,35 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.information(self, "No Data", "Please load a log file first.")
             return
         if self.stats_dialog is None or not self.stats_dialog.isVisible():
-            self.stats_dialog = StatsDialog(self.log_entries_full, self)
+            self.app_logic.start_dataset_stats()  # No-op when cached; otherwise the dialog fills in when done
+            self.stats_dialog = StatsDialog(self.log_entries_full, self, self.app_logic.get_log_index().logger_colors,
+                                            self.app_logic.view_stats())
+            # Follows the filters live (pipeline stats stage); the scope combo switches to the whole dataset
+            self.stats_dialog.scope_changed.connect(self.app_logic.refresh_stats_dialog)
             self.stats_dialog.show()
         else:
             self.stats_dialog.activateWindow()
 
+    def show_anomalies_panel(self):
+        if self.log_entries_full.empty:
+            QtWidgets.QMessageBox.information(self, "No Data", "Please load a log file first.")
+            return
+        if self.anomalies_dialog is None or not self.anomalies_dialog.isVisible():
+            self.anomalies_dialog = AnomaliesDialog(self)
+            self.anomalies_dialog.bucket_changed.connect(self.on_anomaly_bucket_changed)
+            self.anomalies_dialog.anomaly_selected.connect(self.app_logic.apply_anomaly_time_filter)
+            # The bursts stay highlighted on the timeline while their list is open
+            self.anomalies_dialog.finished.connect(lambda result: self.timeline_canvas.set_anomalies([]))
+            self.anomalies_dialog.show()
+            self.app_logic.start_anomaly_detection(self.anomalies_dialog.bucket_ns)
+        else:
+            self.anomalies_dialog.activateWindow()
+
+    def on_anomaly_bucket_changed(self):
+        self.anomalies_dialog.set_report(None)
+        self.timeline_canvas.set_anomalies([])
+        self.app_logic.start_anomaly_detection(self.anomalies_dialog.bucket_ns)
+
     def closeEvent(self, event):
         if self.loader_thread and self.loader_thread.isRunning():
             self.loader_thread.stop()
@@ -795,6 +804,10 @@ class LogAnalyzerApp(QtWidgets.QMainWindow):
                 self.loader_thread.terminate()
         if self.loading_dialog and self.loading_dialog.isVisible(): self.loading_dialog.reject()
         if self.stats_dialog and self.stats_dialog.isVisible(): self.stats_dialog.close()
+        if self.anomalies_dialog and self.anomalies_dialog.isVisible(): self.anomalies_dialog.close()
+        self.app_logic.wait_for_dataset_stats()
+        self.app_logic.wait_for_anomaly_detection()
+        self.matplotlib_timeline.set_background_rendering(False)  # Stops the render thread
         super().closeEvent(event)
 
 
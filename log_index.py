@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+from logger_colors import LoggerColors
+from row_bitmap import RowBitmap
+from time_buckets import CUBE_GRANULARITY_NS, CUBE_MIN_BUCKET_NS, GRANULARITY_NS, TimeBucketCube, TimelineSeries
+
+
+class LogIndex:
+    """Per-dataset column index built once after loading.
+
+    Holds the integer views of the DataFrame the filters work on (int64 timestamps, logger and
+    level codes) and answers filter questions as RowBitmap row sets: level masks, logger sets,
+    time slices (binary search on the sorted timestamps) and full-text search hits.
+    """
+
+    def __init__(self, log_entries, logger_colors=None):
+        self.row_count = len(log_entries)
+        self.index_labels = log_entries.index
+
+        if self.row_count and 'datetime_obj' in log_entries.columns:
+            datetimes = pd.to_datetime(log_entries['datetime_obj'], errors='coerce')
+            self.timestamps_ns = datetimes.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        else:
+            self.timestamps_ns = np.empty(self.row_count, dtype=np.int64)
+
+        self.logger_codes, self.logger_names = self._factorize(log_entries, 'logger_name')
+        self.level_codes, self.level_names = self._factorize(log_entries, 'log_level')
+        self._logger_code_by_name = {name: code for code, name in enumerate(self.logger_names)}
+        self._level_code_by_name = {name: code for code, name in enumerate(self.level_names)}
+
+        # The loader sorts entries chronologically; keep an explicit order only if that does not hold.
+        if self.row_count > 1 and not np.all(self.timestamps_ns[1:] >= self.timestamps_ns[:-1]):
+            self._time_order = np.argsort(self.timestamps_ns, kind='stable')
+            self._sorted_timestamps_ns = self.timestamps_ns[self._time_order]
+        else:
+            self._time_order = None
+            self._sorted_timestamps_ns = self.timestamps_ns
+        self._level_rows_cache = {}
+        self._bucket_cubes = {}  # bucket width (ns) -> TimeBucketCube, built on first use
+        # Subsets of a dataset (e.g. a date range) pass the parent's colors so loggers keep theirs
+        self._logger_colors = logger_colors
+
+    @staticmethod
+    def _factorize(log_entries, column):
+        if column not in log_entries.columns or not len(log_entries):
+            return np.full(len(log_entries), -1, dtype=np.int32), np.empty(0, dtype=object)  # -1: missing, like factorize
+        codes, uniques = pd.factorize(log_entries[column], sort=True)
+        return codes.astype(np.int32), np.asarray(uniques, dtype=object)
+
+    @property
+    def is_chronological(self):
+        return self._time_order is None
+
+    @property
+    def logger_colors(self):
+        """LoggerColors of the dataset, built on first use."""
+        if self._logger_colors is None:
+            self._logger_colors = LoggerColors(self.logger_names)
+        return self._logger_colors
+
+    def logger_code(self, logger_name):
+        return self._logger_code_by_name.get(logger_name)
+
+    def logger_codes_for(self, logger_names):
+        codes = [self._logger_code_by_name[name] for name in logger_names if name in self._logger_code_by_name]
+        return np.array(codes, dtype=np.int32)
+
+    def all_rows(self):
+        return RowBitmap.full(self.row_count)
+
+    def level_rows(self, levels):
+        """Rows whose level is one of `levels`; per-level bitmaps are cached for the dataset lifetime."""
+        rows = RowBitmap.empty(self.row_count)
+        for level in levels:
+            code = self._level_code_by_name.get(level)
+            if code is None:
+                continue
+            if code not in self._level_rows_cache:
+                self._level_rows_cache[code] = RowBitmap.from_mask(self.level_codes == code)
+            rows = rows | self._level_rows_cache[code]
+        return rows
+
+    def logger_rows(self, logger_names):
+        """Rows logged by any of `logger_names`, in one pass over the logger codes."""
+        return self.logger_rows_for_codes(self.logger_codes_for(logger_names))
+
+    def logger_rows_for_codes(self, codes):
+        selected = np.zeros(len(self.logger_names) + 1, dtype=bool)  # Last slot: code -1 (no logger), never selected
+        selected[codes] = True
+        return RowBitmap.from_mask(selected[self.logger_codes]) if self.row_count else RowBitmap.empty(0)
+
+    def logger_counts(self, rows=None):
+        """Number of rows per logger code, over `rows` (a RowBitmap) or the whole dataset."""
+        codes = self.logger_codes if rows is None else self.logger_codes[rows.to_indices()]
+        return np.bincount(codes[codes >= 0], minlength=len(self.logger_names)).astype(np.int64)
+
+    def level_counts(self, rows=None):
+        """Number of rows per level code, over `rows` (a RowBitmap) or the whole dataset."""
+        codes = self.level_codes if rows is None else self.level_codes[rows.to_indices()]
+        return np.bincount(codes[codes >= 0], minlength=len(self.level_names)).astype(np.int64)
+
+    @property
+    def fingerprint(self):
+        """Cheap identity of the dataset contents: row count, time span and the logger and level names."""
+        return (self.row_count, self.time_span_ns(), hash(tuple(self.logger_names)), hash(tuple(self.level_names)))
+
+    def time_rows(self, start_time, end_time):
+        """Rows with start_time <= timestamp < end_time, found by binary search."""
+        lo, hi = self._time_slice(pd.Timestamp(start_time).value, pd.Timestamp(end_time).value)
+        if self._time_order is None:
+            return RowBitmap.from_range(self.row_count, lo, hi)
+        return RowBitmap.from_indices(self.row_count, self._time_order[lo:hi])
+
+    def time_positions(self, start_ns, end_ns):
+        """Row positions with start_ns <= timestamp < end_ns, in time order."""
+        lo, hi = self._time_slice(start_ns, end_ns)
+        return np.arange(lo, hi) if self._time_order is None else self._time_order[lo:hi]
+
+    def _time_slice(self, start_ns, end_ns):
+        return (int(np.searchsorted(self._sorted_timestamps_ns, start_ns, side='left')),
+                int(np.searchsorted(self._sorted_timestamps_ns, end_ns, side='left')))
+
+    def bucket_cube(self, granularity):
+        """TimeBucketCube of the whole dataset at `granularity`, built once per dataset."""
+        return self.bucket_cube_ns(GRANULARITY_NS[granularity])
+
+    def bucket_cube_ns(self, bucket_ns):
+        """TimeBucketCube for any bucket width; widths between granularities are summed from a finer cube."""
+        if bucket_ns not in self._bucket_cubes:
+            base_ns = max((ns for ns in CUBE_GRANULARITY_NS if ns < bucket_ns and bucket_ns % ns == 0), default=None)
+            if bucket_ns in CUBE_GRANULARITY_NS or base_ns is None:
+                self._bucket_cubes[bucket_ns] = TimeBucketCube.build(
+                    self.timestamps_ns, self.logger_codes, self.level_codes,
+                    len(self.logger_names), len(self.level_names), bucket_ns)
+            else:
+                self._bucket_cubes[bucket_ns] = self.bucket_cube_ns(base_ns).rebucket(bucket_ns)
+        return self._bucket_cubes[bucket_ns]
+
+    def timeline_series(self, logger_codes, bucket_ns, window_ns=None):
+        """TimelineSeries of the given loggers over window_ns (start, end), or over everything if None.
+
+        Sub-minute widths are counted from the rows of the window, wider ones are sliced from a cube.
+        """
+        logger_names = self.logger_names[logger_codes]
+        if bucket_ns < CUBE_MIN_BUCKET_NS:
+            positions = self.time_positions(*window_ns) if window_ns is not None else slice(None)
+            return TimelineSeries.from_rows(self.timestamps_ns[positions], self.logger_codes[positions],
+                                            len(self.logger_names), logger_codes, logger_names, bucket_ns)
+        cube = self.bucket_cube_ns(bucket_ns)
+        start, stop = cube.bucket_range(*window_ns) if window_ns is not None else (0, None)
+        return TimelineSeries.from_cube(cube, logger_codes, logger_names, start=start, stop=stop)
+
+    def time_span_ns(self, rows=None):
+        """(first, last) valid timestamp in ns of `rows` (a RowBitmap) or the whole dataset, None without timestamps."""
+        if rows is not None:
+            timestamps_ns = self.timestamps_ns[rows.to_indices()]
+            valid = timestamps_ns[timestamps_ns != np.iinfo(np.int64).min]
+            return (int(valid.min()), int(valid.max())) if len(valid) else None
+        valid = self._sorted_timestamps_ns[self._sorted_timestamps_ns != np.iinfo(np.int64).min]
+        return (int(valid[0]), int(valid[-1])) if len(valid) else None
+
+    def rows_from_labels(self, labels):
+        """Rows for DataFrame index labels, e.g. the rowids returned by the full-text search."""
+        labels = np.asarray(labels, dtype=np.int64)
+        if isinstance(self.index_labels, pd.RangeIndex) and self.index_labels.start == 0 and self.index_labels.step == 1:
+            return RowBitmap.from_indices(self.row_count, labels)
+        positions = self.index_labels.get_indexer(labels)
+        return RowBitmap.from_indices(self.row_count, positions[positions >= 0])
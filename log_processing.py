@@ -10,6 +10,7 @@ import zipfile
 import gzip
 import io
 import os # For path basename
+import numpy as np
 import pandas as pd
 
 class LogLoaderThread(QtCore.QThread):
@@ -18,6 +19,8 @@ class LogLoaderThread(QtCore.QThread):
     progress_bar_update = QtCore.pyqtSignal(int)  # value
     finished_loading = QtCore.pyqtSignal(pd.DataFrame, list)  # log_entries_df, failed_files_summary
     error_occurred = QtCore.pyqtSignal(str)
+    # Live timeline preview while parsing: new logger names, minute buckets (minutes since epoch), logger codes, counts
+    counts_streamed = QtCore.pyqtSignal(list, object, object, object)
 
     def __init__(self, file_path=None, archive_path=None, files_to_process=None):
         super().__init__()
@@ -27,6 +30,8 @@ class LogLoaderThread(QtCore.QThread):
         self.should_stop = False
         self.encodings_to_try = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']  # Common encodings
         self.datetime_format_for_parsing = '%Y-%m-%d %H:%M:%S'
+        self._streamed_logger_codes = {}  # Logger name -> code in counts_streamed, by first appearance
+        self._pending_counts = Counter()  # (minute 'YYYY-MM-DD HH:MM', logger name) -> count since the last flush
 
     def get_source_name(self):
         if self.archive_path:
@@ -154,16 +159,21 @@ class LogLoaderThread(QtCore.QThread):
                 found_encoding = False
                 for enc in self.encodings_to_try:
                     if self.should_stop: break
+                    # A decode error can come late in the file: the counts of a failed attempt must not reach the preview
+                    self._pending_counts = Counter()
                     try:
                         text_stream = io.TextIOWrapper(io.BytesIO(decompressed_bytes), encoding=enc, errors='strict')
                         text_stream.readline()  # Test read
                         text_stream.seek(0)  # Reset
                         all_entries = self._parse_log_from_iterator(text_stream,
-                                                                    source_name=os.path.basename(file_path_to_process))
+                                                                    source_name=os.path.basename(file_path_to_process),
+                                                                    stream_counts=False)
                         found_encoding = True;
                         break
                     except:
                         continue  # Try next encoding
+                if found_encoding:
+                    self._flush_streamed_counts()  # The whole file at once, now that its encoding is known
                 if not found_encoding and not self.should_stop:
                     raise IOError(f"GZ: Could not decode {os.path.basename(file_path_to_process)}")
             else:  # Plain text .log file
@@ -189,7 +199,9 @@ class LogLoaderThread(QtCore.QThread):
             raise Exception(f"Error processing file {os.path.basename(file_path_to_process)}: {e}")
         return all_entries
 
-    def _parse_log_from_iterator(self, file_iterator, source_name=""):
+    def _parse_log_from_iterator(self, file_iterator, source_name="", stream_counts=True):
+        """Parses log entries. With stream_counts False, their per-minute counts are left in _pending_counts
+        for the caller to flush (or drop) instead of being streamed while parsing."""
         # Example: 2023-03-15 10:30:00 INFO [com.example.Logger] Message content
         entry_pattern = re.compile(
             r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+'  # Timestamp (Group 1)
@@ -206,6 +218,8 @@ class LogLoaderThread(QtCore.QThread):
             line_count += 1
             if line_count % 20000 == 0:  # Update progress periodically for large files
                 self.progress_update.emit(f"Parsing {source_name}...", f"~{line_count // 1000}k lines")
+                if stream_counts:
+                    self._flush_streamed_counts()
 
             match = entry_pattern.match(line_text)
             if match:
@@ -214,6 +228,7 @@ class LogLoaderThread(QtCore.QThread):
                 parsed_dt = datetime.min  # Default for unparseable or error
                 try:
                     parsed_dt = datetime.strptime(dt_str, self.datetime_format_for_parsing)
+                    self._pending_counts[(dt_str[:16], lgr)] += 1
                 except ValueError:
                     pass  # Keep parsed_dt as datetime.min if format error
 
@@ -230,11 +245,31 @@ class LogLoaderThread(QtCore.QThread):
                 current_entry['full_entry'] += line_text  # Add to full entry
 
         if current_entry and not self.should_stop: log_entries.append(current_entry)  # Add the last entry
+        if stream_counts:
+            self._flush_streamed_counts()
 
         # Post-process to join message lines
         for entry in log_entries:
             entry['message'] = '\n'.join(entry['message_lines'])
         return log_entries
 
+    def _flush_streamed_counts(self):
+        """Emits the per-minute counts parsed since the last flush as one counts_streamed delta."""
+        if not self._pending_counts or self.should_stop:
+            return
+        keys = list(self._pending_counts)
+        new_logger_names = []
+        logger_codes = np.empty(len(keys), dtype=np.int32)
+        for i, (_, logger_name) in enumerate(keys):
+            code = self._streamed_logger_codes.get(logger_name)
+            if code is None:
+                code = self._streamed_logger_codes[logger_name] = len(self._streamed_logger_codes)
+                new_logger_names.append(logger_name)
+            logger_codes[i] = code
+        minutes = np.array([minute for minute, _ in keys], dtype='datetime64[m]').astype(np.int64)
+        counts = np.fromiter(self._pending_counts.values(), dtype=np.int64, count=len(keys))
+        self._pending_counts = Counter()
+        self.counts_streamed.emit(new_logger_names, minutes, logger_codes, counts)
+
     def stop(self):
         self.should_stop = True
\ No newline at end of file
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+import colorsys
+import zlib
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+_GOLDEN_RATIO_CONJUGATE = 0.6180339887
+
+
+class LoggerColors:
+    """Stable logger name -> RGBA color of one dataset, shared by the timeline and the statistics charts.
+
+    Colors are assigned once from the sorted logger names, so a logger keeps its color whatever the
+    selection, the redraw or the chart. Up to 12 loggers get the Set3 colors the timeline always used;
+    more get hues spread by the golden ratio, so neighbours in name order never look alike.
+    Names outside the set get a color from a hash of the name; a dataset still loading, whose names
+    are not all known yet, is drawn with LoggerColors([]) so its colors never shift while it grows.
+    """
+
+    def __init__(self, logger_names):
+        names = sorted(set(logger_names))
+        self._index_by_name = {name: index for index, name in enumerate(names)}
+        self._rgba = self._palette(len(names))
+
+    @staticmethod
+    def _palette(n_colors):
+        if n_colors <= 12:
+            return plt.cm.Set3(np.arange(max(n_colors, 1)))[:n_colors]
+        hues = (np.arange(n_colors) * _GOLDEN_RATIO_CONJUGATE) % 1.0
+        return np.array([colorsys.hsv_to_rgb(hue, 0.45, 0.9) + (1.0,) for hue in hues])
+
+    def rgba(self, logger_name):
+        index = self._index_by_name.get(logger_name)
+        if index is not None:
+            return tuple(self._rgba[index])
+        # Not in the dataset (e.g. a remembered selection): still the same color every time
+        hue = (zlib.crc32(str(logger_name).encode('utf-8')) % 1000) / 1000.0
+        return colorsys.hsv_to_rgb(hue, 0.45, 0.9) + (1.0,)
+
+    def rgba_list(self, logger_names):
+        return [self.rgba(name) for name in logger_names]
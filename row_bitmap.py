@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+import numpy as np
+
+# Number of set bits for every byte value, used to count bitmap containers
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class RowBitmap:
+    """Compressed set of row positions (roaring style).
+
+    Rows are split into chunks of 65536 positions. Each non-empty chunk is kept either as a sorted
+    uint16 array of offsets (sparse chunks) or as a 1024-word uint64 bitmap (dense chunks), whichever
+    is smaller. A full 20M-row selection costs ~2.5 MB instead of 20 MB for a boolean mask, and
+    AND/OR/cardinality work chunk by chunk without materializing row indices.
+    """
+    CHUNK_BITS = 16
+    CHUNK_SIZE = 1 << CHUNK_BITS
+    WORDS_PER_CHUNK = CHUNK_SIZE // 64
+    ARRAY_MAX = 4096  # Above this many rows an array container is bigger than a bitmap container
+
+    def __init__(self, size, containers=None):
+        self.size = int(size)  # Number of rows in the universe (e.g. len(log_entries))
+        self._containers = containers if containers is not None else {}  # chunk key -> ndarray
+        self._cardinalities = None  # Lazily computed, aligned with self._sorted_keys()
+
+    # --- Construction ---
+
+    @classmethod
+    def empty(cls, size):
+        return cls(size)
+
+    @classmethod
+    def full(cls, size):
+        return cls.from_range(size, 0, size)
+
+    @classmethod
+    def from_range(cls, size, start, stop):
+        """Rows start <= row < stop, e.g. a time slice found by binary search on sorted timestamps."""
+        start, stop = max(int(start), 0), min(int(stop), int(size))
+        containers = {}
+        if start < stop:
+            for key in range(start >> cls.CHUNK_BITS, ((stop - 1) >> cls.CHUNK_BITS) + 1):
+                chunk_start = key << cls.CHUNK_BITS
+                lo = max(start - chunk_start, 0)
+                hi = min(stop - chunk_start, cls.CHUNK_SIZE)
+                if hi - lo <= cls.ARRAY_MAX:
+                    containers[key] = np.arange(lo, hi, dtype=np.uint16)
+                else:
+                    chunk_mask = np.zeros(cls.CHUNK_SIZE, dtype=bool)
+                    chunk_mask[lo:hi] = True
+                    containers[key] = cls._pack(chunk_mask)
+        return cls(size, containers)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Builds the bitmap of the True positions of a boolean array or Series."""
+        mask = np.asarray(mask, dtype=bool)
+        containers = {}
+        for key, chunk_start in enumerate(range(0, len(mask), cls.CHUNK_SIZE)):
+            chunk_mask = mask[chunk_start:chunk_start + cls.CHUNK_SIZE]
+            count = int(np.count_nonzero(chunk_mask))
+            if count == 0:
+                continue
+            if count <= cls.ARRAY_MAX:
+                containers[key] = np.flatnonzero(chunk_mask).astype(np.uint16)
+            else:
+                containers[key] = cls._pack(chunk_mask)
+        return cls(len(mask), containers)
+
+    @classmethod
+    def from_indices(cls, size, indices):
+        """Builds the bitmap of the given row positions (any order, duplicates allowed)."""
+        indices = np.unique(np.asarray(indices, dtype=np.int64))
+        indices = indices[(indices >= 0) & (indices < size)]
+        containers = {}
+        if indices.size:
+            keys = indices >> cls.CHUNK_BITS
+            boundaries = np.flatnonzero(np.diff(keys)) + 1
+            for chunk_indices in np.split(indices, boundaries):
+                key = int(chunk_indices[0] >> cls.CHUNK_BITS)
+                offsets = (chunk_indices - (key << cls.CHUNK_BITS)).astype(np.uint16)
+                if offsets.size <= cls.ARRAY_MAX:
+                    containers[key] = offsets
+                else:
+                    chunk_mask = np.zeros(cls.CHUNK_SIZE, dtype=bool)
+                    chunk_mask[offsets] = True
+                    containers[key] = cls._pack(chunk_mask)
+        return cls(size, containers)
+
+    # --- Container helpers ---
+
+    @classmethod
+    def _pack(cls, chunk_mask):
+        if len(chunk_mask) < cls.CHUNK_SIZE:
+            padded = np.zeros(cls.CHUNK_SIZE, dtype=bool)
+            padded[:len(chunk_mask)] = chunk_mask
+            chunk_mask = padded
+        return np.packbits(chunk_mask, bitorder='little').view('<u8')
+
+    @staticmethod
+    def _is_bitmap(container):
+        return container.dtype != np.uint16
+
+    @staticmethod
+    def _container_cardinality(container):
+        if container.dtype == np.uint16:
+            return len(container)
+        return int(_POPCOUNT8[container.view(np.uint8)].sum(dtype=np.int64))
+
+    @classmethod
+    def _decode(cls, container):
+        if container.dtype == np.uint16:
+            return container
+        bits = np.unpackbits(container.view(np.uint8), bitorder='little')
+        return np.flatnonzero(bits).astype(np.uint16)
+
+    @classmethod
+    def _normalize(cls, container):
+        """Keeps the smaller representation for a container; None when it is empty."""
+        if container.dtype == np.uint16:
+            if len(container) == 0:
+                return None
+            if len(container) > cls.ARRAY_MAX:
+                chunk_mask = np.zeros(cls.CHUNK_SIZE, dtype=bool)
+                chunk_mask[container] = True
+                return cls._pack(chunk_mask)
+            return container
+        count = cls._container_cardinality(container)
+        if count == 0:
+            return None
+        if count <= cls.ARRAY_MAX:
+            return cls._decode(container)
+        return container
+
+    @staticmethod
+    def _bits_set(words, offsets):
+        offsets = offsets.astype(np.uint64)
+        return ((words[offsets >> np.uint64(6)] >> (offsets & np.uint64(63))) & np.uint64(1)).astype(bool)
+
+    @classmethod
+    def _and_containers(cls, a, b):
+        a_bitmap, b_bitmap = cls._is_bitmap(a), cls._is_bitmap(b)
+        if a_bitmap and b_bitmap:
+            return cls._normalize(a & b)
+        if a_bitmap:
+            a, b = b, a
+        if cls._is_bitmap(b):
+            return cls._normalize(a[cls._bits_set(b, a)])
+        return cls._normalize(np.intersect1d(a, b, assume_unique=True))
+
+    @classmethod
+    def _or_containers(cls, a, b):
+        a_bitmap, b_bitmap = cls._is_bitmap(a), cls._is_bitmap(b)
+        if a_bitmap and b_bitmap:
+            return a | b
+        if a_bitmap:
+            a, b = b, a
+        if cls._is_bitmap(b):
+            chunk_mask = np.unpackbits(b.view(np.uint8), bitorder='little').astype(bool)
+            chunk_mask[a] = True
+            return cls._pack(chunk_mask)
+        return cls._normalize(np.union1d(a, b).astype(np.uint16))
+
+    # --- Set algebra ---
+
+    def __and__(self, other):
+        result = {}
+        for key in self._containers.keys() & other._containers.keys():
+            container = self._and_containers(self._containers[key], other._containers[key])
+            if container is not None:
+                result[key] = container
+        return RowBitmap(self.size, result)
+
+    def __or__(self, other):
+        result = dict(self._containers)
+        for key, container in other._containers.items():
+            result[key] = self._or_containers(result[key], container) if key in result else container
+        return RowBitmap(max(self.size, other.size), result)
+
+    def __len__(self):
+        return int(self._get_cardinalities().sum())
+
+    def __eq__(self, other):
+        if not isinstance(other, RowBitmap):
+            return NotImplemented
+        if self._containers.keys() != other._containers.keys():
+            return False
+        return all(np.array_equal(self._decode(self._containers[key]), self._decode(other._containers[key]))
+                   for key in self._containers)
+
+    __hash__ = None
+
+    def is_full(self):
+        return len(self) == self.size
+
+    @property
+    def nbytes(self):
+        return sum(container.nbytes for container in self._containers.values())
+
+    # --- Materialization ---
+
+    def _sorted_keys(self):
+        return sorted(self._containers)
+
+    def _get_cardinalities(self):
+        if self._cardinalities is None:
+            self._cardinalities = np.array([self._container_cardinality(self._containers[key])
+                                            for key in self._sorted_keys()], dtype=np.int64)
+        return self._cardinalities
+
+    def to_indices(self):
+        """All row positions in ascending order (int64)."""
+        parts = [self._decode(self._containers[key]).astype(np.int64) + (key << self.CHUNK_BITS)
+                 for key in self._sorted_keys()]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def to_mask(self):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.to_indices()] = True
+        return mask
+
+    def select(self, start, stop):
+        """Row positions ranked start <= rank < stop, only decoding the chunks that hold them (paging)."""
+        cardinalities = self._get_cardinalities()
+        total = int(cardinalities.sum())
+        start, stop = max(int(start), 0), min(int(stop), total)
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+        ends = np.cumsum(cardinalities)
+        first = int(np.searchsorted(ends, start, side='right'))
+        last = int(np.searchsorted(ends, stop - 1, side='right'))
+        keys = self._sorted_keys()
+        parts = [self._decode(self._containers[keys[i]]).astype(np.int64) + (keys[i] << self.CHUNK_BITS)
+                 for i in range(first, last + 1)]
+        offset = int(ends[first - 1]) if first > 0 else 0
+        return np.concatenate(parts)[start - offset:stop - offset]
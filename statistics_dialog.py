@@ -9,16 +9,42 @@ from matplotlib.figure import Figure
 import numpy as np
 from matplotlib.ticker import PercentFormatter
 
+from logger_colors import LoggerColors
+
 
 class StatsDialog(QtWidgets.QDialog):
-    def __init__(self, all_log_entries, parent=None):
+    """Statistics of the current filtered view or of the whole loaded dataset (scope combo).
+
+    Shows DatasetStats given by AppLogic, which calls set_stats() again whenever the filters change;
+    with none yet the dialog opens at once and fills in later. Chart tabs are drawn when shown.
+    """
+    scope_changed = QtCore.pyqtSignal()
+
+    def __init__(self, all_log_entries, parent=None, logger_colors=None, stats=None):
         super().__init__(parent);
         self.all_log_entries = all_log_entries
-        self.setWindowTitle("Global Log Statistics");
+        self.stats = stats
+        # Same logger colors as the timeline when given by the main window
+        if logger_colors is None:
+            logger_names = all_log_entries['logger_name'].unique() if 'logger_name' in all_log_entries.columns else []
+            logger_colors = LoggerColors(logger_names)
+        self.logger_colors = logger_colors
+        self.setWindowTitle("Log Statistics");
         self.setMinimumSize(800, 600)
         layout = QtWidgets.QVBoxLayout(self);
+
+        scope_layout = QtWidgets.QHBoxLayout()
+        scope_layout.addWidget(QtWidgets.QLabel("Scope:"))
+        self.scope_combo = QtWidgets.QComboBox()
+        self.scope_combo.addItem("Current filtered view", 'view')
+        self.scope_combo.addItem("Whole dataset", 'dataset')
+        self.scope_combo.currentIndexChanged.connect(lambda index: self.scope_changed.emit())
+        scope_layout.addWidget(self.scope_combo)
+        scope_layout.addStretch(1)
+        layout.addLayout(scope_layout)
         tab_widget = QtWidgets.QTabWidget();
         layout.addWidget(tab_widget)
+        self.tab_widget = tab_widget
 
         # Summary Tab
         self.summary_tab = QtWidgets.QWidget()
@@ -26,15 +52,13 @@ class StatsDialog(QtWidgets.QDialog):
         summary_layout.setContentsMargins(10, 10, 10, 10)
         summary_layout.setSpacing(15)
         tab_widget.addTab(self.summary_tab, "Overall Summary")
-        self.populate_summary_text()
 
         # Pareto Chart Tab
         pareto_tab = QtWidgets.QWidget();
         pareto_layout = QtWidgets.QVBoxLayout(pareto_tab)
         self.pareto_canvas = FigureCanvas(Figure(figsize=(7, 5)));
         pareto_layout.addWidget(self.pareto_canvas)
-        tab_widget.addTab(pareto_tab, "Message Type Pareto");
-        self.plot_pareto_chart()
+        pareto_index = tab_widget.addTab(pareto_tab, "Message Type Pareto");
 
         # Distribution Chart Tab (replaces Level Distribution)
         dist_chart_tab = QtWidgets.QWidget();
@@ -55,12 +79,36 @@ class StatsDialog(QtWidgets.QDialog):
         self.dist_canvas = FigureCanvas(Figure(figsize=(5, 4)))
         # Add stretch factor to the canvas to make it take available space
         dist_chart_layout.addWidget(self.dist_canvas, 1)
-        tab_widget.addTab(dist_chart_tab, "Distribution Chart"); # Renamed tab
+        dist_index = tab_widget.addTab(dist_chart_tab, "Distribution Chart"); # Renamed tab
 
         self.radio_level.toggled.connect(self._update_distribution_chart_type)
         # No need to connect radio_message_type explicitly if radio_level's toggle handles both states
 
-        self._plot_distribution_chart() # Initial plot
+        # Charts are drawn when their tab is first shown, not at construction
+        self._chart_renderers = {pareto_index: self.plot_pareto_chart, dist_index: self._plot_distribution_chart}
+        self._rendered_tabs = set()
+        tab_widget.currentChanged.connect(self._render_tab_if_needed)
+        self.populate_summary_text()
+
+    @property
+    def scope(self):
+        """'view' (filtered rows) or 'dataset'."""
+        return self.scope_combo.currentData()
+
+    def set_stats(self, stats):
+        """Shows new stats (filters or scope changed, or computation finished); only the visible chart is redrawn."""
+        if stats is self.stats and stats is not None:
+            return
+        self.stats = stats
+        self.populate_summary_text()
+        self._rendered_tabs.clear()
+        self._render_tab_if_needed(self.tab_widget.currentIndex())
+
+    def _render_tab_if_needed(self, index):
+        if self.stats is None or index in self._rendered_tabs or index not in self._chart_renderers:
+            return
+        self._rendered_tabs.add(index)
+        self._chart_renderers[index]()
 
     def populate_summary_text(self):
         layout = self.summary_tab.layout()
@@ -73,13 +121,16 @@ class StatsDialog(QtWidgets.QDialog):
         if self.all_log_entries.empty:
             layout.addWidget(QtWidgets.QLabel("No log entries loaded."))
             return
+        if self.stats is None:
+            layout.addWidget(QtWidgets.QLabel("Computing statistics..."))
+            return
 
-        # --- Data Calculation ---
-        total_entries = len(self.all_log_entries)
-        first_dt_obj = self.all_log_entries['datetime_obj'].min()
-        last_dt_obj = self.all_log_entries['datetime_obj'].max()
-        level_counts = self.all_log_entries['log_level'].value_counts()
-        logger_counts = self.all_log_entries['logger_name'].value_counts()
+        # --- Precomputed aggregates (DatasetStats) ---
+        total_entries = self.stats.row_count
+        first_dt_obj = self.stats.first_time
+        last_dt_obj = self.stats.last_time
+        level_counts = self.stats.level_counts
+        logger_counts = self.stats.logger_counts  # Busiest first
 
         # --- General Stats GroupBox ---
         general_group = QtWidgets.QGroupBox("General Statistics")
@@ -93,6 +144,7 @@ class StatsDialog(QtWidgets.QDialog):
                           f"{last_dt_obj.strftime('%Y-%m-%d %H:%M:%S')} "
                           f"(Duration: {str(duration).split('.')[0]})")
         
+        form_layout.addRow(QtWidgets.QLabel("<b>Scope:</b>"), QtWidgets.QLabel(self.stats.description))
         form_layout.addRow(QtWidgets.QLabel("<b>Time Period:</b>"), QtWidgets.QLabel(period_str))
         form_layout.addRow(QtWidgets.QLabel("<b>Total Entries:</b>"), QtWidgets.QLabel(f"<b>{total_entries:,}</b>"))
         form_layout.addRow(QtWidgets.QLabel("<b>Unique Message Types:</b>"), QtWidgets.QLabel(f"<b>{len(logger_counts):,}</b>"))
@@ -130,24 +182,26 @@ class StatsDialog(QtWidgets.QDialog):
         layout.addStretch()
 
     def plot_pareto_chart(self):
-        if self.all_log_entries.empty: return
+        if self.all_log_entries.empty or self.stats is None: return
         
-        logger_counts = self.all_log_entries['logger_name'].value_counts()
-        if logger_counts.empty: return
+        logger_counts = self.stats.logger_counts  # Busiest first
+        if logger_counts.empty:  # E.g. a filtered view without any row
+            fig = self.pareto_canvas.figure
+            fig.clear()
+            fig.add_subplot(111).text(0.5, 0.5, "No data to display for this selection.", ha='center', va='center')
+            self.pareto_canvas.draw()
+            return
 
-        top_20_counts = logger_counts.nlargest(20)
+        top_20_counts = logger_counts.head(20)
         loggers = top_20_counts.index.tolist()
         counts = top_20_counts.values
-        
-        cumulative_sum = np.cumsum(counts)
-        overall_total_sum = len(self.all_log_entries)
-        percentages = cumulative_sum / overall_total_sum * 100
+        percentages = self.stats.logger_cumulative_pct[:len(top_20_counts)]
 
         fig = self.pareto_canvas.figure;
         fig.clear();
         ax1 = fig.add_subplot(111)
         x_indices = np.arange(len(loggers));
-        ax1.bar(x_indices, counts, color='C0', alpha=0.7)
+        ax1.bar(x_indices, counts, color=self.logger_colors.rgba_list(loggers), alpha=0.7)
         ax1.set_xticks(x_indices);
         ax1.set_xticklabels(loggers, rotation=45, ha="right", fontsize=8)
         ax1.set_xlabel("Message Type (Logger)");
@@ -173,6 +227,7 @@ class StatsDialog(QtWidgets.QDialog):
         self._plot_distribution_chart()
 
     def _plot_distribution_chart(self): # Renamed from plot_level_distribution
+        if self.stats is None: return
         if self.all_log_entries.empty: 
             fig = self.dist_canvas.figure
             fig.clear()
@@ -193,7 +248,7 @@ class StatsDialog(QtWidgets.QDialog):
 
         if self.radio_level.isChecked():
             chart_title = "Log Level Distribution"
-            level_counts = self.all_log_entries['log_level'].value_counts()
+            level_counts = self.stats.level_counts
             if not level_counts.empty:
                 ordered_labels = ['ERROR', 'WARN', 'INFO', 'DEBUG']
                 # Filter and order the counts based on ordered_labels, include 0 for levels not present
@@ -209,9 +264,9 @@ class StatsDialog(QtWidgets.QDialog):
 
         elif self.radio_message_type.isChecked():
             chart_title = "Message Type Distribution"
-            logger_counts = self.all_log_entries['logger_name'].value_counts()
+            logger_counts = self.stats.logger_counts
             if not logger_counts.empty:
-                total_logs = len(self.all_log_entries) # Use total from all_log_entries for percentage calculation
+                total_logs = self.stats.row_count # Use total from all_log_entries for percentage calculation
                 threshold_percentage = 2.0  # Group types constituting less than this percentage
 
                 df_counts = logger_counts.reset_index()
@@ -232,7 +287,9 @@ class StatsDialog(QtWidgets.QDialog):
                 
                 labels = current_labels
                 sizes = current_sizes
-                # pie_colors will be None, Matplotlib will use default color cycle
+                pie_colors = self.logger_colors.rgba_list(main_types['logger'])
+                if len(labels) > len(pie_colors):
+                    pie_colors.append('#AAAAAA')  # Others
 
         if not labels or not sizes:
             ax.text(0.5, 0.5, "No data to display for this selection.", ha='center', va='center', fontsize=10)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Burst detection over a TimeBucketCube (anomaly_detection.detect_anomalies)."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from anomaly_detection import anomaly_at, detect_anomalies  # noqa: E402
+from time_buckets import TimeBucketCube  # noqa: E402
+
+MINUTE_NS = 60 * 10**9
+
+
+def poisson_cube(n_buckets, rates, seed=0):
+    counts = np.random.default_rng(seed).poisson(rates, (n_buckets, len(rates))).astype(np.int32)
+    return counts
+
+
+def test_burst_is_reported_with_all_its_buckets():
+    counts = poisson_cube(3000, [5.0, 20.0, 1.0])
+    counts[1000:1005, 1] += 200  # A 5-bucket plateau
+    counts[2000:2040, 2] += 60  # A long one
+    names = np.array(['a', 'b', 'c'], dtype=object)
+    anomalies = detect_anomalies(TimeBucketCube(0, MINUTE_NS, counts[:, :, None]), names)
+
+    burst = anomaly_at(anomalies, 1002 * MINUTE_NS)
+    assert (burst.start_ns, burst.end_ns) == (1000 * MINUTE_NS, 1005 * MINUTE_NS)
+    assert burst.count == counts[1000:1005, 1].sum()
+    plateau = anomaly_at(anomalies, 2020 * MINUTE_NS)
+    assert plateau.logger_name == 'c'
+    assert (plateau.start_ns, plateau.end_ns) == (2000 * MINUTE_NS, 2040 * MINUTE_NS)
+    assert burst.logger_name == 'b'
+    scores = [anomaly.score for anomaly in anomalies]
+    assert scores == sorted(scores, reverse=True)
+
+
+def detect(counts):
+    names = np.array([f'logger{i}' for i in range(counts.shape[1])], dtype=object)
+    return detect_anomalies(TimeBucketCube(0, MINUTE_NS, counts[:, :, None].astype(np.int32)), names)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_steady_rates_have_no_burst(seed):
+    assert detect(poisson_cube(2000, [0.2, 3.0, 50.0], seed)) == []
+
+
+@pytest.mark.parametrize('base_rate', [20.0, 300.0])
+@pytest.mark.parametrize('seed', range(5))
+def test_step_change_is_one_burst_then_the_new_baseline(base_rate, seed):
+    rates = np.full(3000, base_rate)
+    rates[1000:] *= 4
+    anomalies = detect(np.random.default_rng(seed).poisson(rates)[:, None])
+    assert len(anomalies) == 1
+    assert anomalies[0].start_ns == 1000 * MINUTE_NS
+    assert anomalies[0].end_ns < 2000 * MINUTE_NS
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_daily_activity_is_not_a_daily_burst(seed):
+    minute_of_day = np.arange(7 * 1440) % 1440
+    rates = np.where((minute_of_day >= 8 * 60) & (minute_of_day < 16 * 60), 300.0, 0.0)  # 8 h a day
+    assert detect(np.random.default_rng(seed).poisson(rates)[:, None]) == []
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""LogIndex on rows with missing values (pandas factorize code -1)."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset_stats import DatasetStats  # noqa: E402
+from log_index import LogIndex  # noqa: E402
+from row_bitmap import RowBitmap  # noqa: E402
+
+
+def make_entries():
+    return pd.DataFrame({
+        'datetime_obj': pd.to_datetime(['2024-05-01 10:00:00', '2024-05-01 10:00:01', '2024-05-01 10:00:02',
+                                        '2024-05-01 10:00:03']),
+        'log_level': ['INFO', 'WARN', None, 'INFO'],
+        'logger_name': ['a', None, 'b', 'b'],
+    })
+
+
+def test_counts_skip_missing_logger_and_level():
+    log_index = LogIndex(make_entries())
+    assert list(log_index.logger_names) == ['a', 'b']
+    assert list(log_index.logger_counts()) == [1, 2]
+    assert list(log_index.level_counts()) == [2, 1]
+    assert list(log_index.logger_counts(RowBitmap.from_mask(np.array([True, True, False, False])))) == [1, 0]
+
+
+def test_rows_without_logger_never_match_a_logger():
+    log_index = LogIndex(make_entries())
+    assert list(log_index.logger_rows(['b']).to_indices()) == [2, 3]
+    assert list(log_index.logger_rows(['a']).to_indices()) == [0]
+
+
+def test_dataset_stats_with_missing_logger():
+    stats = DatasetStats(LogIndex(make_entries()))
+    assert stats.row_count == 4
+    assert dict(stats.logger_counts) == {'b': 2, 'a': 1}
+
+
+def test_missing_column_gives_missing_codes():
+    log_index = LogIndex(make_entries().drop(columns=['logger_name']))
+    assert (log_index.logger_codes == -1).all()
+    assert len(log_index.logger_counts()) == 0
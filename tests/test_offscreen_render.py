@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""The offscreen timeline render: same pixels as an inline draw, and a worker thread that stops."""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtCore, QtWidgets  # noqa: E402
+
+LOGGERS = [f'com.iobeya.mod{i}' for i in range(6)]
+
+
+@pytest.fixture(scope='module')
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+@pytest.fixture
+def canvas(qapp):
+    from log_index import LogIndex
+    from timeline_canvas import TimelineCanvas
+
+    rows = 5000
+    rng = np.random.default_rng(0)
+    timestamps = pd.Timestamp('2024-05-01') + pd.to_timedelta(np.sort(rng.integers(0, 86400, rows)), unit='s')
+    log_entries = pd.DataFrame({'datetime_obj': timestamps, 'log_level': 'INFO',
+                                'logger_name': np.array(LOGGERS)[rng.integers(0, len(LOGGERS), rows)]})
+    timeline = TimelineCanvas()
+    timeline.resize(800, 300)
+    timeline.show()
+    timeline.set_full_log_data(log_entries, LogIndex(log_entries))
+    yield timeline
+    timeline.set_background_rendering(False)
+    # Deleted now: left to the garbage collector, its pending timers could fire in a later test
+    timeline.close()
+    timeline.deleteLater()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+
+
+def settle(timeline):
+    """Lets the debounced plot update run."""
+    deadline = time.monotonic() + 2
+    while timeline.update_timer.isActive() and time.monotonic() < deadline:
+        QtWidgets.QApplication.processEvents()
+        time.sleep(0.01)
+    QtWidgets.QApplication.processEvents()
+
+
+@pytest.mark.parametrize('display_mode', ['bars', 'topk', 'heatmap'])
+def test_scene_render_matches_inline_draw(canvas, display_mode):
+    from anomaly_detection import Anomaly
+    from timeline_canvas import render_timeline_scene
+
+    canvas.set_display_mode(display_mode)
+    canvas.update_display_config(set(LOGGERS), 'minute')
+    settle(canvas)
+    start_ns = pd.Timestamp('2024-05-01 06:00').value
+    canvas.set_anomalies([Anomaly(LOGGERS[1], start_ns, start_ns + 3600 * 10**9, 5.0, 10, 1.0)])
+    view_min, view_max = canvas.get_view_xlim()
+    canvas.set_view_xlim(view_min + (view_max - view_min) * 0.2, view_min + (view_max - view_min) * 0.6)
+    settle(canvas)
+    canvas.draw()
+    inline = np.asarray(canvas.buffer_rgba()).copy()
+    canvas.restore_region(render_timeline_scene(canvas._render_scene()))
+    assert np.array_equal(np.asarray(canvas.buffer_rgba()), inline)
+
+
+def test_worker_thread_stops_when_turned_off(canvas):
+    canvas.update_display_config(set(LOGGERS), 'minute')
+    settle(canvas)
+    rendered = []
+    canvas._background_rendered.connect(lambda generation, region: rendered.append(region))
+    canvas.set_background_rendering(True)
+    renderer = canvas._offscreen_renderer
+    deadline = time.monotonic() + 5
+    while not rendered and time.monotonic() < deadline:
+        QtWidgets.QApplication.processEvents()
+        time.sleep(0.01)
+    assert rendered and rendered[0] is not None
+    canvas.set_background_rendering(False)
+    renderer._thread.join(5)
+    assert not renderer._thread.is_alive()
+    assert canvas._offscreen_renderer is None
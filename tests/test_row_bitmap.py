@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""RowBitmap against NumPy boolean masks: sparse (array) and dense (bitmap) chunks, the threshold between
+them, the last partial chunk and empty sets."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from row_bitmap import RowBitmap  # noqa: E402
+
+CHUNK = RowBitmap.CHUNK_SIZE
+ARRAY_MAX = RowBitmap.ARRAY_MAX
+SIZES = [0, 1, CHUNK - 1, CHUNK, 3 * CHUNK + 123]  # The last one ends with a partial chunk
+PER_CHUNK = [0, 1, ARRAY_MAX - 1, ARRAY_MAX, ARRAY_MAX + 1, CHUNK // 2, CHUNK]  # Set rows per chunk
+
+
+def random_mask(size, per_chunk, seed):
+    """A mask with `per_chunk` set rows in every chunk (fewer in a short last chunk)."""
+    rng = np.random.default_rng(seed)
+    mask = np.zeros(size, dtype=bool)
+    for chunk_start in range(0, size, CHUNK):
+        chunk_len = min(CHUNK, size - chunk_start)
+        mask[chunk_start + rng.choice(chunk_len, min(per_chunk, chunk_len), replace=False)] = True
+    return mask
+
+
+def assert_matches(bitmap, mask):
+    assert bitmap.size == len(mask)
+    assert len(bitmap) == int(mask.sum())
+    assert np.array_equal(bitmap.to_indices(), np.flatnonzero(mask))
+    assert np.array_equal(bitmap.to_mask(), mask)
+    assert bitmap.is_full() == bool(mask.all())
+    for key, container in bitmap._containers.items():  # The smaller representation of each chunk
+        count = int(mask[key * CHUNK:(key + 1) * CHUNK].sum())
+        assert count > 0
+        assert (container.dtype == np.uint16) == (count <= ARRAY_MAX)
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('per_chunk', PER_CHUNK)
+def test_construction(size, per_chunk):
+    mask = random_mask(size, per_chunk, seed=per_chunk)
+    assert_matches(RowBitmap.from_mask(mask), mask)
+    indices = np.flatnonzero(mask)
+    noisy = np.random.default_rng(0).permutation(np.r_[indices, indices[:10], -1, size, size + 5])
+    assert_matches(RowBitmap.from_indices(size, noisy), mask)  # Any order, duplicates and out of range
+    assert RowBitmap.from_indices(size, noisy) == RowBitmap.from_mask(mask)
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('start, stop', [(0, 0), (5, 5), (0, ARRAY_MAX), (0, ARRAY_MAX + 1), (10, 10 + ARRAY_MAX),
+                                         (CHUNK - 3, CHUNK + 3), (CHUNK - ARRAY_MAX - 1, 2 * CHUNK + 7),
+                                         (100, 10**9), (-5, 50)])
+def test_from_range(size, start, stop):
+    mask = np.zeros(size, dtype=bool)
+    mask[max(start, 0):stop] = True
+    assert_matches(RowBitmap.from_range(size, start, stop), mask)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_empty_and_full(size):
+    assert_matches(RowBitmap.empty(size), np.zeros(size, dtype=bool))
+    assert_matches(RowBitmap.full(size), np.ones(size, dtype=bool))
+    assert RowBitmap.empty(size).is_full() == (size == 0)
+
+
+@pytest.mark.parametrize('size', [CHUNK, 3 * CHUNK + 123])
+@pytest.mark.parametrize('per_chunk_a, per_chunk_b', [(0, CHUNK // 2), (ARRAY_MAX, ARRAY_MAX), (ARRAY_MAX + 1, 50),
+                                                      (2 * ARRAY_MAX, 2 * ARRAY_MAX), (CHUNK // 2, CHUNK // 2),
+                                                      (CHUNK, ARRAY_MAX - 1), (CHUNK, CHUNK)])
+def test_and_or(size, per_chunk_a, per_chunk_b):
+    # Two dense chunks can AND to a sparse one, two sparse chunks can OR to a dense one
+    mask_a = random_mask(size, per_chunk_a, seed=1)
+    mask_b = random_mask(size, per_chunk_b, seed=2)
+    a, b = RowBitmap.from_mask(mask_a), RowBitmap.from_mask(mask_b)
+    assert_matches(a & b, mask_a & mask_b)
+    assert_matches(b & a, mask_a & mask_b)
+    assert_matches(a | b, mask_a | mask_b)
+    assert_matches(b | a, mask_a | mask_b)
+    assert_matches(a & RowBitmap.empty(size), np.zeros(size, dtype=bool))
+    assert_matches(a | RowBitmap.empty(size), mask_a)
+    assert_matches(a & RowBitmap.full(size), mask_a)
+
+
+def test_disjoint_and_is_empty():
+    size = 3 * CHUNK + 123
+    evens = RowBitmap.from_indices(size, np.arange(0, size, 2))
+    odds = RowBitmap.from_indices(size, np.arange(1, size, 2))
+    assert len(evens & odds) == 0 and not (evens & odds)._containers
+    assert (evens | odds).is_full()
+
+
+@pytest.mark.parametrize('per_chunk', [1, ARRAY_MAX, ARRAY_MAX + 1, CHUNK])
+def test_select_pages_like_the_indices(per_chunk):
+    mask = random_mask(3 * CHUNK + 123, per_chunk, seed=3)
+    bitmap, indices = RowBitmap.from_mask(mask), np.flatnonzero(mask)
+    total = len(indices)
+    for start, stop in [(0, 0), (0, 1), (0, 100), (total - 1, total), (total - 5, total + 50), (total, total + 1),
+                        (-3, 4), (ARRAY_MAX - 2, ARRAY_MAX + 2), (total // 3, 2 * total // 3), (0, total)]:
+        assert np.array_equal(bitmap.select(start, stop), indices[max(start, 0):stop])
+
+
+def test_equality_ignores_the_representation():
+    mask = random_mask(CHUNK, ARRAY_MAX, seed=4)
+    as_array = RowBitmap.from_mask(mask)
+    as_bitmap = RowBitmap(CHUNK, {0: RowBitmap._pack(mask)})
+    assert as_array._containers[0].dtype == np.uint16 and as_bitmap._containers[0].dtype != np.uint16
+    assert as_array == as_bitmap
+    assert as_array != RowBitmap.empty(CHUNK)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Live preview counts streamed by LogLoaderThread (counts_streamed)."""
+import gzip
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_processing import LogLoaderThread  # noqa: E402
+
+
+def test_gz_encoding_retry_streams_each_row_once(tmp_path):
+    lines = [f"2024-05-01 10:{i // 1000 % 60:02d}:{i % 60:02d} INFO [com.iobeya.mod{i % 3}] message {i}\n"
+             for i in range(45000)]
+    lines[-1] = lines[-1].rstrip('\n') + " caf\xe9\n"  # Not UTF-8 once encoded as latin1: decoding fails near the end
+    path = tmp_path / 'app.log.gz'
+    with gzip.open(path, 'wb') as gz_file:
+        gz_file.write(''.join(lines).encode('latin1'))
+
+    loader = LogLoaderThread(file_path=str(path))
+    streamed = []
+    loader.counts_streamed.connect(lambda names, buckets, codes, counts: streamed.append(int(np.sum(counts))))
+    entries = loader._process_single_file(str(path))
+
+    assert len(entries) == len(lines)
+    assert entries[-1]['message'].endswith("caf\xe9")
+    assert sum(streamed) == len(lines)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""One pipeline recompute per message type check-state batch (MessageTypesModel begin/end_check_state_batch)."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5 import QtCore, QtGui, QtWidgets  # noqa: E402
+
+LOGGERS = [f'com.iobeya.mod{i}' for i in range(8)]
+
+
+@pytest.fixture(scope='module')
+def qapp():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+@pytest.fixture
+def window(qapp):
+    import iobeya_log_analyzer
+
+    rows = 400
+    timestamps = pd.Timestamp('2024-05-01 10:00:00') + pd.to_timedelta(np.arange(rows) * 7, unit='s')
+    log_entries = pd.DataFrame({
+        'datetime': timestamps.strftime('%Y-%m-%d %H:%M:%S'),
+        'datetime_obj': timestamps,
+        'log_level': np.array(['INFO', 'WARN', 'ERROR', 'DEBUG'])[np.arange(rows) % 4],
+        'logger_name': np.array(LOGGERS)[np.arange(rows) % len(LOGGERS)],
+        'message': [f'message {i}' for i in range(rows)],
+    })
+    mw = iobeya_log_analyzer.LogAnalyzerApp()
+    mw.show()
+    mw.on_log_data_loaded(log_entries, [])
+    settle(mw)
+    yield mw
+    close_and_delete(mw)
+
+
+def close_and_delete(widget):
+    """Deletes the widget now: left to the garbage collector, its pending timers could fire in a later test."""
+    widget.close()
+    widget.deleteLater()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+
+
+def settle(mw):
+    """Runs the scheduled pipeline pass, like the event loop would."""
+    QtWidgets.QApplication.processEvents()
+    mw.app_logic.flush_pending_recompute()
+
+
+def run_and_count(mw, action):
+    app_logic = mw.app_logic
+    recomputes, stages = app_logic.recompute_count, app_logic.stage_run_counts.copy()
+    action()
+    settle(mw)
+    return app_logic.recompute_count - recomputes, app_logic.stage_run_counts - stages
+
+
+def assert_one_pass(mw, action):
+    recomputes, stages = run_and_count(mw, action)
+    assert recomputes == 1
+    assert stages['list'] == 1
+    assert stages['filter'] == 0  # The type selection narrows the list, the level/search base mask is kept
+
+
+def test_space_on_multi_row_selection_is_one_recompute(window):
+    view, model = window.message_types_tree, window.message_types_model
+    assert model.rowCount() == len(LOGGERS) and len(model.selected_codes()) == len(LOGGERS)
+    selection = view.selectionModel()
+    for row in (1, 2, 3, 4):
+        selection.select(model.index(row, 0), QtCore.QItemSelectionModel.Select | QtCore.QItemSelectionModel.Rows)
+    selection.setCurrentIndex(model.index(2, 0), QtCore.QItemSelectionModel.NoUpdate)
+    view.setFocus()
+
+    def press_space():
+        QtWidgets.QApplication.sendEvent(view, QtGui.QKeyEvent(QtCore.QEvent.KeyPress, QtCore.Qt.Key_Space,
+                                                               QtCore.Qt.NoModifier, ' '))
+        QtWidgets.QApplication.sendEvent(view, QtGui.QKeyEvent(QtCore.QEvent.KeyRelease, QtCore.Qt.Key_Space,
+                                                               QtCore.Qt.NoModifier, ' '))
+
+    assert_one_pass(window, press_space)
+    unchecked = {model.code_for_row(row) for row in (1, 2, 3, 4)}
+    assert set(model.selected_codes()) == set(range(len(LOGGERS))) - unchecked
+
+
+def test_set_checked_mask_is_one_recompute(window):
+    model = window.message_types_model
+    mask = np.zeros(len(LOGGERS), dtype=bool)
+    mask[:3] = True
+    assert_one_pass(window, lambda: model.set_checked_mask(mask, notify=True))
+    assert list(model.selected_codes()) == [0, 1, 2]
+    assert len(window.app_logic.filtered_rows) == 3 * 400 // len(LOGGERS)
+
+
+def test_select_and_deselect_all_are_one_recompute_each(window):
+    app_logic = window.app_logic
+    assert_one_pass(window, lambda: app_logic.set_check_state_for_all_types(QtCore.Qt.Unchecked))
+    assert not len(window.message_types_model.selected_codes())
+    assert_one_pass(window, lambda: app_logic.set_check_state_for_all_types(QtCore.Qt.Checked))
+    assert len(window.message_types_model.selected_codes()) == len(LOGGERS)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""The message type name filter: only the checked types it shows drive the list and the timeline."""
+from test_type_batch import LOGGERS, qapp, settle, window  # noqa: F401 (fixtures)
+
+
+def search_types(mw, text):
+    mw.message_type_search_input.setText(text)
+    mw.message_type_search_timer.stop()
+    mw.app_logic.apply_message_type_filter()
+    settle(mw)
+
+
+def test_name_filter_narrows_list_and_timeline(window):
+    app_logic, timeline = window.app_logic, window.matplotlib_timeline
+    assert len(app_logic.filtered_rows) == 400
+
+    search_types(window, 'mod1')
+    assert len(app_logic.filtered_rows) == 400 // len(LOGGERS)
+    assert timeline.current_selected_message_types == {'com.iobeya.mod1'}
+
+    search_types(window, 'no such type')
+    assert len(app_logic.filtered_rows) == 0
+    assert timeline.current_selected_message_types == set()
+
+    search_types(window, '')
+    assert len(app_logic.filtered_rows) == 400
+    assert timeline.current_selected_message_types == set(LOGGERS)
+
+
+def test_top_n_ranks_only_the_shown_types(window):
+    model = window.message_types_model
+    search_types(window, 'mod1')
+    window.app_logic.select_top5_message_types()
+    settle(window)
+    assert list(model.logger_names[model.checked]) == ['com.iobeya.mod1']
+
+    search_types(window, '')
+    window.app_logic.select_top5_message_types()
+    settle(window)
+    assert int(model.checked.sum()) == 5
+    assert len(window.app_logic.filtered_rows) == 5 * 400 // len(LOGGERS)
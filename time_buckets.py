@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+# Bucket width of each timeline granularity, in nanoseconds
+GRANULARITY_NS = {
+    '1s': 10**9,
+    '5s': 5 * 10**9,
+    '10s': 10 * 10**9,
+    '30s': 30 * 10**9,
+    'minute': 60 * 10**9,
+    'hour': 3600 * 10**9,
+    'day': 86400 * 10**9,
+}
+# Narrower buckets are not kept as dense cubes (a week at 1s is 600k buckets): they are counted from
+# the rows of the visible window only, see TimelineSeries.from_rows()
+CUBE_MIN_BUCKET_NS = GRANULARITY_NS['minute']
+CUBE_GRANULARITY_NS = [ns for ns in GRANULARITY_NS.values() if ns >= CUBE_MIN_BUCKET_NS]
+AUTO_GRANULARITY = 'auto'  # Bucket width follows the zoom level, see pick_lod_bucket_ns()
+# Bucket widths the automatic level of detail picks from. Widths of a minute or more that are not a
+# cube granularity are summed from the coarsest cube that divides them (TimeBucketCube.rebucket).
+LOD_BUCKET_NS = ([s * 10**9 for s in (1, 5, 10, 30)] +
+                 [m * 60 * 10**9 for m in (1, 5, 15, 30, 60, 3 * 60, 6 * 60, 12 * 60, 24 * 60)])
+LOD_PIXELS_PER_BUCKET = 4
+_NAT_NS = np.iinfo(np.int64).min  # datetime64 NaT viewed as int64
+
+
+def pick_lod_bucket_ns(span_ns, pixel_width, pixels_per_bucket=LOD_PIXELS_PER_BUCKET):
+    """Smallest LOD bucket width giving at least `pixels_per_bucket` pixels per bucket over `span_ns`."""
+    ideal_ns = span_ns * pixels_per_bucket / max(pixel_width, 1)
+    for bucket_ns in LOD_BUCKET_NS:
+        if bucket_ns >= ideal_ns:
+            return bucket_ns
+    return LOD_BUCKET_NS[-1]
+
+
+class TimeBucketCube:
+    """Message counts per [time bucket × logger code × level code] at one granularity.
+
+    Built once per dataset and granularity with a single bincount over combined keys; the timeline
+    then only slices and sums the cube when the type selection or the visible window change.
+    Bucket i covers [origin_ns + i * bucket_ns, origin_ns + (i + 1) * bucket_ns).
+    """
+
+    def __init__(self, origin_ns, bucket_ns, counts):
+        self.origin_ns = int(origin_ns)  # Start of the first bucket, floored to the bucket width
+        self.bucket_ns = int(bucket_ns)
+        self.counts = counts  # int32 array of shape (buckets, loggers, levels)
+        # Cubes filled by add_counts(): counts is a view into a larger array with spare buckets/loggers
+        self._storage = None
+        self._storage_first = 0  # Absolute bucket index of the first row of _storage
+
+    @classmethod
+    def build(cls, timestamps_ns, logger_codes, level_codes, n_loggers, n_levels, bucket_ns):
+        """Counts the rows of a dataset; rows without a timestamp, logger or level are left out."""
+        valid = (timestamps_ns != _NAT_NS) & (logger_codes >= 0) & (level_codes >= 0)
+        if not valid.all():
+            timestamps_ns, logger_codes, level_codes = timestamps_ns[valid], logger_codes[valid], level_codes[valid]
+        if not len(timestamps_ns) or not n_loggers or not n_levels:
+            return cls(0, bucket_ns, np.zeros((0, max(n_loggers, 0), max(n_levels, 0)), dtype=np.int32))
+
+        origin_ns = (int(timestamps_ns.min()) // bucket_ns) * bucket_ns
+        buckets = (timestamps_ns - origin_ns) // bucket_ns
+        n_buckets = int(buckets.max()) + 1
+        keys = (buckets * n_loggers + logger_codes) * n_levels + level_codes
+        counts = np.bincount(keys, minlength=n_buckets * n_loggers * n_levels).astype(np.int32)
+        return cls(origin_ns, bucket_ns, counts.reshape(n_buckets, n_loggers, n_levels))
+
+    def add_counts(self, buckets, logger_codes, counts, level_code=0, n_loggers=0):
+        """Adds count deltas in place. `buckets` are absolute bucket indices (timestamp_ns // bucket_ns).
+
+        The time axis grows on either side and the logger axis to the highest code (or `n_loggers`),
+        doubling the backing storage so a stream of small deltas stays cheap.
+        """
+        buckets = np.asarray(buckets, dtype=np.int64)
+        logger_codes = np.asarray(logger_codes, dtype=np.int64)
+        n_loggers = max(n_loggers, self.counts.shape[1], int(logger_codes.max()) + 1 if len(logger_codes) else 0)
+        first, stop = self._bucket_span()
+        if len(buckets):
+            if not self.n_buckets:
+                first, stop = int(buckets.min()), int(buckets.max()) + 1
+            first, stop = min(first, int(buckets.min())), max(stop, int(buckets.max()) + 1)
+        self._reserve(first, stop, n_loggers)
+        np.add.at(self.counts, (buckets - self.origin_ns // self.bucket_ns, logger_codes, level_code), counts)
+
+    def _bucket_span(self):
+        first = self.origin_ns // self.bucket_ns
+        return first, first + self.n_buckets
+
+    def _reserve(self, first, stop, n_loggers):
+        """Makes `counts` a view covering absolute buckets [first, stop) and `n_loggers` loggers."""
+        storage, storage_first = self._storage, self._storage_first
+        if storage is None:
+            storage, storage_first = self.counts, self.origin_ns // self.bucket_ns
+        if first < storage_first or stop > storage_first + len(storage) or n_loggers > storage.shape[1]:
+            size = max(stop - first, 2 * len(storage))
+            # Leave the spare buckets on the side the cube grows towards
+            new_first = stop - size if first < storage_first else first
+            grown = np.zeros((size, max(n_loggers, 2 * storage.shape[1]), storage.shape[2]), dtype=np.int32)
+            if self.n_buckets:
+                offset = self.origin_ns // self.bucket_ns - new_first
+                grown[offset:offset + self.n_buckets, :self.counts.shape[1]] = self.counts
+            storage, storage_first = grown, new_first
+        self._storage, self._storage_first = storage, storage_first
+        self.origin_ns = first * self.bucket_ns
+        self.counts = storage[first - storage_first:stop - storage_first, :n_loggers]
+
+    def rebucket(self, bucket_ns):
+        """Coarser cube made by summing whole groups of buckets; `bucket_ns` must be a multiple of bucket_ns."""
+        factor = bucket_ns // self.bucket_ns
+        origin_ns = (self.origin_ns // bucket_ns) * bucket_ns
+        lead = (self.origin_ns - origin_ns) // self.bucket_ns  # Buckets between the new and the old origin
+        n_buckets = -(-(lead + self.n_buckets) // factor)
+        padded = np.zeros((n_buckets * factor,) + self.counts.shape[1:], dtype=np.int32)
+        padded[lead:lead + self.n_buckets] = self.counts
+        counts = padded.reshape((n_buckets, factor) + self.counts.shape[1:]).sum(axis=1, dtype=np.int32)
+        return TimeBucketCube(origin_ns, bucket_ns, counts)
+
+    @property
+    def n_buckets(self):
+        return self.counts.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes
+
+    def bucket_starts_ns(self, start=0, stop=None):
+        stop = self.n_buckets if stop is None else stop
+        return self.origin_ns + np.arange(start, stop, dtype=np.int64) * self.bucket_ns
+
+    def bucket_range(self, start_ns, end_ns):
+        """Indices [start, stop) of the buckets overlapping [start_ns, end_ns)."""
+        start = max((int(start_ns) - self.origin_ns) // self.bucket_ns, 0)
+        stop = min(-(-(int(end_ns) - self.origin_ns) // self.bucket_ns), self.n_buckets)
+        return int(start), int(max(stop, start))
+
+    def counts_by_logger(self, logger_codes=None, level_codes=None, start=0, stop=None):
+        """[bucket × logger] counts for the given loggers (columns in that order), summed over levels."""
+        cube = self.counts[start:stop]
+        if logger_codes is not None:
+            cube = cube[:, np.asarray(logger_codes, dtype=np.int64), :]
+        if level_codes is not None:
+            cube = cube[:, :, np.asarray(level_codes, dtype=np.int64)]
+        return cube.sum(axis=2, dtype=np.int64)
+
+
+class StreamingCounts:
+    """Per-minute message counts of a dataset that is still loading, fed by the loader in deltas.
+
+    Logger codes are the loader's order of first appearance, not the sorted codes of the final
+    LogIndex, which replaces these counts when loading completes.
+    """
+
+    def __init__(self):
+        self.cube = TimeBucketCube(0, CUBE_MIN_BUCKET_NS, np.zeros((0, 0, 1), dtype=np.int32))
+        self.logger_names = []
+        self.row_count = 0
+
+    def append(self, new_logger_names, buckets, logger_codes, counts):
+        self.logger_names.extend(new_logger_names)
+        self.cube.add_counts(buckets, logger_codes, counts, n_loggers=len(self.logger_names))
+        self.row_count += int(np.sum(counts))
+
+    def series(self, bucket_ns):
+        """All loggers at `bucket_ns` (a multiple of a minute; narrower widths fall back to the minute)."""
+        cube = self.cube if bucket_ns <= self.cube.bucket_ns else self.cube.rebucket(bucket_ns)
+        return TimelineSeries.from_cube(cube, np.arange(len(self.logger_names)), self.logger_names)
+
+
+class TimelineSeries:
+    """What the timeline draws: the occupied buckets of a cube and one count column per plotted series.
+
+    Stays in arrays from the cube slice to the renderer; datetimes are only created for the bucket
+    under the mouse (tooltip, click).
+    """
+
+    def __init__(self, starts_ns, bucket_ns, counts, labels):
+        self.starts_ns = starts_ns  # int64 start of each occupied bucket, ascending
+        self.bucket_ns = int(bucket_ns)
+        self.counts = counts  # int64 array of shape (buckets, series)
+        self.labels = list(labels)  # Series names, aligned with the count columns
+
+    @classmethod
+    def empty(cls, bucket_ns):
+        return cls(np.empty(0, dtype=np.int64), bucket_ns, np.zeros((0, 0), dtype=np.int64), [])
+
+    @classmethod
+    def from_rows(cls, timestamps_ns, row_logger_codes, n_loggers, logger_codes, labels, bucket_ns):
+        """Counts rows straight into buckets by integer division of their int64 timestamps.
+
+        Only occupied buckets are materialized, which keeps sub-minute buckets cheap on long captures.
+        Buckets are aligned on multiples of bucket_ns since the epoch, like the cubes.
+        """
+        n_columns = len(logger_codes)
+        column_of_code = np.full(n_loggers, -1, dtype=np.int64)
+        column_of_code[np.asarray(logger_codes, dtype=np.int64)] = np.arange(n_columns)
+        valid = (timestamps_ns != _NAT_NS) & (row_logger_codes >= 0)
+        columns = column_of_code[row_logger_codes[valid]]
+        selected = columns >= 0
+        if not n_columns or not selected.any():
+            return cls(np.empty(0, dtype=np.int64), bucket_ns, np.zeros((0, n_columns), dtype=np.int64), labels)
+
+        buckets = timestamps_ns[valid][selected] // bucket_ns
+        keys, key_counts = np.unique(buckets * n_columns + columns[selected], return_counts=True)
+        occupied, bucket_index = np.unique(keys // n_columns, return_inverse=True)
+        counts = np.zeros((len(occupied), n_columns), dtype=np.int64)
+        counts[bucket_index, keys % n_columns] = key_counts
+        return cls(occupied * bucket_ns, bucket_ns, counts, labels)
+
+    @classmethod
+    def from_cube(cls, cube, logger_codes, labels, level_codes=None, start=0, stop=None):
+        counts = cube.counts_by_logger(logger_codes, level_codes, start, stop)
+        occupied = np.flatnonzero(counts.any(axis=1))
+        return cls(cube.bucket_starts_ns(start, stop)[occupied], cube.bucket_ns, counts[occupied], labels)
+
+    def __len__(self):
+        return len(self.starts_ns)
+
+    @property
+    def ends_ns(self):
+        return self.starts_ns + self.bucket_ns
+
+    def totals(self):
+        return self.counts.sum(axis=1)
+
+    def bucket_datetimes(self, bucket):
+        """(start, end) of one bucket as datetimes."""
+        start = pd.Timestamp(int(self.starts_ns[bucket])).to_pydatetime()
+        return start, start + timedelta(microseconds=self.bucket_ns // 1000)
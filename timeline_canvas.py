@@ -1,24 +1,181 @@
 #!/usr/bin/env python3
-import sys
-import re
 import threading
-import time
-from datetime import datetime, timedelta, timezone
-from collections import defaultdict, Counter
+from datetime import datetime, timedelta
 from PyQt5 import QtWidgets, QtGui, QtCore
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.dates as mdates
+from matplotlib.colors import LogNorm, to_rgba_array
+from matplotlib.collections import PolyCollection
+from matplotlib.patches import Patch, Rectangle
+from matplotlib.transforms import blended_transform_factory
 import numpy as np
-from matplotlib.ticker import PercentFormatter
-import os # For path basename (though not directly used here, good to keep if future needs)
 import pandas as pd
 
+from anomaly_detection import anomaly_at
+from log_index import LogIndex
+from logger_colors import LoggerColors
+from time_buckets import (AUTO_GRANULARITY, CUBE_MIN_BUCKET_NS, GRANULARITY_NS, StreamingCounts, TimelineSeries,
+                          pick_lod_bucket_ns)
+
+
+_NS_PER_DAY = 86400 * 10**9
+STREAM_REDRAW_INTERVAL_MS = 500  # Live preview while loading: at most two redraws per second
+ANOMALY_CLICK_TOLERANCE_PX = 3  # Bursts are often narrower than a pixel: clicks this close still hit them
+
+
+def ns_to_date_num(timestamps_ns):
+    """Matplotlib date numbers for int64 nanosecond timestamps (vectorized)."""
+    return mdates.date2num(np.asarray(timestamps_ns, dtype=np.int64).astype('datetime64[ns]'))
+
+
+def date_num_to_ns(date_num):
+    return int(round((date_num - mdates.date2num(np.datetime64(0, 'ns'))) * _NS_PER_DAY))
+
+
+def date_format_for(granularity, span_in_days):
+    """strftime format of the time axis labels for a granularity and a visible span."""
+    if granularity == 'day':
+        return '%Y-%m-%d'
+    if granularity == 'hour':
+        return '%b %d %H:%M' if span_in_days > 1.8 else '%H:%M'  # Date shown above ~1.8 days
+    if granularity == 'minute':
+        return '%b %d %H:%M' if span_in_days > 1.8 else '%H:%M:%S'
+    return '%b %d %H:%M:%S' if span_in_days > 1.8 else '%H:%M:%S'  # Sub-minute buckets
+
+
+def bar_tooltip_text(message_type, time_start, time_end, count):
+    time_end_display = time_end - timedelta(microseconds=1)
+    # Format based on whether the time range spans across midnight
+    if time_start.date() == time_end_display.date():
+        start_format = '%A, %Y-%m-%d %H:%M:%S'
+        end_format = '%H:%M:%S'
+        time_text = f"Time: {time_start.strftime(start_format)} - {time_end_display.strftime(end_format)}"
+    else:
+        full_format = '%A, %Y-%m-%d %H:%M:%S'
+        time_text = f"Start: {time_start.strftime(full_format)}\nEnd:   {time_end_display.strftime(full_format)}"
+    return f"{message_type}\n{time_text}\nCount: {count}"
+
+
+def _add_bar_collection(ax, verts, color):
+    """One series of bars: a rectangle (4 vertices) per non-empty bucket, all in a single artist."""
+    collection = PolyCollection(verts, facecolors=color, edgecolors='none', alpha=0.7)
+    ax.add_collection(collection)
+    return collection
+
+
+def _add_heatmap_image(figure, ax, cells, extent, vmax):
+    image = ax.imshow(cells, aspect='auto', origin='upper', extent=extent, interpolation='nearest',
+                      norm=LogNorm(vmin=1, vmax=vmax),
+                      cmap=plt.get_cmap('viridis').with_extremes(bad='white'))  # NaN (empty) cells are bad
+    colorbar_ax = ax.inset_axes([1.01, 0, 0.015, 1])  # Child of ax: ax.clear() removes it
+    figure.colorbar(image, cax=colorbar_ax, label='Count')
+    return image
+
+
+def _add_legend(figure, labels, colors):
+    handles = [Patch(facecolor=color, alpha=0.7) for color in colors]
+    return figure.legend(handles, labels, bbox_to_anchor=(0.86, 0.98), loc='upper left', fontsize='small')
+
+
+def _add_anomaly_span(ax, x_start, x_end):
+    # Full height of the axes, x in data coordinates
+    span = Rectangle((x_start, 0), x_end - x_start, 1, transform=blended_transform_factory(ax.transData, ax.transAxes),
+                     facecolor='red', alpha=0.15, edgecolor='red', linewidth=1, zorder=5)
+    ax.add_patch(span)
+    return span
+
+
+def _set_date_axis(ax, date_format):
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=12, minticks=4))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter(date_format))
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+
+
+def render_timeline_scene(scene):
+    """Draws a scene (plain arrays and strings, see TimelineCanvas._render_scene) on a new Figure and
+    Agg canvas and returns the pixels as a BufferRegion. Uses the same helpers as the on-screen figure."""
+    figure = Figure(figsize=scene['size_inches'], dpi=scene['dpi'])
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_axes(scene['position'])
+    heatmap = scene['heatmap']
+    if heatmap is not None:
+        _add_heatmap_image(figure, ax, heatmap['cells'], heatmap['extent'], heatmap['vmax'])
+        ax.set_yticks(heatmap['ytick_positions'])
+        ax.set_yticklabels(heatmap['ytick_labels'], fontsize='x-small')
+    for verts, color in scene['bars']:
+        _add_bar_collection(ax, verts, color)
+    for x_start, x_end in scene['anomaly_spans']:
+        _add_anomaly_span(ax, x_start, x_end)
+    if scene['legend'] is not None:
+        _add_legend(figure, *scene['legend'])
+    ax.set_xlim(scene['xlim'])
+    ax.set_ylim(scene['ylim'])
+    if scene['date_format'] is not None:
+        _set_date_axis(ax, scene['date_format'])
+        ax.grid(True, alpha=0.3)
+    ax.set_xlabel(scene['xlabel'])
+    ax.set_ylabel(scene['ylabel'])
+    ax.set_title(scene['title'])
+    canvas.draw()
+    return canvas.copy_from_bbox(figure.bbox)
+
+
+_STOP_RENDERER = object()  # Queued by OffscreenRenderer.stop(): the worker thread returns
+
+
+class OffscreenRenderer:
+    """Agg-renders timeline scenes (see render_timeline_scene) on a daemon thread.
+
+    The GUI thread only hands over the arrays the figure is built from, never artists: the worker
+    creates its own Figure per request. A new request replaces the one still waiting, so only the
+    newest is drawn; the caller drops results whose generation is no longer current.
+    """
+
+    def __init__(self, on_rendered):
+        self._on_rendered = on_rendered  # Called on the worker thread with (generation, BufferRegion or None)
+        self._condition = threading.Condition()
+        self._pending = None  # (generation, scene), or _STOP_RENDERER
+        self._thread = threading.Thread(target=self._run, name='timeline-render', daemon=True)
+        self._thread.start()
+
+    def request(self, generation, scene):
+        with self._condition:
+            if self._pending is not _STOP_RENDERER:
+                self._pending = (generation, scene)
+                self._condition.notify()
+
+    def stop(self):
+        """Ends the worker thread after the draw in progress, if any; waiting requests are dropped."""
+        with self._condition:
+            self._pending = _STOP_RENDERER
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                if self._pending is _STOP_RENDERER:
+                    return
+                generation, scene = self._pending
+                self._pending = None
+            try:
+                region = render_timeline_scene(scene)
+            except Exception:
+                region = None
+            self._on_rendered(generation, region)
+
 
 class TimelineCanvas(FigureCanvas):
     bar_clicked = QtCore.pyqtSignal(datetime, datetime)
     time_range_updated = QtCore.pyqtSignal(float, float)
+    view_changed = QtCore.pyqtSignal(float, float)  # Zoomed or panned from the canvas itself (date numbers)
+    _background_rendered = QtCore.pyqtSignal(int, object)  # Emitted by the render thread, queued to the GUI thread
+
+    TOP_K_SERIES = 10  # 'topk' display: types kept as their own stack, the busiest of the visible window
 
     def __init__(self, parent=None):
         self.figure = Figure(figsize=(12, 4), dpi=90)
@@ -26,81 +183,213 @@ class TimelineCanvas(FigureCanvas):
         self.setParent(parent)
         self.ax = self.figure.add_subplot(111)
         self.log_data_cache = pd.DataFrame()
-        self.time_groups_cache = None
+        self.log_index = None  # LogIndex of log_data_cache, owns the per-granularity count cubes
+        self.timeline_data_cache = None  # TimelineSeries for the current selection and granularity
         self.current_selected_message_types = set()
         self.current_time_granularity = 'minute'  # Default
-        self.bars_render_data = []
-        self.hover_annotation = None
+        # 'bars' (stacked), 'topk' (busiest types in view stacked, the rest as Other) or 'heatmap' (one row per type)
+        self.display_mode = 'bars'
+        self.bar_layout = None  # Geometry of the drawn bars, used for hover/click hit-testing
+        # Figure-level legend: survives ax.clear() and is only rebuilt when the plotted series change
+        self._legend = None
+        self._legend_key = None
+        # 'auto' and sub-minute granularities: bucket width and time window (ns) the current bars were built for
+        self._window_bucket_ns = None
+        self._window_ns = None
+        self.hover_annotation = None  # Tooltip and hovered segment outline, both blitted (animated artists)
+        self.hover_highlight = None
+        self.selection_span = None  # Drag-selected time range, blitted like the hover overlays
+        self.anomalies = []  # Bursts highlighted over the bars (see set_anomalies), highest score first
+        self._anomaly_spans = []
+        self._selection_anchor = None  # (pixel x, data x) of the left press that may turn into a drag
+        self._selecting = False
+        self._pan_anchor = None  # (pixel x, xlim) of a middle or Shift+left press
+        # Wheel zoom and drag pan apply at most one view per frame (~60 fps), xlim only
+        self._pending_view = None
+        self._view_timer = QtCore.QTimer(self)
+        self._view_timer.setSingleShot(True)
+        self._view_timer.timeout.connect(self._apply_pending_view)
         self.last_hovered_bar_info = None
+        self._hover_background = None  # Figure pixels without the hover overlays, captured after each full draw
+        # Optional offscreen rendering: full draws run on a worker thread and are blitted in when done
+        self.background_rendering = False
+        self._offscreen_renderer = None
+        self._render_generation = 0  # Bumped per render request; results of older ones are stale
+        self._render_request_pending = False
+        self._background_rendered.connect(self._on_background_rendered)
         self.full_time_min_num = None
         self.full_time_max_num = None
         self.current_xlim_cache = None
-        self.update_timer = QtCore.QTimer()
+        self.update_timer = QtCore.QTimer(self)  # Child timers die with the widget instead of firing on it
         self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self._do_delayed_plot_update)
         self.pending_xlim_override = None
+        # Counts received while a dataset is loading (see append_counts); None once the data is set
+        self._streaming = None
+        self._stream_colors = None  # LoggerColors of the streamed counts, kept for the whole load
+        self._stream_redraw_timer = QtCore.QTimer(self)
+        self._stream_redraw_timer.setSingleShot(True)
+        self._stream_redraw_timer.timeout.connect(self._redraw_streamed_counts)
 
         self.mpl_connect('button_press_event', self.on_click)
+        self.mpl_connect('button_release_event', self.on_release)
+        self.mpl_connect('scroll_event', self.on_scroll)
         self.mpl_connect('motion_notify_event', self.on_hover)
         self.mpl_connect('axes_leave_event', self.on_leave_axes)
+        self.mpl_connect('draw_event', self.on_draw)
 
-    def set_full_log_data(self, log_entries):
+    def set_full_log_data(self, log_entries, log_index=None):
         self.log_data_cache = log_entries
-        self.time_groups_cache = None
+        # Data the app did not index itself (e.g. a date-filtered subset) gets its own index
+        if log_index is None and not log_entries.empty:
+            log_index = LogIndex(log_entries)
+        self.log_index = log_index
+        self.timeline_data_cache = None
+        self._streaming = None
+        self._stream_redraw_timer.stop()
+
+    @property
+    def streamed_counts(self):
+        """StreamingCounts shown while a dataset loads, else None."""
+        return self._streaming
+
+    def begin_streaming(self, streamed_counts=None):
+        """Shows the counts of a loading dataset, as append_counts() delivers them, until set_full_log_data()."""
+        self._streaming = streamed_counts if streamed_counts is not None else StreamingCounts()
+        # Names still arrive: they all get the name-hash colors, which no later logger can shift
+        self._stream_colors = LoggerColors([])
+        self.timeline_data_cache = None
+        self.plot_timeline()
+
+    def append_counts(self, new_logger_names, buckets, logger_codes, counts):
+        """Adds a loader delta (minute buckets, logger codes, counts) to the live counts; redraws are rate-limited."""
+        if self._streaming is None:
+            return
+        self._streaming.append(new_logger_names, buckets, logger_codes, counts)
+        if not self._stream_redraw_timer.isActive():
+            self._stream_redraw_timer.start(STREAM_REDRAW_INTERVAL_MS)
+
+    def end_streaming(self):
+        """Drops the live counts (loading cancelled or failed) and shows the data set before, if any."""
+        if self._streaming is not None:
+            self._streaming = None
+            self._stream_redraw_timer.stop()
+            self.timeline_data_cache = None
+            self.plot_timeline()
+
+    def _redraw_streamed_counts(self):
+        if self._streaming is not None:
+            self.timeline_data_cache = None
+            self.plot_timeline()
+
+    def _logger_colors(self):
+        if self._streaming is not None:
+            return self._stream_colors
+        return self.log_index.logger_colors
+
+    def set_anomalies(self, anomalies):
+        """Highlights burst windows (anomaly_detection.Anomaly); clicking one applies its time range."""
+        self.anomalies = list(anomalies)
+        if self.bar_layout is not None:
+            self._draw_anomaly_spans()
+            self.draw_idle()
+
+    def _draw_anomaly_spans(self):
+        for span in self._anomaly_spans:
+            if span.axes is not None:  # Not already removed by ax.clear()
+                span.remove()
+        # Few enough to need no culling
+        self._anomaly_spans = [_add_anomaly_span(self.ax, *ns_to_date_num([anomaly.start_ns, anomaly.end_ns]))
+                               for anomaly in self.anomalies]
+
+    def _anomaly_at(self, xdata):
+        if not self.anomalies or xdata is None: return None
+        view_min, view_max = self.ax.get_xlim()
+        ns_per_px = (date_num_to_ns(view_max) - date_num_to_ns(view_min)) / max(self._axes_pixel_width(), 1)
+        return anomaly_at(self.anomalies, date_num_to_ns(xdata), ANOMALY_CLICK_TOLERANCE_PX * ns_per_px)
 
     def update_display_config(self, selected_message_types, time_granularity):
         config_changed = (self.current_selected_message_types != selected_message_types or
                           self.current_time_granularity != time_granularity)
         self.current_selected_message_types = selected_message_types
         self.current_time_granularity = time_granularity
-        if config_changed:
-            self.time_groups_cache = None
-        self.plot_timeline(xlim_override=self.current_xlim_cache if not config_changed else None)
-
-    def _get_or_prepare_time_groups(self):
-        if self.time_groups_cache is not None:
-            return self.time_groups_cache
-
-        if self.log_data_cache.empty or not self.current_selected_message_types:
-            self.time_groups_cache = {}
-            return self.time_groups_cache
-
-        # Filter entries based on selected message types
-        filtered_df = self.log_data_cache[self.log_data_cache['logger_name'].isin(self.current_selected_message_types)]
-
-        if filtered_df.empty:
-            self.time_groups_cache = {}
-            return self.time_groups_cache
-
-        # Use a copy to avoid SettingWithCopyWarning
-        df = filtered_df.copy()
-        df.dropna(subset=['datetime_obj'], inplace=True)
-
-        if df.empty:
-            self.time_groups_cache = {}
-            return self.time_groups_cache
-
-        # Round the datetimes based on granularity
-        dts = df['datetime_obj']
-        if self.current_time_granularity == 'day':
-            rounded_time_series = dts.dt.floor('D')
-        elif self.current_time_granularity == 'hour':
-            rounded_time_series = dts.dt.floor('h')
-        else:  # 'minute'
-            rounded_time_series = dts.dt.floor('T')
-        
-        # Group by the rounded time and logger name, then count occurrences
-        grouped = df.groupby([rounded_time_series, 'logger_name']).size().unstack(fill_value=0)
-        
-        # Convert to the nested defaultdict structure expected by the rest of the code
-        time_groups = defaultdict(lambda: defaultdict(int))
-        for timestamp, row in grouped.iterrows():
-            for logger_name, count in row.items():
-                if count > 0:
-                    time_groups[timestamp.to_pydatetime()][logger_name] = count
-        
-        self.time_groups_cache = time_groups
-        return self.time_groups_cache
+        # Rebuild only for new data or a new config; otherwise the bars on screen are already right
+        if config_changed or self.timeline_data_cache is None:
+            self.timeline_data_cache = None
+            self.plot_timeline()
+
+    def set_display_mode(self, display_mode):
+        if display_mode == self.display_mode:
+            return
+        self.display_mode = display_mode
+        # Same data and view, drawn the other way
+        self.plot_timeline(xlim_override=self.ax.get_xlim() if self.bar_layout is not None else None)
+
+    def _get_or_prepare_timeline_data(self):
+        if self.timeline_data_cache is not None:
+            return self.timeline_data_cache
+
+        granularity = self.current_time_granularity
+        if granularity != AUTO_GRANULARITY and granularity not in GRANULARITY_NS:
+            granularity = 'minute'
+        if self._streaming is not None:  # Every logger counted so far, there is no type selection yet
+            self._window_bucket_ns = self._window_ns = None
+            cube = self._streaming.cube
+            self.timeline_data_cache = self._streaming.series(self._wanted_bucket_ns(granularity,
+                                                                                     cube.n_buckets * cube.bucket_ns))
+            return self.timeline_data_cache
+        if self.log_index is None or self.log_index.row_count == 0 or not self.current_selected_message_types:
+            self.timeline_data_cache = TimelineSeries.empty(GRANULARITY_NS.get(granularity, GRANULARITY_NS['minute']))
+            return self.timeline_data_cache
+
+        # Slice the selected loggers out of the precomputed count cube and sum over levels
+        logger_codes = self.log_index.logger_codes_for(self.current_selected_message_types)
+        if granularity == AUTO_GRANULARITY or GRANULARITY_NS[granularity] < CUBE_MIN_BUCKET_NS:
+            self.timeline_data_cache = self._windowed_series(granularity, logger_codes)
+        else:
+            self._window_bucket_ns = self._window_ns = None
+            self.timeline_data_cache = self.log_index.timeline_series(logger_codes, GRANULARITY_NS[granularity])
+        return self.timeline_data_cache
+
+    def _windowed_series(self, granularity, logger_codes):
+        """Bars only for the view plus one view width on each side (panning within that margin needs no
+        rebuild). 'auto' picks the bucket width from the view span and pixel width; sub-minute buckets
+        are counted from the rows of the window instead of a cube."""
+        if self.pending_xlim_override is not None:
+            view_min_ns, view_max_ns = (date_num_to_ns(x) for x in self.pending_xlim_override)
+        else:
+            view_min_ns, view_max_ns = self.log_index.time_span_ns() or (0, 0)
+        span_ns = max(view_max_ns - view_min_ns, 1)
+        self._window_bucket_ns = bucket_ns = self._wanted_bucket_ns(granularity, span_ns)
+        self._window_ns = (view_min_ns - span_ns, view_max_ns + span_ns)
+        return self.log_index.timeline_series(logger_codes, bucket_ns, self._window_ns)
+
+    def _wanted_bucket_ns(self, granularity, span_ns):
+        if granularity == AUTO_GRANULARITY:
+            return pick_lod_bucket_ns(span_ns, self._axes_pixel_width())
+        return GRANULARITY_NS[granularity]
+
+    def _axes_pixel_width(self):
+        return self.ax.get_window_extent().width
+
+    def _window_needs_rebuild(self, view_min_num, view_max_num):
+        if self._window_ns is None:
+            return False
+        view_min_ns, view_max_ns = date_num_to_ns(view_min_num), date_num_to_ns(view_max_num)
+        wanted_ns = self._wanted_bucket_ns(self.current_time_granularity, max(view_max_ns - view_min_ns, 1))
+        outside = view_min_ns < self._window_ns[0] or view_max_ns > self._window_ns[1]
+        return wanted_ns != self._window_bucket_ns or outside
+
+    def _effective_granularity(self):
+        """Granularity name used for axis formatting; 'auto' maps to the closest fixed one."""
+        if self.current_time_granularity != AUTO_GRANULARITY:
+            return self.current_time_granularity
+        bucket_ns = self._window_bucket_ns or GRANULARITY_NS['minute']
+        if bucket_ns >= GRANULARITY_NS['day']:
+            return 'day'
+        if bucket_ns >= GRANULARITY_NS['hour']:
+            return 'hour'
+        return 'minute' if bucket_ns >= GRANULARITY_NS['minute'] else 'second'
 
     def plot_timeline(self, xlim_override=None):
         if xlim_override is not None:
@@ -113,58 +402,51 @@ class TimelineCanvas(FigureCanvas):
 
     def _do_delayed_plot_update(self):
         xlim_override = self.pending_xlim_override
-        time_groups = self._get_or_prepare_time_groups()
+        timeline_data = self._get_or_prepare_timeline_data()
 
         self.ax.clear()
-        self.bars_render_data = []  # Clear previous bar artist references
+        self.bar_layout = None
 
-        if self.hover_annotation:  # Clean up old annotation
-            try:
-                self.hover_annotation.remove()
-            except (ValueError, AttributeError):  # Catch if already removed or invalid
-                pass
-            finally:
-                self.hover_annotation = None
+        self._create_hover_artists()  # ax.clear() removed the previous ones
         self.last_hovered_bar_info = None
 
-        if not time_groups:
+        if not len(timeline_data):
+            if self._legend is not None:
+                self._legend.set_visible(False)
             self.draw_idle()
             if xlim_override is None:  # Only update range if it's a full plot, not a zoom/pan
                 self.time_range_updated.emit(0, 0)
             self.current_xlim_cache = self.ax.get_xlim()
             return
 
-        times = sorted(time_groups.keys())
-        message_types_to_plot = list(self.current_selected_message_types)
-        x_pos = mdates.date2num(times)
+        x_pos = ns_to_date_num(timeline_data.starts_ns)
 
         is_full_data_or_config_update = (xlim_override is None)
         if is_full_data_or_config_update:  # Recalculate full time range only on new data/config
-            if x_pos.size > 0:
-                self.full_time_min_num = x_pos[0]
-                # Calculate end of the last interval for max range
-                last_time_end_obj = self.get_interval_end_time(times[-1])
-                self.full_time_max_num = mdates.date2num(last_time_end_obj)
-                self.time_range_updated.emit(self.full_time_min_num, self.full_time_max_num)
-            else:
-                self.full_time_min_num = None
-                self.full_time_max_num = None
-                self.time_range_updated.emit(0, 0)
+            self.full_time_min_num = x_pos[0]
+            # End of the last interval for max range
+            self.full_time_max_num = ns_to_date_num(timeline_data.ends_ns[-1:])[0]
 
-        bar_width_factor = 0.7
-        bar_width = self._calculate_bar_width(times, x_pos, bar_width_factor)
+        if self.display_mode == 'heatmap':
+            view = xlim_override if xlim_override is not None else (self.full_time_min_num, self.full_time_max_num)
+            self.bar_layout = self._generate_timeline_heatmap(timeline_data, view)
+        else:
+            bar_width_factor = 0.7
+            bar_width = self._calculate_bar_width(x_pos, timeline_data.bucket_ns, bar_width_factor)
 
-        # Generate bar data for rendering and hover/click detection
-        temp_bars_data, _ = self._generate_timeline_bars(
-            times, x_pos, time_groups, message_types_to_plot, bar_width
-        )
-        self.bars_render_data = list(reversed(temp_bars_data))  # Reversed for hover priority (topmost bar gets hover)
+            top_columns = None
+            if self.display_mode == 'topk':
+                view = xlim_override if xlim_override is not None else (-np.inf, np.inf)
+                top_columns = self._top_k_columns(timeline_data, x_pos - bar_width / 2, bar_width, view)
+            # Draw the bars and keep their geometry for hover/click detection
+            self.bar_layout = self._generate_timeline_bars(x_pos, timeline_data, bar_width, top_columns)
 
         self._configure_axes(xlim_override)  # Pass xlim_override to configure axes before drawing
+        self._cull_to_view()
+        self._draw_anomaly_spans()
 
-        handles, labels = self.ax.get_legend_handles_labels()
-        if handles and labels:
-            self.ax.legend(handles, labels, bbox_to_anchor=(1.05, 1), loc='upper left', fontsize='small')
+        if self._legend is not None:
+            self._legend.set_visible(self.display_mode != 'heatmap')
 
         self.ax.grid(True, alpha=0.3)
         try:
@@ -175,59 +457,241 @@ class TimelineCanvas(FigureCanvas):
             except (ValueError, RuntimeError):
                 pass  # Give up on tight_layout if it fails twice
         self.current_xlim_cache = self.ax.get_xlim()  # Cache the new xlim
+        if is_full_data_or_config_update:
+            # Once the bars exist: the sliders answer with the full view, which then needs no second plot
+            self.time_range_updated.emit(self.full_time_min_num, self.full_time_max_num)
         self.draw_idle()
 
-    def _calculate_bar_width(self, times, x_pos, bar_width_factor):
-        bar_width = 0.001  # Default minimum
-        if len(times) > 1:
-            min_interval_width = np.min(np.diff(x_pos)) if len(x_pos) > 1 else 0.1  # Use np.diff
-            bar_width = min_interval_width * bar_width_factor
-        elif len(times) == 1:  # Single data point
-            deltas = {'minute': timedelta(minutes=1),
-                      'hour': timedelta(hours=1), 'day': timedelta(days=1)}
-            delta_td = deltas.get(self.current_time_granularity, timedelta(minutes=1))  # Default to minute
-            # Convert timedelta to matplotlib numeric width
-            base_dt = datetime(2000, 1, 1)  # Arbitrary base for delta calculation
-            granularity_width_num = mdates.date2num(base_dt + delta_td) - mdates.date2num(base_dt)
-            bar_width = granularity_width_num * bar_width_factor
-        return max(bar_width, 0.0001)  # Ensure a very small minimum to avoid zero width
-
-    def _generate_timeline_bars(self, times, x_pos, time_groups, message_types_to_plot, bar_width):
-        temp_bars_data = []
-        bars_collections_for_legend = []  # To collect artists for the legend
-        if not times: return temp_bars_data, bars_collections_for_legend
-
-        if len(message_types_to_plot) > 10:  # Aggregate if too many types for clarity
-            total_counts = [sum(time_groups[t].get(mt, 0) for mt in message_types_to_plot) for t in times]
-            bars_collection = self.ax.bar(x_pos, total_counts, bar_width, color='steelblue', alpha=0.7,
-                                          label=f'All Messages ({len(message_types_to_plot)} types)')
-            bars_collections_for_legend.append(bars_collection)
-            for bar_artist, t, count in zip(bars_collection, times, total_counts):
-                if count > 0:
-                    temp_bars_data.append({'bar': bar_artist, 'time_start': t,
-                                           'time_end': self.get_interval_end_time(t),
-                                           'message_type': f'All Selected ({len(message_types_to_plot)} types)',
-                                           'count': count})
+    def _calculate_bar_width(self, x_pos, bucket_ns, bar_width_factor):
+        if len(x_pos) > 1:
+            bar_width = np.min(np.diff(x_pos)) * bar_width_factor
+        else:  # Single data point: one bucket wide
+            bar_width = bucket_ns / _NS_PER_DAY * bar_width_factor
+        # Small minimum to avoid zero width, relative to the bucket so 1s bars are not widened
+        return max(bar_width, bucket_ns / _NS_PER_DAY * 0.1)
+
+    def _top_k_columns(self, timeline_data, x_left, bar_width, view):
+        """Count columns of the TOP_K_SERIES busiest series over the bars in `view`, busiest first.
+
+        One column sum over the visible bucket slice and an argpartition: cheap enough for every pan step.
+        """
+        lo = np.searchsorted(x_left, view[0] - bar_width, side='left')
+        hi = np.searchsorted(x_left, view[1], side='right')
+        window_sums = timeline_data.counts[lo:hi].sum(axis=0)
+        k = min(self.TOP_K_SERIES, len(window_sums))
+        if k < len(window_sums):
+            top = np.argpartition(-window_sums, k - 1)[:k]
+        else:
+            top = np.arange(len(window_sums))
+        top = top[np.argsort(-window_sums[top], kind='stable')]
+        return top[window_sums[top] > 0]
+
+    def _update_top_k(self):
+        """Re-picks the top K for the current x-limits; the bars are only rebuilt when the set changes."""
+        layout = self.bar_layout
+        if layout is None or layout.get('top_columns') is None:
+            return
+        top_columns = self._top_k_columns(self.timeline_data_cache, layout['x_left'], layout['width'], self.ax.get_xlim())
+        if np.array_equal(np.sort(top_columns), np.sort(layout['top_columns'])):
+            return  # Same types: keep the stacking order they were picked in
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+        for collection, _, _ in layout['collections']:
+            collection.remove()
+        self.bar_layout = self._generate_timeline_bars(layout['x_left'] + layout['width'] / 2, self.timeline_data_cache,
+                                                       layout['width'], top_columns)
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+
+    def _generate_timeline_bars(self, x_pos, timeline_data, bar_width, top_columns=None):
+        """Draws the bars as one PolyCollection per series and returns their geometry.
+
+        With `top_columns` (count columns, from _top_k_columns) those series are stacked and all the
+        others summed into one Other series on top.
+        """
+        message_types_to_plot = timeline_data.labels
+        if top_columns is not None:
+            series_counts = timeline_data.counts[:, top_columns]
+            series_labels = [message_types_to_plot[column] for column in top_columns]
+            colors = self._logger_colors().rgba_list(series_labels)
+            n_other = len(message_types_to_plot) - len(top_columns)
+            if n_other:
+                other_counts = timeline_data.totals() - series_counts.sum(axis=1)
+                series_counts = np.column_stack([series_counts, other_counts])
+                series_labels = series_labels + [f'Other ({n_other} types)']
+                colors = colors + [to_rgba_array('lightgray')[0]]
+            legend_labels = series_labels
+        elif len(message_types_to_plot) > 10:  # Aggregate if too many types for clarity
+            series_counts = timeline_data.totals()[:, np.newaxis]
+            series_labels = [f'All Selected ({len(message_types_to_plot)} types)']
+            legend_labels = [f'All Messages ({len(message_types_to_plot)} types)']
+            colors = ['steelblue']
         else:  # Stacked bar chart for fewer types
-            data_matrix = [[time_groups[t].get(mt, 0) for t in times] for mt in message_types_to_plot]
-            bottom_values = np.zeros(len(times))
-            num_plot_types = len(message_types_to_plot) if message_types_to_plot else 1  # Avoid div by zero if no types
-            colors = plt.cm.Set3(np.linspace(0, 1, max(1, num_plot_types)))  # Use a colormap
-
-            for i, (msg_type, counts_for_type) in enumerate(zip(message_types_to_plot, data_matrix)):
-                color_idx = i % len(colors) if (colors.ndim > 0 and colors.size > 0) else 0
-                current_color = colors[
-                    color_idx] if colors.ndim > 1 else colors  # Handle single color case from colormap
-                bars_collection = self.ax.bar(x_pos, counts_for_type, bar_width, bottom=bottom_values, label=msg_type,
-                                              color=current_color, alpha=0.7)
-                bars_collections_for_legend.append(bars_collection)
-                bottom_values += np.array(counts_for_type)  # Ensure it's an array for addition
-                for bar_artist, t, count_val in zip(bars_collection, times, counts_for_type):
-                    if count_val > 0:
-                        temp_bars_data.append({'bar': bar_artist, 'time_start': t,
-                                               'time_end': self.get_interval_end_time(t),
-                                               'message_type': msg_type, 'count': count_val})
-        return temp_bars_data, bars_collections_for_legend
+            series_counts = timeline_data.counts
+            series_labels = legend_labels = list(message_types_to_plot)
+            colors = self._logger_colors().rgba_list(series_labels)  # Same color for a logger on every redraw
+
+        stack_tops = np.cumsum(series_counts, axis=1)
+        x_left = x_pos - bar_width / 2  # Bars are centered on the bucket start, like ax.bar
+        x_right = x_left + bar_width
+        collections = []  # (artist, all its vertices, their left edges) for visible-window culling
+        for i, label in enumerate(legend_labels):
+            tops = stack_tops[:, i]
+            bottoms = tops - series_counts[:, i]
+            drawn = np.flatnonzero(series_counts[:, i])
+            verts = np.empty((len(drawn), 4, 2))
+            verts[:, 0, 0] = verts[:, 1, 0] = x_left[drawn]
+            verts[:, 2, 0] = verts[:, 3, 0] = x_right[drawn]
+            verts[:, 0, 1] = verts[:, 3, 1] = bottoms[drawn]
+            verts[:, 1, 1] = verts[:, 2, 1] = tops[drawn]
+            collection = _add_bar_collection(self.ax, verts, colors[i])
+            collections.append((collection, verts, x_left[drawn]))
+
+        # Collections do not take part in autoscaling: set the data limits explicitly
+        self.ax.set_xlim(x_left[0], x_right[-1])
+        self.ax.set_ylim(0, max(int(stack_tops[:, -1].max()), 1) * 1.05)
+        self._update_legend(legend_labels, colors)
+        return {'mode': 'bars', 'x_left': x_left, 'width': bar_width, 'series_counts': series_counts,
+                'stack_tops': stack_tops, 'labels': series_labels, 'collections': collections, 'colors': colors,
+                'top_columns': top_columns}
+
+    def _update_legend(self, labels, colors):
+        """Shows the legend of the plotted series, reusing the legend artist while they are unchanged."""
+        key = tuple(labels), tuple(map(tuple, to_rgba_array(colors)))
+        if key == self._legend_key:
+            return
+        if self._legend is not None:
+            self._legend.remove()
+        self._legend = _add_legend(self.figure, labels, colors)
+        self._legend_key = key
+
+    def _heatmap_cell_ns(self, bucket_ns, span_ns):
+        """Cell width of the heatmap image: the bucket width, or a power-of-two multiple of it when the
+        view holds more buckets than the axes have pixels (powers of two: zooming rarely changes it)."""
+        buckets_per_pixel = span_ns / bucket_ns / max(self._axes_pixel_width(), 1)
+        return bucket_ns * (2 ** int(np.ceil(np.log2(buckets_per_pixel))) if buckets_per_pixel > 1 else 1)
+
+    def _generate_timeline_heatmap(self, timeline_data, view):
+        """Draws [type × time cell] counts as one image, busiest type on top, and returns its geometry.
+
+        Only the view and one view width on either side are imaged, at about one cell per pixel
+        (see _heatmap_cell_ns), as float32 with NaN for empty cells, which the colormap draws white.
+        Empty cells are columns of the image too, so hovering maps to a cell by index arithmetic alone.
+        """
+        bucket_ns, starts_ns = timeline_data.bucket_ns, timeline_data.starts_ns
+        view_min_ns, view_max_ns = date_num_to_ns(view[0]), date_num_to_ns(view[1])
+        span_ns = max(view_max_ns - view_min_ns, bucket_ns)
+        cell_ns = self._heatmap_cell_ns(bucket_ns, span_ns)
+        # Buckets are aligned on multiples of their width since the epoch, so each one falls in a single cell
+        first_ns = max(view_min_ns - span_ns, int(starts_ns[0])) // cell_ns * cell_ns
+        stop_ns = min(view_max_ns + span_ns, int(timeline_data.ends_ns[-1]))
+        n_cells = max(-(-(stop_ns - first_ns) // cell_ns), 1)
+        lo, hi = np.searchsorted(starts_ns, [first_ns, first_ns + n_cells * cell_ns])
+
+        row_series = np.argsort(-timeline_data.counts.sum(axis=0), kind='stable')  # Row -> count column
+        series_row = np.argsort(row_series)
+        columns = (starts_ns[lo:hi] - first_ns) // cell_ns
+        cells = np.zeros((len(row_series), n_cells), dtype=np.float32)
+        if hi > lo:
+            # Occupied buckets are sorted: those of one cell are consecutive and are summed in place
+            cell_starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+            cell_counts = np.add.reduceat(timeline_data.counts[lo:hi], cell_starts, axis=0)
+            cells[:, columns[cell_starts]] = cell_counts[:, row_series].T
+        vmax = max(float(cells.max()) if cells.size else 0.0, 2.0)
+        cells[cells == 0] = np.nan
+
+        x_left = ns_to_date_num([first_ns])[0]
+        cell_days = cell_ns / _NS_PER_DAY
+        extent = (x_left, x_left + n_cells * cell_days, len(row_series), 0)
+        _add_heatmap_image(self.figure, self.ax, cells, extent, vmax)
+
+        labels = [timeline_data.labels[series] for series in row_series]
+        max_tick_labels = max(int(self.ax.get_window_extent().height // 12), 1)  # ~12 px per x-small label
+        step = max(1, -(-len(labels) // max_tick_labels))
+        ytick_positions, ytick_labels = np.arange(0, len(labels), step) + 0.5, labels[::step]
+        self.ax.set_yticks(ytick_positions)
+        self.ax.set_yticklabels(ytick_labels, fontsize='x-small')
+        return {'mode': 'heatmap', 'x_left': x_left, 'width': cell_days, 'cells': cells,
+                'extent': extent, 'vmax': vmax, 'ytick_positions': ytick_positions, 'ytick_labels': ytick_labels,
+                'first_start_ns': first_ns, 'cell_ns': cell_ns, 'bucket_ns': bucket_ns,
+                'window_ns': (first_ns, first_ns + n_cells * cell_ns),
+                'row_series': row_series, 'series_row': series_row, 'labels': labels, 'collections': []}
+
+    def _heatmap_needs_rebuild(self, view_min_num, view_max_num):
+        """True when a view leaves the imaged window of the heatmap or needs another cell width."""
+        layout = self.bar_layout
+        if layout is None or layout['mode'] != 'heatmap':
+            return False
+        view_min_ns, view_max_ns = date_num_to_ns(view_min_num), date_num_to_ns(view_max_num)
+        full_min_ns, full_max_ns = date_num_to_ns(self.full_time_min_num), date_num_to_ns(self.full_time_max_num)
+        window_ns = layout['window_ns']
+        outside = (view_min_ns < window_ns[0] and window_ns[0] > full_min_ns) or \
+                  (view_max_ns > window_ns[1] and window_ns[1] < full_max_ns)
+        span_ns = max(view_max_ns - view_min_ns, layout['bucket_ns'])
+        return outside or self._heatmap_cell_ns(layout['bucket_ns'], span_ns) != layout['cell_ns']
+
+    def _visible_verts(self, verts, lefts):
+        """The vertices of the bars overlapping the current x-limits (a view, not a copy)."""
+        view_min, view_max = self.ax.get_xlim()
+        lo = np.searchsorted(lefts, view_min - self.bar_layout['width'], side='left')
+        hi = np.searchsorted(lefts, view_max, side='right')
+        return verts[lo:hi]
+
+    def _cull_to_view(self):
+        """Keeps only the bars overlapping the current x-limits in the collections."""
+        if self.bar_layout is None:
+            return
+        for collection, verts, lefts in self.bar_layout['collections']:
+            collection.set_verts(self._visible_verts(verts, lefts))
+
+    def _hit_test(self, xdata, ydata):
+        """(bucket, series) of the bar segment under data coordinates, or None. O(log n) per event."""
+        layout = self.bar_layout
+        if layout is None or xdata is None or ydata is None or ydata < 0:
+            return None
+        if layout['mode'] == 'heatmap':
+            return self._hit_test_heatmap(xdata, ydata)
+        # Bucket: last bar starting at or before x (left edges are sorted), if x is within its width
+        bucket = int(np.searchsorted(layout['x_left'], xdata, side='right')) - 1
+        if bucket < 0 or xdata > layout['x_left'][bucket] + layout['width']:
+            return None
+        # Segment: first cumulative top above y; empty segments share the previous top and are skipped
+        tops = layout['stack_tops'][bucket]
+        series = int(np.searchsorted(tops, ydata, side='right'))
+        return (bucket, series) if series < len(tops) else None
+
+    def _hit_test_heatmap(self, xdata, ydata):
+        """(bucket, series) of the heatmap cell under data coordinates: row and column by index arithmetic."""
+        layout = self.bar_layout
+        row = int(ydata)
+        column = int((xdata - layout['x_left']) // layout['width'])
+        cells = layout['cells']
+        if not (0 <= row < cells.shape[0] and 0 <= column < cells.shape[1]) or np.isnan(cells[row, column]):
+            return None
+        # A non-empty cell holds occupied buckets: the first one stands for the cell
+        start_ns = layout['first_start_ns'] + column * layout['cell_ns']
+        bucket = int(np.searchsorted(self.timeline_data_cache.starts_ns, start_ns))
+        return bucket, int(layout['row_series'][row])
+
+    def _bar_info(self, hit):
+        bucket, series = hit
+        layout = self.bar_layout
+        if layout['mode'] == 'heatmap':
+            row = int(layout['series_row'][series])
+            column = int((self.timeline_data_cache.starts_ns[bucket] - layout['first_start_ns']) // layout['cell_ns'])
+            start_ns = layout['first_start_ns'] + column * layout['cell_ns']
+            x_left = layout['x_left'] + column * layout['width']
+            return {'bucket': bucket, 'message_type': self.timeline_data_cache.labels[series],
+                    'count': int(layout['cells'][row, column]), 'start_ns': start_ns, 'end_ns': start_ns + layout['cell_ns'],
+                    'x': x_left + layout['width'] / 2, 'y': float(row),
+                    'x_left': x_left, 'width': layout['width'], 'bottom': float(row + 1)}
+        start_ns = int(self.timeline_data_cache.starts_ns[bucket])
+        return {'bucket': bucket, 'message_type': layout['labels'][series],
+                'start_ns': start_ns, 'end_ns': start_ns + self.timeline_data_cache.bucket_ns,
+                'count': int(layout['series_counts'][bucket, series]),
+                'x': layout['x_left'][bucket] + layout['width'] / 2,
+                'y': float(layout['stack_tops'][bucket, series]),
+                'x_left': layout['x_left'][bucket], 'width': layout['width'],
+                'bottom': float(layout['stack_tops'][bucket, series] - layout['series_counts'][bucket, series])}
 
     def _configure_axes(self, xlim_override):
         # Set x-axis limits first, as they might influence formatter choice
@@ -243,35 +707,21 @@ class TimelineCanvas(FigureCanvas):
             self.ax.set_xlim(self.full_time_min_num, self.full_time_max_num)
         # else: xlim will be auto-determined by matplotlib if no data/range set previously
 
-        locator = mdates.AutoDateLocator(maxticks=12, minticks=4)
-        self.ax.xaxis.set_major_locator(locator)
-
-        view_min_num, view_max_num = self.ax.get_xlim()  # Get current, possibly just set, limits
-        span_in_days = view_max_num - view_min_num
-
-        if self.current_time_granularity == 'day':
-            formatter = mdates.DateFormatter('%Y-%m-%d')
-        elif self.current_time_granularity == 'hour':
-            if span_in_days > 1.8:  # More than ~1.8 days visible
-                formatter = mdates.DateFormatter('%b %d %H:%M')
-            else:
-                formatter = mdates.DateFormatter('%H:%M')
-        elif self.current_time_granularity == 'minute':
-            if span_in_days > 1.8:  # More than ~1.8 days visible
-                formatter = mdates.DateFormatter('%b %d %H:%M')  # Date and time, no seconds
-            # elif span_in_days > 0.1: # More than ~2.4 hours visible
-            #     formatter = mdates.DateFormatter('%H:%M:%S')
-            else:  # Less than ~1.8 days, show seconds
-                formatter = mdates.DateFormatter('%H:%M:%S')
-        else:  # Fallback (should not be 'second' anymore if UI restricts it)
-            formatter = mdates.DateFormatter('%H:%M:%S')
-
-        self.ax.xaxis.set_major_formatter(formatter)
-        plt.setp(self.ax.get_xticklabels(), rotation=45, ha="right")
+        self._update_x_formatter()
         self.ax.set_xlabel('Time');
-        self.ax.set_ylabel('Message Count')
+        if self.bar_layout is not None and self.bar_layout['mode'] == 'heatmap':
+            self.ax.set_ylabel(f"Message Type ({len(self.bar_layout['labels'])}, by count)")
+        else:
+            self.ax.set_ylabel('Message Count')
         self.ax.set_title('Log Messages Timeline')
 
+    def _x_date_format(self):
+        view_min_num, view_max_num = self.ax.get_xlim()  # Get current, possibly just set, limits
+        return date_format_for(self._effective_granularity(), view_max_num - view_min_num)
+
+    def _update_x_formatter(self):
+        _set_date_axis(self.ax, self._x_date_format())
+
     def set_time_window_from_sliders(self, view_min_num, view_max_num):
         if self.full_time_min_num is None or self.full_time_max_num is None: return
 
@@ -304,110 +754,277 @@ class TimelineCanvas(FigureCanvas):
         if (view_min_num < view_max_num and
                 (abs(current_xlim[0] - view_min_num) > 1e-9 or  # Use tolerance for float comparison
                  abs(current_xlim[1] - view_max_num) > 1e-9)):
+            self.set_view_xlim(view_min_num, view_max_num)
+
+    def get_view_xlim(self):
+        return self.ax.get_xlim()
+
+    def set_view_xlim(self, view_min_num, view_max_num):
+        """Pans/zooms by moving the x-limits of the existing bars; no rebuild."""
+        if self.update_timer.isActive():
+            # A rebuild is pending: a full one resets the view anyway, a view-only one takes the new window
+            if self.pending_xlim_override is not None:
+                self.pending_xlim_override = (view_min_num, view_max_num)
+            return
+        if self._window_needs_rebuild(view_min_num, view_max_num):
+            self.timeline_data_cache = None  # Another bucket width or window is needed for this view
             self.plot_timeline(xlim_override=(view_min_num, view_max_num))
+            return
+        if self.bar_layout is None or self._heatmap_needs_rebuild(view_min_num, view_max_num):
+            self.plot_timeline(xlim_override=(view_min_num, view_max_num))  # Same series, new image window
+            return
+        self.ax.set_xlim(view_min_num, view_max_num)
+        self._update_x_formatter()
+        self._update_top_k()
+        self._cull_to_view()
+        self.current_xlim_cache = self.ax.get_xlim()
+        self.last_hovered_bar_info = None  # The tooltip would point at the old position
+        self._hide_hover()
+        self.draw_idle()
 
     def get_interval_end_time(self, time_start):
         if not isinstance(time_start, datetime): return time_start + timedelta(minutes=1)  # Default fallback
-        granularity_deltas = {'minute': timedelta(minutes=1),
-                              'hour': timedelta(hours=1), 'day': timedelta(days=1)}
-        return time_start + granularity_deltas.get(self.current_time_granularity, timedelta(minutes=1))
+        bucket_ns = self._window_bucket_ns if self.current_time_granularity == AUTO_GRANULARITY else \
+            GRANULARITY_NS.get(self.current_time_granularity)
+        return time_start + timedelta(microseconds=(bucket_ns or GRANULARITY_NS['minute']) // 1000)
 
     def on_click(self, event):
-        if event.inaxes != self.ax: return
-        # Iterate in original order for stacked bars (bottom-most part of stack if clicked there)
-        # self.bars_render_data is already reversed for hover (top-most).
-        # For click, matplotlib's pick event or contains usually handles stacking okay if artists are distinct.
-        # If self.bars_render_data was reversed for hover, we might need to iterate original or check more carefully.
-        # Let's assume reversed (for hover) is fine for click too, as it checks top-most first.
-        for bar_data in reversed(self.bars_render_data):  # Check top-most rendered bar first
-            try:
-                if bar_data['bar'].contains(event)[0]:
-                    self.bar_clicked.emit(bar_data['time_start'], bar_data['time_end'])
-                    return  # Process first match
-            except (AttributeError, KeyError, RuntimeError):  # Bar might be invalid or removed
-                continue
+        if event.inaxes != self.ax or self.bar_layout is None: return
+        if event.button == 2 or (event.button == 1 and self._shift_held(event)):
+            self._pan_anchor = (event.x, self._pending_view or self.ax.get_xlim())
+            self.setCursor(QtCore.Qt.ClosedHandCursor)
+            self._hide_hover()
+            self._blit_hover_overlays()
+        elif event.button == 1:
+            # Left press: a click on a bar if released in place, a time range selection if dragged
+            self._selection_anchor = (event.x, event.xdata)
+            self._selecting = False
 
-    def on_hover(self, event):
-        if event.inaxes != self.ax:
-            if self.hover_annotation and self.hover_annotation.get_visible():
-                try:
-                    self.hover_annotation.set_visible(False);
-                    self.draw_idle()
-                except (AttributeError, RuntimeError):
-                    pass  # Annotation might be stale
-            self.last_hovered_bar_info = None
+    def on_release(self, event):
+        if self._pan_anchor is not None:
+            self._pan_anchor = None
+            self.unsetCursor()
+            return
+        if self._selection_anchor is None or event.button != 1: return
+        anchor_xdata = self._selection_anchor[1]
+        self._selection_anchor = None
+        if not self._selecting:
+            hit = self._hit_test(event.xdata, event.ydata) if event.inaxes == self.ax else None
+            if hit is not None:
+                bar_info = self._bar_info(hit)  # A heatmap cell may sum several buckets
+                self.bar_clicked.emit(pd.Timestamp(bar_info['start_ns']).to_pydatetime(),
+                                      pd.Timestamp(bar_info['end_ns']).to_pydatetime())
+                return
+            anomaly = self._anomaly_at(event.xdata) if event.inaxes == self.ax else None
+            if anomaly is not None:  # Outside the bars but on a highlighted burst
+                self.bar_clicked.emit(anomaly.start_time, anomaly.end_time)
             return
+        self._selecting = False
+        self.selection_span.set_visible(False)
+        self._blit_hover_overlays()
+        # Whole buckets from the first to the last one touched; AppLogic slices them by binary search
+        bucket_ns = self.timeline_data_cache.bucket_ns
+        view_min, view_max = self.ax.get_xlim()
+        x_min, x_max = sorted(min(max(x, view_min), view_max) for x in (anchor_xdata, self._event_xdata(event)))
+        start_ns = date_num_to_ns(x_min) // bucket_ns * bucket_ns
+        end_ns = -(-date_num_to_ns(x_max) // bucket_ns) * bucket_ns
+        if end_ns > start_ns:
+            self.bar_clicked.emit(pd.Timestamp(start_ns).to_pydatetime(), pd.Timestamp(end_ns).to_pydatetime())
 
-        hovered_bar_info = None
-        # self.bars_render_data is already reversed for hover priority
-        for b_info in self.bars_render_data:
-            try:
-                if b_info['bar'].contains(event)[0]:
-                    hovered_bar_info = b_info;
-                    break
-            except (AttributeError, KeyError, RuntimeError):  # Bar might be invalid
-                continue
-
-        if hovered_bar_info:
-            if hovered_bar_info == self.last_hovered_bar_info:  # Still on the same bar
-                if self.hover_annotation and not self.hover_annotation.get_visible():
-                    try:
-                        self.hover_annotation.set_visible(True);
-                        self.draw_idle()
-                    except (AttributeError, RuntimeError):
-                        pass
-                return  # No change needed if already visible
-
-            self.last_hovered_bar_info = hovered_bar_info  # New bar hovered
-
-            if self.hover_annotation:  # Remove old annotation
-                try:
-                    self.hover_annotation.remove()
-                except (ValueError, AttributeError, RuntimeError):
-                    pass  # Catch if already removed
+    @staticmethod
+    def _shift_held(event):
+        # event.modifiers reflects the keyboard now, the Qt event the state at the click
+        gui_event = event.guiEvent
+        return 'shift' in event.modifiers or (gui_event is not None and bool(gui_event.modifiers() & QtCore.Qt.ShiftModifier))
 
-            try:
-                time_start = hovered_bar_info['time_start']
-                time_end_display = hovered_bar_info['time_end'] - timedelta(microseconds=1)
-
-                # Format based on whether the time range spans across midnight
-                if time_start.date() == time_end_display.date():
-                    start_format = '%A, %Y-%m-%d %H:%M:%S'
-                    end_format = '%H:%M:%S'
-                    time_text = f"Time: {time_start.strftime(start_format)} - {time_end_display.strftime(end_format)}"
-                else:
-                    full_format = '%A, %Y-%m-%d %H:%M:%S'
-                    time_text = f"Start: {time_start.strftime(full_format)}\nEnd:   {time_end_display.strftime(full_format)}"
-
-                text = f"{hovered_bar_info['message_type']}\n{time_text}\nCount: {hovered_bar_info['count']}"
-
-                bar_patch = hovered_bar_info['bar']
-                x = bar_patch.get_x() + bar_patch.get_width() / 2
-                y = bar_patch.get_y() + bar_patch.get_height()
-
-                self.hover_annotation = self.ax.annotate(text, xy=(x, y), xytext=(0, 5), textcoords="offset points",
-                                                         ha='center', va='bottom',
-                                                         bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.85),
-                                                         fontsize=9, zorder=10)  # High zorder
-                self.hover_annotation.set_visible(True);
-                self.draw_idle()
-            except (AttributeError, KeyError, RuntimeError):  # If data is malformed
-                self.hover_annotation = None;
-                self.last_hovered_bar_info = None
-        else:  # Not hovering over any known bar
-            if self.hover_annotation and self.hover_annotation.get_visible():
-                try:
-                    self.hover_annotation.set_visible(False);
-                    self.draw_idle()
-                except (AttributeError, RuntimeError):
-                    pass
-            self.last_hovered_bar_info = None
+    def on_scroll(self, event):
+        """Zooms around the pointer: the time under it stays in place."""
+        if event.inaxes != self.ax or self.full_time_min_num is None: return
+        view_min, view_max = self._pending_view or self.ax.get_xlim()
+        factor = 1.25 ** -event.step  # Wheel up zooms in
+        anchor = event.xdata
+        self._request_view(anchor - (anchor - view_min) * factor, anchor + (view_max - anchor) * factor)
+
+    def _update_pan(self, event):
+        anchor_x, (view_min, view_max) = self._pan_anchor
+        shift = (anchor_x - event.x) * (view_max - view_min) / self.ax.get_window_extent().width
+        self._request_view(view_min + shift, view_max + shift)
+
+    def _request_view(self, view_min_num, view_max_num):
+        """Clamps a view to the data range and schedules it; the timer keeps redraws to one per frame."""
+        full_span = self.full_time_max_num - self.full_time_min_num
+        if full_span <= 0: return
+        span = min(max(view_max_num - view_min_num, full_span * 0.0001), full_span)  # Same minimum as the sliders
+        view_min_num = min(max(view_min_num, self.full_time_min_num), self.full_time_max_num - span)
+        self._pending_view = (view_min_num, view_min_num + span)
+        if not self._view_timer.isActive():
+            self._view_timer.start(16)
+
+    def _apply_pending_view(self):
+        if self._pending_view is None: return
+        view = self._pending_view
+        self._pending_view = None
+        self.set_view_xlim(*view)
+        self.view_changed.emit(*view)
+
+    def _event_xdata(self, event):
+        """x in data coordinates, also when the pointer left the axes while dragging."""
+        return self.ax.transData.inverted().transform((event.x, event.y))[0]
+
+    def _update_selection(self, event):
+        if not self._selecting and abs(event.x - self._selection_anchor[0]) < 3:
+            return  # Not a drag yet
+        self._selecting = True
+        x0, x1 = sorted((self._selection_anchor[1], self._event_xdata(event)))
+        self.selection_span.set_x(x0)
+        self.selection_span.set_width(x1 - x0)
+        self.selection_span.set_visible(True)
+        self.last_hovered_bar_info = None
+        self._hide_hover()
+        self._blit_hover_overlays()
+
+    def _create_hover_artists(self):
+        """Tooltip and highlight outline. Being animated, full draws skip them and hovering only blits them."""
+        self.hover_annotation = self.ax.annotate('', xy=(0, 0), xytext=(0, 5), textcoords="offset points",
+                                                 ha='center', va='bottom',
+                                                 bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.85),
+                                                 fontsize=9, zorder=10, animated=True, visible=False)
+        self.hover_highlight = Rectangle((0, 0), 0, 0, fill=False, edgecolor='black', linewidth=1.5,
+                                         zorder=9, animated=True, visible=False)
+        self.ax.add_patch(self.hover_highlight)
+        # Full height of the axes, x in data coordinates
+        self.selection_span = Rectangle((0, 0), 0, 1, transform=blended_transform_factory(self.ax.transData, self.ax.transAxes),
+                                        facecolor='tab:blue', edgecolor='tab:blue', alpha=0.25,
+                                        zorder=8, animated=True, visible=False)
+        self.ax.add_patch(self.selection_span)
+        self._selection_anchor = None
+        self._selecting = False
+
+    def on_draw(self, event):
+        # A full draw (new data, zoom, pan, resize) refreshes the background the hover overlays are blitted on
+        self._hover_background = self.copy_from_bbox(self.figure.bbox)
+        self._draw_hover_overlays()
+
+    def resizeEvent(self, event):
+        self._hover_background = None  # Wrong size until the next full draw
+        super().resizeEvent(event)
+
+    def set_background_rendering(self, enabled):
+        """Turns offscreen rendering on or off; off also stops the worker thread (and on window close)."""
+        self.background_rendering = bool(enabled)
+        if self.background_rendering and self._offscreen_renderer is None:
+            self._offscreen_renderer = OffscreenRenderer(self._background_rendered.emit)
+        elif not self.background_rendering and self._offscreen_renderer is not None:
+            self._offscreen_renderer.stop()
+            self._offscreen_renderer = None
+            self._render_generation += 1  # A render still in flight is stale
+        self.draw_idle()
+
+    def draw_idle(self):
+        if not self.background_rendering:
+            super().draw_idle()
+            return
+        # Coalesce the requests of one event loop pass, like FigureCanvasQT.draw_idle
+        if not self._render_request_pending:
+            self._render_request_pending = True
+            QtCore.QTimer.singleShot(0, self._request_background_render)
+
+    def _request_background_render(self):
+        self._render_request_pending = False
+        if self._offscreen_renderer is None:  # Turned off since the request was queued
+            super().draw_idle()
+            return
+        self._render_generation += 1
+        self._offscreen_renderer.request(self._render_generation, self._render_scene())
+
+    def _render_scene(self):
+        """What the figure shows, as plain arrays and strings for render_timeline_scene() on the worker.
+
+        Arrays are shared, not copied: the layouts are rebuilt, never modified, once drawn. The hover
+        artists are animated, so they are left out like in a normal full draw.
+        """
+        layout = self.bar_layout
+        scene = {'size_inches': tuple(self.figure.get_size_inches()), 'dpi': self.figure.dpi,
+                 'position': self.ax.get_position().bounds, 'xlim': self.ax.get_xlim(), 'ylim': self.ax.get_ylim(),
+                 'xlabel': self.ax.get_xlabel(), 'ylabel': self.ax.get_ylabel(), 'title': self.ax.get_title(),
+                 'date_format': None, 'heatmap': None, 'bars': [], 'anomaly_spans': [], 'legend': None}
+        if layout is None:
+            return scene
+        scene['date_format'] = self._x_date_format()
+        if layout['mode'] == 'heatmap':
+            scene['heatmap'] = {key: layout[key] for key in ('cells', 'extent', 'vmax', 'ytick_positions', 'ytick_labels')}
+        else:
+            scene['bars'] = [(self._visible_verts(verts, lefts), color)
+                             for (_, verts, lefts), color in zip(layout['collections'], layout['colors'])]
+        scene['anomaly_spans'] = [(span.get_x(), span.get_x() + span.get_width())
+                                  for span in self._anomaly_spans if span.axes is not None]
+        if self._legend is not None and self._legend.get_visible():
+            labels, colors = self._legend_key
+            scene['legend'] = (list(labels), list(colors))
+        return scene
+
+    def _on_background_rendered(self, generation, region):
+        if generation != self._render_generation or not self.background_rendering:
+            return  # A newer request is on its way, or offscreen rendering was turned off
+        if region is None:  # Offscreen draw failed: draw in the GUI thread instead
+            super().draw_idle()
+            return
+        if tuple(region.get_extents()) != (0, 0) + self.get_width_height(physical=True):
+            return  # Resized meanwhile; the resize requested another render
+        self.restore_region(region)
+        self._hover_background = region
+        self._draw_hover_overlays()
+        self.update()
+
+    def _draw_hover_overlays(self):
+        for artist in (self.selection_span, self.hover_highlight, self.hover_annotation):
+            if artist is not None and artist.get_visible():
+                self.ax.draw_artist(artist)
+
+    def _blit_hover_overlays(self):
+        if self._hover_background is None:
+            if not self.background_rendering:  # An offscreen render in flight draws the overlays on arrival
+                self.draw_idle()  # No clean background yet: the full draw will capture one and draw the overlays
+            return
+        self.restore_region(self._hover_background)
+        self._draw_hover_overlays()
+        self.blit(self.figure.bbox)
+
+    def _show_hover(self, bar_info):
+        time_start, time_end = (pd.Timestamp(bar_info[key]).to_pydatetime() for key in ('start_ns', 'end_ns'))
+        self.hover_annotation.set_text(bar_tooltip_text(bar_info['message_type'], time_start, time_end,
+                                                        bar_info['count']))
+        self.hover_annotation.xy = (bar_info['x'], bar_info['y'])
+        self.hover_annotation.set_visible(True)
+        self.hover_highlight.set_bounds(bar_info['x_left'], bar_info['bottom'],
+                                        bar_info['width'], bar_info['y'] - bar_info['bottom'])
+        self.hover_highlight.set_visible(True)
+
+    def _hide_hover(self):
+        for artist in (self.hover_annotation, self.hover_highlight):
+            if artist is not None:
+                artist.set_visible(False)
+
+    def on_hover(self, event):
+        if self._pan_anchor is not None:
+            self._update_pan(event)
+            return
+        if self._selection_anchor is not None:
+            self._update_selection(event)
+            return
+        hit = self._hit_test(event.xdata, event.ydata) if event.inaxes == self.ax else None
+        hovered_bar_info = self._bar_info(hit) if hit is not None else None
+        if hovered_bar_info == self.last_hovered_bar_info:
+            return  # Same segment (or still nothing): nothing to redraw
+        self.last_hovered_bar_info = hovered_bar_info
+        if hovered_bar_info is None:
+            self._hide_hover()
+        else:
+            self._show_hover(hovered_bar_info)
+        self._blit_hover_overlays()
 
     def on_leave_axes(self, event):
-        if self.hover_annotation and self.hover_annotation.get_visible():
-            try:
-                self.hover_annotation.set_visible(False);
-                self.draw_idle()
-            except (AttributeError, RuntimeError):
-                pass
-        self.last_hovered_bar_info = None
\ No newline at end of file
+        if self.last_hovered_bar_info is not None:
+            self.last_hovered_bar_info = None
+            self._hide_hover()
+            self._blit_hover_overlays()
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+from datetime import datetime, timedelta
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.ticker import MaxNLocator
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from anomaly_detection import anomaly_at
+from log_index import LogIndex
+from logger_colors import LoggerColors
+from time_buckets import (AUTO_GRANULARITY, CUBE_MIN_BUCKET_NS, GRANULARITY_NS, StreamingCounts, TimelineSeries,
+                          pick_lod_bucket_ns)
+from timeline_canvas import (ANOMALY_CLICK_TOLERANCE_PX, STREAM_REDRAW_INTERVAL_MS, bar_tooltip_text, date_format_for, date_num_to_ns,
+                             ns_to_date_num)
+
+
+class PainterTimeline(QtWidgets.QWidget):
+    """Timeline painted with QPainter straight from the count arrays; same signals and API as TimelineCanvas.
+
+    The bars are rasterized per pixel column with NumPy into one QImage, so a repaint costs about
+    the same for a hundred buckets or a million. The wheel zooms around the cursor, left-drag pans.
+    """
+    bar_clicked = QtCore.pyqtSignal(datetime, datetime)
+    time_range_updated = QtCore.pyqtSignal(float, float)
+    view_changed = QtCore.pyqtSignal(float, float)  # Zoomed or panned from the widget itself (date numbers)
+
+    MARGINS = (60, 28, 200, 48)  # left, top, right (legend), bottom (tick labels), in pixels
+    BAR_WIDTH_FACTOR = 0.7
+    MAX_SERIES = 10  # Above this the selected types are drawn as one aggregated series, like TimelineCanvas
+    ZOOM_STEP = 1.25  # View span factor per wheel notch
+    MIN_SPAN_RATIO = 0.0001  # Smallest view span as a fraction of the full range, like the sliders
+    VIEW_SIGNAL_INTERVAL_MS = 16  # view_changed at most once per frame at 60 fps while dragging
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.log_data_cache = pd.DataFrame()
+        self.log_index = None
+        self.timeline_data_cache = None  # TimelineSeries for the current selection and granularity
+        self.current_selected_message_types = set()
+        self.current_time_granularity = 'minute'
+        self.full_time_min_num = None
+        self.full_time_max_num = None
+        self._full_ns = None  # (start, end) of the full data range
+        self._view_ns = None  # (start, end) displayed; None shows the full range
+        # 'auto' and sub-minute granularities: bucket width and time window (ns) the current series was built for
+        self._window_bucket_ns = None
+        self._window_ns = None
+        self._layout = None  # Series counts, stack tops, labels and colors of timeline_data_cache
+        self._bars_image = None  # Rasterized bars, reused while view, size and data are unchanged
+        self._bars_image_key = None
+        self._hover = None  # (bucket, series) under the mouse
+        self.anomalies = []  # Bursts highlighted over the bars, like TimelineCanvas
+        self._drag_origin = None  # (mouse x, view) when the left button went down
+        self._dragged = False
+        self._view_signal_timer = QtCore.QTimer(self)
+        self._view_signal_timer.setSingleShot(True)
+        self._view_signal_timer.timeout.connect(self._emit_view_changed)
+        self._streaming = None  # StreamingCounts while a dataset loads, like TimelineCanvas
+        self._stream_colors = None
+        self._stream_redraw_timer = QtCore.QTimer(self)
+        self._stream_redraw_timer.setSingleShot(True)
+        self._stream_redraw_timer.timeout.connect(self._redraw_streamed_counts)
+
+        self.setMouseTracking(True)
+        self.setMinimumHeight(200)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+
+    # --- Same API as TimelineCanvas ---
+
+    def set_full_log_data(self, log_entries, log_index=None):
+        self.log_data_cache = log_entries
+        if log_index is None and not log_entries.empty:
+            log_index = LogIndex(log_entries)
+        self.log_index = log_index
+        self.timeline_data_cache = None
+        self._streaming = None
+        self._stream_redraw_timer.stop()
+
+    @property
+    def streamed_counts(self):
+        """StreamingCounts shown while a dataset loads, else None."""
+        return self._streaming
+
+    def begin_streaming(self, streamed_counts=None):
+        self._streaming = streamed_counts if streamed_counts is not None else StreamingCounts()
+        self._stream_colors = LoggerColors([])  # Name-hash colors only, like TimelineCanvas.begin_streaming
+        self.plot_timeline()
+
+    def append_counts(self, new_logger_names, buckets, logger_codes, counts):
+        if self._streaming is None:
+            return
+        self._streaming.append(new_logger_names, buckets, logger_codes, counts)
+        if not self._stream_redraw_timer.isActive():
+            self._stream_redraw_timer.start(STREAM_REDRAW_INTERVAL_MS)
+
+    def end_streaming(self):
+        if self._streaming is not None:
+            self._streaming = None
+            self._stream_redraw_timer.stop()
+            self.plot_timeline()
+
+    def _redraw_streamed_counts(self):
+        if self._streaming is not None:
+            self.plot_timeline()
+
+    def set_anomalies(self, anomalies):
+        self.anomalies = list(anomalies)
+        self.update()
+
+    def update_display_config(self, selected_message_types, time_granularity):
+        config_changed = (self.current_selected_message_types != selected_message_types or
+                          self.current_time_granularity != time_granularity)
+        self.current_selected_message_types = selected_message_types
+        self.current_time_granularity = time_granularity
+        if config_changed or self.timeline_data_cache is None:
+            self.timeline_data_cache = None
+            self.plot_timeline()
+
+    def plot_timeline(self, xlim_override=None):
+        self.timeline_data_cache = None
+        self._view_ns = None if xlim_override is None else tuple(date_num_to_ns(x) for x in xlim_override)
+        timeline_data = self._get_or_prepare_timeline_data()
+        self._hover = None
+        if xlim_override is None:  # Only update the range on a full plot, not a zoom/pan
+            if len(timeline_data):
+                self._full_ns = (int(timeline_data.starts_ns[0]), int(timeline_data.ends_ns[-1]))
+                self.full_time_min_num, self.full_time_max_num = ns_to_date_num(self._full_ns)
+                self._view_ns = self._full_ns
+                self.time_range_updated.emit(self.full_time_min_num, self.full_time_max_num)
+            else:
+                self.time_range_updated.emit(0, 0)
+        self.update()
+
+    def set_time_window_from_sliders(self, view_min_num, view_max_num):
+        if self.full_time_min_num is None or self.full_time_max_num is None:
+            return
+        self._set_view((date_num_to_ns(max(view_min_num, self.full_time_min_num)),
+                        date_num_to_ns(min(view_max_num, self.full_time_max_num))))
+
+    def get_view_xlim(self):
+        view_ns = self._view_ns or self._full_ns
+        if view_ns is None:
+            return (0.0, 1.0)
+        return tuple(float(x) for x in ns_to_date_num(view_ns))
+
+    def set_view_xlim(self, view_min_num, view_max_num):
+        self._set_view((date_num_to_ns(view_min_num), date_num_to_ns(view_max_num)))
+
+    def get_interval_end_time(self, time_start):
+        bucket_ns = self._window_bucket_ns if self.current_time_granularity == AUTO_GRANULARITY else \
+            GRANULARITY_NS.get(self.current_time_granularity)
+        return time_start + timedelta(microseconds=(bucket_ns or GRANULARITY_NS['minute']) // 1000)
+
+    # --- Data ---
+
+    def _get_or_prepare_timeline_data(self):
+        if self.timeline_data_cache is not None:
+            return self.timeline_data_cache
+
+        granularity = self.current_time_granularity
+        if granularity != AUTO_GRANULARITY and granularity not in GRANULARITY_NS:
+            granularity = 'minute'
+        self._window_bucket_ns = self._window_ns = None
+        if self._streaming is not None:  # Every logger counted so far, there is no type selection yet
+            cube = self._streaming.cube
+            timeline_data = self._streaming.series(self._wanted_bucket_ns(granularity, cube.n_buckets * cube.bucket_ns))
+        elif self.log_index is None or self.log_index.row_count == 0 or not self.current_selected_message_types:
+            timeline_data = TimelineSeries.empty(GRANULARITY_NS.get(granularity, GRANULARITY_NS['minute']))
+        else:
+            logger_codes = self.log_index.logger_codes_for(self.current_selected_message_types)
+            if granularity == AUTO_GRANULARITY or GRANULARITY_NS[granularity] < CUBE_MIN_BUCKET_NS:
+                # Only the view plus one view width on each side, like TimelineCanvas._windowed_series
+                view_min_ns, view_max_ns = self._view_ns or self.log_index.time_span_ns() or (0, 0)
+                span_ns = max(view_max_ns - view_min_ns, 1)
+                self._window_bucket_ns = self._wanted_bucket_ns(granularity, span_ns)
+                self._window_ns = (view_min_ns - span_ns, view_max_ns + span_ns)
+                timeline_data = self.log_index.timeline_series(logger_codes, self._window_bucket_ns, self._window_ns)
+            else:
+                timeline_data = self.log_index.timeline_series(logger_codes, GRANULARITY_NS[granularity])
+        self.timeline_data_cache = timeline_data
+        self._layout = self._prepare_layout(timeline_data)
+        self._bars_image_key = None
+        return timeline_data
+
+    def _wanted_bucket_ns(self, granularity, span_ns):
+        if granularity == AUTO_GRANULARITY:
+            return pick_lod_bucket_ns(span_ns, self._plot_rect().width())
+        return GRANULARITY_NS[granularity]
+
+    def _window_needs_rebuild(self, view_ns):
+        if self._window_ns is None:
+            return False
+        wanted_ns = self._wanted_bucket_ns(self.current_time_granularity, max(view_ns[1] - view_ns[0], 1))
+        outside = view_ns[0] < self._window_ns[0] or view_ns[1] > self._window_ns[1]
+        return wanted_ns != self._window_bucket_ns or outside
+
+    def _prepare_layout(self, timeline_data):
+        labels = timeline_data.labels
+        if len(labels) > self.MAX_SERIES:
+            series_counts = timeline_data.totals()[:, np.newaxis]
+            series_labels = [f'All Selected ({len(labels)} types)']
+            colors = [QtGui.QColor('steelblue')]
+        else:
+            series_counts = timeline_data.counts
+            series_labels = list(labels)
+            colors = [QtGui.QColor.fromRgbF(*rgba[:3]) for rgba in self._logger_colors().rgba_list(series_labels)]
+        # Same look as the 0.7 alpha bars of TimelineCanvas on white, but opaque
+        colors = [QtGui.QColor(*(int(255 - 0.7 * (255 - c)) for c in color.getRgb()[:3])) for color in colors]
+        stack_tops = np.cumsum(series_counts, axis=1)
+        y_max = max(int(stack_tops[:, -1].max()), 1) * 1.05 if len(stack_tops) and stack_tops.shape[1] else 1
+        return {'series_counts': series_counts, 'stack_tops': stack_tops, 'labels': series_labels,
+                'colors': colors, 'y_max': y_max}
+
+    def _logger_colors(self):
+        if self._streaming is not None:
+            return self._stream_colors
+        return self.log_index.logger_colors if self.log_index is not None else LoggerColors([])
+
+    def _effective_granularity(self):
+        if self.current_time_granularity != AUTO_GRANULARITY:
+            return self.current_time_granularity
+        bucket_ns = self._window_bucket_ns or GRANULARITY_NS['minute']
+        for name in ('day', 'hour', 'minute'):
+            if bucket_ns >= GRANULARITY_NS[name]:
+                return name
+        return 'second'
+
+    # --- View ---
+
+    def _set_view(self, view_ns, from_user=False):
+        if self._full_ns is None:
+            return
+        full_min_ns, full_max_ns = self._full_ns
+        full_span_ns = full_max_ns - full_min_ns
+        span_ns = min(max(view_ns[1] - view_ns[0], int(full_span_ns * self.MIN_SPAN_RATIO), 1), full_span_ns)
+        start_ns = min(max(view_ns[0], full_min_ns), full_max_ns - span_ns)
+        view_ns = (int(start_ns), int(start_ns + span_ns))
+        if view_ns == self._view_ns:
+            return
+        self._view_ns = view_ns
+        if self._window_needs_rebuild(view_ns):
+            self.timeline_data_cache = None  # Another bucket width or window is needed for this view
+            self._get_or_prepare_timeline_data()
+        self._hover = None
+        self.update()
+        if from_user and not self._view_signal_timer.isActive():
+            self._view_signal_timer.start(self.VIEW_SIGNAL_INTERVAL_MS)
+
+    def _emit_view_changed(self):
+        self.view_changed.emit(*self.get_view_xlim())
+
+    def _plot_rect(self):
+        left, top, right, bottom = self.MARGINS
+        return QtCore.QRect(left, top, max(self.width() - left - right, 1), max(self.height() - top - bottom, 1))
+
+    def _ns_per_pixel(self):
+        return (self._view_ns[1] - self._view_ns[0]) / self._plot_rect().width()
+
+    # --- Painting ---
+
+    def _render_bars(self, width, height):
+        """RGB32 image of the stacked bars: per pixel column, the highest stack top of each series among
+        the buckets in that column, then one vectorized comparison per pixel row."""
+        timeline_data, layout = self.timeline_data_cache, self._layout
+        ns_per_px = self._ns_per_pixel()
+        lefts = (timeline_data.starts_ns - self._view_ns[0]) / ns_per_px
+        rights = lefts + max(timeline_data.bucket_ns * self.BAR_WIDTH_FACTOR / ns_per_px, 1.0)
+        stack_tops = layout['stack_tops']
+        column_tops = np.zeros((width, stack_tops.shape[1]))
+        columns = np.arange(width)
+        # Bars wider than a pixel: every column they overlap
+        first = np.searchsorted(rights, columns, side='right')
+        covered = (first < len(lefts)) & (lefts[np.minimum(first, len(lefts) - 1)] < columns + 1)
+        column_tops[covered] = stack_tops[first[covered]]
+        # Several bars in one column: keep the highest tops
+        visible = np.flatnonzero((rights > 0) & (lefts < width))
+        np.maximum.at(column_tops, np.clip(lefts[visible].astype(np.int64), 0, width - 1), stack_tops[visible])
+
+        tops_px = column_tops * (height / layout['y_max'])
+        row_heights = np.arange(height, 0, -1) - 0.5  # Height of each pixel row above the x axis, top row first
+        series_index = (row_heights[:, np.newaxis, np.newaxis] >= tops_px[np.newaxis]).sum(axis=2)
+        palette = np.array([color.rgb() for color in layout['colors']] + [0xFFFFFFFF], dtype=np.uint32)  # Last: background
+        pixels = np.ascontiguousarray(palette[series_index])
+        return QtGui.QImage(pixels.data, width, height, 4 * width, QtGui.QImage.Format_RGB32).copy()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        try:
+            painter.fillRect(self.rect(), QtCore.Qt.white)
+            plot = self._plot_rect()
+            painter.setPen(QtCore.Qt.black)
+            painter.drawText(QtCore.QRect(plot.left(), 0, plot.width(), plot.top()), QtCore.Qt.AlignCenter,
+                             'Log Messages Timeline')
+            timeline_data = self.timeline_data_cache
+            if timeline_data is not None and len(timeline_data) and self._view_ns is not None:
+                key = (self._view_ns, plot.width(), plot.height(), id(timeline_data))
+                if key != self._bars_image_key:
+                    self._bars_image = self._render_bars(plot.width(), plot.height())
+                    self._bars_image_key = key
+                painter.drawImage(plot.topLeft(), self._bars_image)
+                self._paint_anomalies(painter, plot)
+                self._paint_axes(painter, plot)
+                self._paint_legend(painter, plot)
+            painter.setPen(QtCore.Qt.black)
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.drawRect(plot.adjusted(0, 0, -1, -1))
+            if self._hover is not None:
+                painter.save()
+                self._paint_hover(painter, plot)
+                painter.restore()
+        finally:
+            painter.end()
+
+    def _paint_axes(self, painter, plot):
+        metrics = painter.fontMetrics()
+        grid_pen = QtGui.QPen(QtGui.QColor(0, 0, 0, 40))
+        y_max = self._layout['y_max']
+        for value in MaxNLocator(nbins=5, integer=True).tick_values(0, y_max):
+            if 0 <= value <= y_max:
+                y = plot.bottom() - value / y_max * plot.height()
+                painter.setPen(grid_pen)
+                painter.drawLine(QtCore.QPointF(plot.left(), y), QtCore.QPointF(plot.right(), y))
+                painter.setPen(QtCore.Qt.black)
+                painter.drawText(QtCore.QRectF(0, y - metrics.height() / 2, plot.left() - 6, metrics.height()),
+                                 QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter, f'{value:g}')
+
+        view_min_num, view_max_num = self.get_view_xlim()
+        formatter = mdates.DateFormatter(date_format_for(self._effective_granularity(), view_max_num - view_min_num))
+        locator = mdates.AutoDateLocator(minticks=3, maxticks=max(3, plot.width() // 110))
+        for value in locator.tick_values(mdates.num2date(view_min_num), mdates.num2date(view_max_num)):
+            if view_min_num <= value <= view_max_num:
+                x = plot.left() + (value - view_min_num) / (view_max_num - view_min_num) * plot.width()
+                painter.setPen(grid_pen)
+                painter.drawLine(QtCore.QPointF(x, plot.top()), QtCore.QPointF(x, plot.bottom()))
+                painter.setPen(QtCore.Qt.black)
+                painter.drawText(QtCore.QRectF(x - 60, plot.bottom() + 4, 120, metrics.height()),
+                                 QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop, formatter(value))
+        painter.drawText(QtCore.QRect(plot.left(), self.height() - metrics.height() - 2, plot.width(), metrics.height()),
+                         QtCore.Qt.AlignCenter, 'Time')
+
+    def _paint_anomalies(self, painter, plot):
+        ns_per_px = self._ns_per_pixel()
+        painter.save()
+        painter.setClipRect(plot)
+        painter.setPen(QtGui.QPen(QtGui.QColor(255, 0, 0)))
+        painter.setBrush(QtGui.QColor(255, 0, 0, 38))
+        for anomaly in self.anomalies:
+            left = plot.left() + (anomaly.start_ns - self._view_ns[0]) / ns_per_px
+            width = max((anomaly.end_ns - anomaly.start_ns) / ns_per_px, 1.0)
+            painter.drawRect(QtCore.QRectF(left, plot.top(), width, plot.height()))
+        painter.restore()
+
+    def _anomaly_at(self, pos):
+        plot = self._plot_rect()
+        if not self.anomalies or self._view_ns is None or not plot.contains(pos):
+            return None
+        ns_per_px = self._ns_per_pixel()
+        x_ns = self._view_ns[0] + (pos.x() + 0.5 - plot.left()) * ns_per_px
+        return anomaly_at(self.anomalies, x_ns, ANOMALY_CLICK_TOLERANCE_PX * ns_per_px)
+
+    def _paint_legend(self, painter, plot):
+        metrics = painter.fontMetrics()
+        x = plot.right() + 12
+        y = plot.top()
+        text_width = self.width() - x - 20
+        for label, color in zip(self._layout['labels'], self._layout['colors']):
+            painter.fillRect(QtCore.QRect(x, y + 2, 10, 10), color)
+            painter.drawText(QtCore.QRect(x + 16, y, text_width, metrics.height()), QtCore.Qt.AlignLeft,
+                             metrics.elidedText(label, QtCore.Qt.ElideMiddle, text_width))
+            y += metrics.height() + 2
+
+    def _paint_hover(self, painter, plot):
+        bucket, series = self._hover
+        layout = self._layout
+        ns_per_px = self._ns_per_pixel()
+        left = plot.left() + (self.timeline_data_cache.starts_ns[bucket] - self._view_ns[0]) / ns_per_px
+        width = max(self.timeline_data_cache.bucket_ns * self.BAR_WIDTH_FACTOR / ns_per_px, 1.0)
+        y_scale = plot.height() / layout['y_max']
+        top = float(layout['stack_tops'][bucket, series])
+        bottom = top - float(layout['series_counts'][bucket, series])
+        painter.setPen(QtGui.QPen(QtCore.Qt.black, 1.5))
+        painter.drawRect(QtCore.QRectF(left, plot.bottom() - top * y_scale, width, (top - bottom) * y_scale))
+
+        time_start, time_end = self.timeline_data_cache.bucket_datetimes(bucket)
+        text = bar_tooltip_text(layout['labels'][series], time_start, time_end,
+                                int(layout['series_counts'][bucket, series]))
+        box = QtCore.QRectF(painter.fontMetrics().boundingRect(QtCore.QRect(0, 0, 1000, 1000), 0, text)).adjusted(-6, -4, 6, 4)
+        box.moveBottomLeft(QtCore.QPointF(left + width / 2 - box.width() / 2, plot.bottom() - top * y_scale - 5))
+        box.moveLeft(min(max(box.left(), 0), self.width() - box.width()))  # Keep it inside the widget
+        box.moveTop(max(box.top(), 0))
+        painter.setPen(QtCore.Qt.black)
+        painter.setBrush(QtGui.QColor(255, 255, 0, 217))
+        painter.drawRoundedRect(box, 4, 4)
+        painter.drawText(box, QtCore.Qt.AlignCenter, text)
+
+    # --- Interaction ---
+
+    def _hit_test(self, pos):
+        """(bucket, series) under a widget position, or None. Binary searches only, like TimelineCanvas._hit_test."""
+        timeline_data = self.timeline_data_cache
+        plot = self._plot_rect()
+        if timeline_data is None or not len(timeline_data) or self._view_ns is None or not plot.contains(pos):
+            return None
+        ns_per_px = self._ns_per_pixel()
+        x_ns = self._view_ns[0] + (pos.x() + 0.5 - plot.left()) * ns_per_px  # Pixel centers, as rasterized
+        bucket = int(np.searchsorted(timeline_data.starts_ns, x_ns, side='right')) - 1
+        if bucket < 0 or x_ns > timeline_data.starts_ns[bucket] + max(timeline_data.bucket_ns * self.BAR_WIDTH_FACTOR, ns_per_px):
+            return None
+        count = (plot.top() + plot.height() - pos.y() - 0.5) / plot.height() * self._layout['y_max']
+        tops = self._layout['stack_tops'][bucket]
+        series = int(np.searchsorted(tops, count, side='right'))
+        return (bucket, series) if series < len(tops) else None
+
+    def wheelEvent(self, event):
+        if self._view_ns is None or not self._plot_rect().contains(event.pos()):
+            return
+        factor = self.ZOOM_STEP ** (-event.angleDelta().y() / 120)
+        anchor_ns = self._view_ns[0] + (event.pos().x() - self._plot_rect().left()) * self._ns_per_pixel()
+        self._set_view((int(anchor_ns - (anchor_ns - self._view_ns[0]) * factor),
+                        int(anchor_ns + (self._view_ns[1] - anchor_ns) * factor)), from_user=True)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton and self._view_ns is not None:
+            self._drag_origin = (event.pos().x(), self._view_ns)
+            self._dragged = False
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is not None and event.buttons() & QtCore.Qt.LeftButton:
+            origin_x, origin_view = self._drag_origin
+            dx = event.pos().x() - origin_x
+            if abs(dx) >= 3 or self._dragged:
+                self._dragged = True
+                shift_ns = int(-dx * (origin_view[1] - origin_view[0]) / self._plot_rect().width())
+                self._set_view((origin_view[0] + shift_ns, origin_view[1] + shift_ns), from_user=True)
+                return
+        hover = self._hit_test(event.pos())
+        if hover != self._hover:
+            self._hover = hover
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != QtCore.Qt.LeftButton or self._drag_origin is None:
+            return
+        self._drag_origin = None
+        if not self._dragged:
+            hit = self._hit_test(event.pos())
+            anomaly = self._anomaly_at(event.pos()) if hit is None else None
+            if hit is not None:
+                self.bar_clicked.emit(*self.timeline_data_cache.bucket_datetimes(hit[0]))
+            elif anomaly is not None:  # Outside the bars but on a highlighted burst
+                self.bar_clicked.emit(anomaly.start_time, anomaly.end_time)
+
+    def leaveEvent(self, event):
+        if self._hover is not None:
+            self._hover = None
+            self.update()
+        super().leaveEvent(event)
+
+
+class TimelineOverview(QtWidgets.QWidget):
+    """Thin strip of the message totals over the full timeline range, with the main view as a draggable rectangle.
+
+    The totals are rendered once per dataset, range and size and kept as a pixmap; panning and
+    zooming only move the rectangle. Dragging it, or clicking beside it, emits view_requested.
+    """
+    view_requested = QtCore.pyqtSignal(float, float)  # New main view (date numbers)
+
+    BAR_COLOR = 0xFF7FA7CF
+    BACKGROUND_COLOR = 0xFFF4F4F4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._log_index = None
+        self._range_num = None  # (min, max) date numbers of the timeline's full range
+        self._view_num = None  # (min, max) date numbers of the main view
+        self._pixmap = None
+        self._pixmap_key = None
+        self._drag_offset = None  # Mouse x minus the rectangle's left edge while dragging, in pixels
+        self.setFixedHeight(40)
+        self.setCursor(QtCore.Qt.OpenHandCursor)
+        self.setToolTip("Overview: drag the rectangle to move the timeline view")
+
+    def set_data(self, log_index, min_num, max_num):
+        """New full range of the timeline (from time_range_updated); the view is reset to all of it."""
+        if log_index is None or log_index.row_count == 0 or max_num <= min_num:
+            self._log_index = self._range_num = self._view_num = None
+        else:
+            self._log_index = log_index
+            self._range_num = self._view_num = (min_num, max_num)
+        self.update()
+
+    def set_view(self, view_min_num, view_max_num):
+        if self._range_num is not None:
+            self._view_num = (view_min_num, view_max_num)
+            self.update()
+
+    def _render_totals(self, width, height):
+        """Totals per pixel column, summed from the coarsest cube that still has a bucket per pixel."""
+        min_ns, max_ns = (date_num_to_ns(x) for x in self._range_num)
+        span_ns = max(max_ns - min_ns, 1)
+        cube = self._log_index.bucket_cube_ns(pick_lod_bucket_ns(span_ns, width, pixels_per_bucket=1))
+        totals = cube.counts.sum(axis=(1, 2), dtype=np.int64)
+        columns = ((cube.bucket_starts_ns() - min_ns) / span_ns * width).astype(np.int64)
+        inside = (columns >= 0) & (columns < width)
+        column_totals = np.bincount(columns[inside], weights=totals[inside], minlength=width)
+        bar_heights = column_totals / max(column_totals.max(), 1) * (height - 2)
+        row_heights = np.arange(height, 0, -1) - 0.5  # Top row first
+        pixels = np.where(row_heights[:, np.newaxis] <= bar_heights[np.newaxis, :],
+                          np.uint32(self.BAR_COLOR), np.uint32(self.BACKGROUND_COLOR))
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint32)
+        image = QtGui.QImage(pixels.data, width, height, 4 * width, QtGui.QImage.Format_RGB32).copy()
+        return QtGui.QPixmap.fromImage(image)
+
+    def _x_for(self, date_num):
+        return (date_num - self._range_num[0]) / (self._range_num[1] - self._range_num[0]) * self.width()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        try:
+            painter.fillRect(self.rect(), QtGui.QColor(self.BACKGROUND_COLOR))
+            if self._range_num is not None:
+                key = (self._log_index, self._range_num, self.width(), self.height())
+                if key != self._pixmap_key:
+                    self._pixmap = self._render_totals(self.width(), self.height())
+                    self._pixmap_key = key
+                painter.drawPixmap(0, 0, self._pixmap)
+                left, right = (self._x_for(x) for x in self._view_num)
+                viewport = QtCore.QRectF(left, 0, max(right - left, 3), self.height() - 1)
+                painter.setPen(QtGui.QPen(QtGui.QColor(40, 40, 40), 1.5))
+                painter.setBrush(QtGui.QColor(255, 255, 255, 60))
+                painter.drawRect(viewport)
+            painter.setPen(QtGui.QColor(180, 180, 180))
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+        finally:
+            painter.end()
+
+    def mousePressEvent(self, event):
+        if event.button() != QtCore.Qt.LeftButton or self._range_num is None:
+            return
+        left, right = (self._x_for(x) for x in self._view_num)
+        # Inside the rectangle: grab it where clicked; beside it: center it on the click
+        self._drag_offset = event.pos().x() - left if left <= event.pos().x() <= right else (right - left) / 2
+        self.setCursor(QtCore.Qt.ClosedHandCursor)
+        self._move_view_to(event.pos().x())
+
+    def mouseMoveEvent(self, event):
+        if self._drag_offset is not None and event.buttons() & QtCore.Qt.LeftButton:
+            self._move_view_to(event.pos().x())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == QtCore.Qt.LeftButton:
+            self._drag_offset = None
+            self.setCursor(QtCore.Qt.OpenHandCursor)
+
+    def _move_view_to(self, x):
+        range_min, range_max = self._range_num
+        view_width = self._view_num[1] - self._view_num[0]
+        view_min = range_min + (x - self._drag_offset) / self.width() * (range_max - range_min)
+        view_min = min(max(view_min, range_min), range_max - view_width)
+        if view_min != self._view_num[0]:
+            self._view_num = (view_min, view_min + view_width)
+            self.update()
+            self.view_requested.emit(*self._view_num)
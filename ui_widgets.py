@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from PyQt5 import QtWidgets, QtGui, QtCore
-from datetime import datetime # For VirtualTreeWidget sorting
+import numpy as np
+import pandas as pd
+from row_bitmap import RowBitmap
 
 class SortableTreeWidgetItem(QtWidgets.QTreeWidgetItem):
     def __lt__(self, other):
@@ -23,6 +25,210 @@ class SortableTreeWidgetItem(QtWidgets.QTreeWidgetItem):
             return self.text(column).lower() < other.text(column).lower()
 
 
+class MessageTypesModel(QtCore.QAbstractTableModel):
+    """Message types (loggers) with their facet counts, for the message types QTreeView.
+
+    Everything is indexed by logger code (see LogIndex.logger_names): the counts and the check
+    state are NumPy arrays, and rows only map to codes. Select all / top N are array assignments
+    followed by a single dataChanged, the view then repaints just the rows on screen.
+    """
+    HEADERS = ['Message Type', 'Count']
+    check_state_changed = QtCore.pyqtSignal()  # The user checked or unchecked a type
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sort_column = 1  # Most frequent types first, like the former QTreeWidget
+        self._sort_order = QtCore.Qt.DescendingOrder
+        self._name_filter = ""
+        # Check-state batch: changes made between begin/end are committed with one notification
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._batch_notify = False
+        self.batch_toggled_codes = []  # Codes toggled through setData (user clicks) in the current batch
+        self.set_logger_names([])
+
+    def set_logger_names(self, logger_names):
+        """Starts over for a new dataset: nothing counted, nothing checked."""
+        self.beginResetModel()
+        self.logger_names = np.asarray(logger_names, dtype=object)
+        self.counts = np.zeros(len(self.logger_names), dtype=np.int64)
+        self.checked = np.zeros(len(self.logger_names), dtype=bool)
+        self._lower_names = pd.Series(self.logger_names, dtype=object).astype(str).str.lower()
+        self._name_rank = np.empty(len(self.logger_names), dtype=np.int64)  # Case-insensitive alphabetical rank
+        self._name_rank[np.argsort(self._lower_names.to_numpy(), kind='stable')] = np.arange(len(self.logger_names))
+        self._name_match = self._match_names(self._name_filter)
+        self._row_codes = np.empty(0, dtype=np.int64)  # Logger code shown on each row
+        self.endResetModel()
+
+    def set_counts(self, counts):
+        """New facet counts (one per logger code); types with a zero count are not listed."""
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self._refresh_rows()
+
+    def set_name_filter(self, text):
+        """Hides the types whose name does not contain `text`; their check state is kept for when they come back."""
+        self._name_filter = (text or "").lower()
+        self._name_match = self._match_names(self._name_filter)
+        self._refresh_rows()
+
+    def _match_names(self, text):
+        if not text:
+            return np.ones(len(self.logger_names), dtype=bool)
+        return self._lower_names.str.contains(text, regex=False).to_numpy(dtype=bool)
+
+    def _refresh_rows(self):
+        self.beginResetModel()
+        codes = np.flatnonzero((self.counts > 0) & self._name_match)
+        if self._sort_column == 1:
+            order = np.lexsort((self._name_rank[codes], self.counts[codes]))
+        else:
+            order = np.argsort(self._name_rank[codes], kind='stable')
+        if self._sort_order == QtCore.Qt.DescendingOrder:
+            order = order[::-1]
+        self._row_codes = codes[order]
+        self.endResetModel()
+
+    # --- Check state ---
+
+    def present_mask(self):
+        """Types listed for the current facets, whether hidden by the name filter or not."""
+        return self.counts > 0
+
+    def selected_codes(self):
+        """Codes of the checked types among the listed ones that the name filter shows: hidden types do not count."""
+        return np.flatnonzero(self.checked & self.present_mask() & self._name_match)
+
+    def selected_names(self):
+        return set(self.logger_names[self.selected_codes()])
+
+    def visible_codes(self):
+        """Codes of the rows currently shown, in display order."""
+        return self._row_codes
+
+    def code_for_row(self, row):
+        return int(self._row_codes[row])
+
+    def begin_check_state_batch(self):
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self.batch_toggled_codes = []
+
+    def end_check_state_batch(self):
+        """Commit point of a batch: one dataChanged and at most one check_state_changed."""
+        self._batch_depth -= 1
+        if self._batch_depth > 0 or not self._batch_dirty:
+            return
+        notify = self._batch_notify
+        self._batch_dirty = self._batch_notify = False
+        self._check_column_changed(notify)
+
+    def set_rows_checked(self, rows, checked, notify=False):
+        self.set_checked_codes(self._row_codes[np.asarray(rows, dtype=np.int64)], checked, notify)
+
+    def set_checked_mask(self, mask, notify=False):
+        """Replaces the whole check state with a boolean array indexed by logger code."""
+        self.checked = np.asarray(mask, dtype=bool).copy()
+        self._check_column_changed(notify)
+
+    def set_checked_codes(self, codes, checked=True, notify=False):
+        self.checked[np.asarray(codes, dtype=np.int64)] = checked
+        self._check_column_changed(notify)
+
+    def set_checked_names(self, logger_names, notify=False):
+        name_to_code = {name: code for code, name in enumerate(self.logger_names)}
+        mask = np.zeros(len(self.logger_names), dtype=bool)
+        mask[[name_to_code[name] for name in logger_names if name in name_to_code]] = True
+        self.set_checked_mask(mask, notify)
+
+    def _check_column_changed(self, notify):
+        if self._batch_depth:
+            self._batch_dirty = True
+            self._batch_notify = self._batch_notify or notify
+            return
+        if len(self._row_codes):
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._row_codes) - 1, 0),
+                                  [QtCore.Qt.CheckStateRole])
+        if notify:
+            self.check_state_changed.emit()
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._row_codes)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        code = self._row_codes[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return str(self.logger_names[code]) if index.column() == 0 else str(int(self.counts[code]))
+        if role == QtCore.Qt.CheckStateRole and index.column() == 0:
+            return QtCore.Qt.Checked if self.checked[code] else QtCore.Qt.Unchecked
+        if role == QtCore.Qt.TextAlignmentRole and index.column() == 1:
+            return int(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.CheckStateRole or index.column() != 0:
+            return False
+        code = self._row_codes[index.row()]
+        self.checked[code] = (value == QtCore.Qt.Checked)
+        if self._batch_depth:
+            self.batch_toggled_codes.append(int(code))
+            self._check_column_changed(True)
+            return True
+        self.dataChanged.emit(index, index, [QtCore.Qt.CheckStateRole])
+        self.check_state_changed.emit()
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= QtCore.Qt.ItemIsUserCheckable
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self._sort_column, self._sort_order = column, order
+        self._refresh_rows()
+
+
+class MessageTypesView(QtWidgets.QTreeView):
+    """Message types list: checking a type that is part of a multi-row selection checks the whole selection."""
+
+    def mouseReleaseEvent(self, event):
+        self._with_selection_toggle(super().mouseReleaseEvent, event)
+
+    def keyPressEvent(self, event):
+        self._with_selection_toggle(super().keyPressEvent, event)
+
+    def _with_selection_toggle(self, handler, event):
+        model = self.model()
+        if not isinstance(model, MessageTypesModel):
+            handler(event)
+            return
+        model.begin_check_state_batch()
+        try:
+            handler(event)  # The delegate toggles at most one checkbox through setData
+            if len(model.batch_toggled_codes) == 1:
+                toggled_code = model.batch_toggled_codes[0]
+                selected_rows = [index.row() for index in self.selectionModel().selectedRows(0)]
+                selected_codes = model.visible_codes()[selected_rows] if selected_rows else []
+                if len(selected_rows) > 1 and toggled_code in selected_codes:
+                    model.set_rows_checked(selected_rows, bool(model.checked[toggled_code]), notify=True)
+        finally:
+            model.end_check_state_batch()  # Single commit point: one recompute for the whole selection
+
+
 class LoadingDialog(QtWidgets.QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -61,10 +267,21 @@ class LoadingDialog(QtWidgets.QDialog):
 
 
 class VirtualTreeWidget(QtWidgets.QTreeWidget):
+    """Paged log entries list.
+
+    Rows come from a DataFrame plus a RowBitmap of the positions to show; only the rows of the
+    pages actually loaded in the tree are turned into dicts and QTreeWidgetItems.
+    """
+    # DataFrame column backing each displayed column, used for sorting and searching
+    SORT_COLUMNS = {0: 'datetime_obj', 1: 'log_level', 2: 'logger_name', 3: 'message'}
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.all_items_data = []  # List of dicts
-        self.filtered_items_data = []  # List of dicts (subset of all_items_data)
+        self.row_source = pd.DataFrame()  # DataFrame the rows are materialized from
+        self.source_rows = RowBitmap.empty(0)  # Rows of row_source to display
+        self.filtered_rows = RowBitmap.empty(0)  # source_rows narrowed by the search filter
+        self._sorted_positions = None  # Explicit display order, None when showing rows in load order
+        self._source_is_chronological = True
         self.visible_items = []  # List of QTreeWidgetItem currently in the tree
         self.items_per_page = 1000  # How many items to load at once
         self.current_page = 0
@@ -76,41 +293,44 @@ class VirtualTreeWidget(QtWidgets.QTreeWidget):
         self.header().sortIndicatorChanged.connect(self.on_sort_indicator_changed)
 
     def set_all_items_data(self, items_data):
-        self.all_items_data = items_data
+        self.set_row_source(pd.DataFrame(items_data))
+
+    def set_row_source(self, log_entries, rows=None):
+        """Displays `rows` (a RowBitmap, None for all) of `log_entries`."""
+        if log_entries is not self.row_source:
+            self.row_source = log_entries
+            self._source_is_chronological = ('datetime_obj' in log_entries.columns and
+                                             log_entries['datetime_obj'].is_monotonic_increasing)
+        self.source_rows = rows if rows is not None else RowBitmap.full(len(log_entries))
         self.apply_search_filter(self.search_filter, force_refresh=True)  # Re-apply current filter or show all
 
+    def row_count(self):
+        return len(self.filtered_rows)
+
+    def _column_values(self, column_name, positions):
+        return self.row_source[column_name].take(positions)
+
     def _sort_filtered_data(self):
-        if not self.filtered_items_data or self.current_sort_column == -1:
+        self._sorted_positions = None
+        if self.current_sort_column == -1 or len(self.filtered_rows) == 0:
+            return
+        # Load order is chronological: the time sort pages straight from the row set
+        if self.current_sort_column == 0 and self._source_is_chronological:
             return
 
-        col_idx = self.current_sort_column
-        reverse_sort = (self.current_sort_order == QtCore.Qt.DescendingOrder)
-
-        # Define how to get a sortable value from the item data dictionary
-        def get_value_for_sort(item_data_dict):
-            if col_idx == 0:  # Time column
-                # Prefer datetime_obj for sorting if available and valid
-                dt_obj = item_data_dict.get('datetime_obj')
-                if isinstance(dt_obj, datetime) and dt_obj != datetime.min:
-                    return dt_obj
-                return item_data_dict.get('datetime', "")  # Fallback to string
-            elif col_idx == 1:  # Level column
-                return item_data_dict.get('log_level', "").lower()
-            elif col_idx == 2:  # Logger column
-                return item_data_dict.get('logger_name', "").lower()
-            elif col_idx == 3:  # Message column (sort by first line)
-                msg = item_data_dict.get('message', "")
-                return (msg.split('\n')[0].lower() if msg else "")
-            # Fallback for any other unexpected column index, though unlikely with fixed headers
-            try:
-                return item_data_dict.get(self.headerItem().text(col_idx), "").lower()
-            except AttributeError:  # headerItem might not be set
-                return ""
-
-        try:
-            self.filtered_items_data.sort(key=get_value_for_sort, reverse=reverse_sort)
-        except TypeError:  # Fallback for mixed types (e.g. datetime vs string if obj is bad)
-            self.filtered_items_data.sort(key=lambda x: str(get_value_for_sort(x)).lower(), reverse=reverse_sort)
+        column_name = self.SORT_COLUMNS.get(self.current_sort_column)
+        if column_name not in self.row_source.columns:
+            return
+        positions = self.filtered_rows.to_indices()
+        values = self._column_values(column_name, positions)
+        if column_name == 'message':  # Sort by first line, like the displayed text
+            values = values.astype(str).str.split('\n', n=1).str[0].str.lower()
+        elif column_name != 'datetime_obj':
+            values = values.astype(str).str.lower()
+        order = np.argsort(values.to_numpy(), kind='stable')
+        if self.current_sort_order == QtCore.Qt.DescendingOrder:
+            order = order[::-1]
+        self._sorted_positions = positions[order]
 
     def on_sort_indicator_changed(self, logical_index, order):
         self.current_sort_column = logical_index
@@ -121,21 +341,21 @@ class VirtualTreeWidget(QtWidgets.QTreeWidget):
 
     def apply_search_filter(self, search_text, force_refresh=False):
         new_search_filter = search_text.lower()
-        # Avoid re-filtering if text hasn't changed and data isn't forced,
-        # unless previous filter resulted in self.filtered_items_data being a new list (not a slice)
-        if not force_refresh and self.search_filter == new_search_filter and \
-                self.filtered_items_data is not self.all_items_data:  # Check if it was actually filtered
+        # Avoid re-filtering if text hasn't changed and data isn't forced
+        if not force_refresh and self.search_filter == new_search_filter:
             return
 
         self.search_filter = new_search_filter
-        if not self.search_filter:
-            self.filtered_items_data = self.all_items_data[:]  # Use a slice to ensure it's a mutable copy if needed
+        if not self.search_filter or len(self.source_rows) == 0:
+            self.filtered_rows = self.source_rows
         else:
-            self.filtered_items_data = [
-                item for item in self.all_items_data
-                if self.search_filter in item.get('message', '').lower() or \
-                   self.search_filter in item.get('logger_name', '').lower()
-            ]
+            positions = self.source_rows.to_indices()
+            matches = np.zeros(len(positions), dtype=bool)
+            for column_name in ('message', 'logger_name'):
+                if column_name in self.row_source.columns:
+                    values = self._column_values(column_name, positions).astype(str).str.lower()
+                    matches |= values.str.contains(self.search_filter, regex=False).to_numpy()
+            self.filtered_rows = RowBitmap.from_indices(self.source_rows.size, positions[matches])
         self._sort_filtered_data()  # Re-sort after filtering
         self.current_page = 0  # Reset to first page
         self._refresh_visible_items()
@@ -146,15 +366,23 @@ class VirtualTreeWidget(QtWidgets.QTreeWidget):
         self.current_page = 0  # Reset pagination
         self._load_more_items()
 
+    def _page_positions(self, start_idx, end_idx):
+        if self._sorted_positions is not None:
+            return self._sorted_positions[start_idx:end_idx]
+        if self.current_sort_column == 0 and self.current_sort_order == QtCore.Qt.DescendingOrder:
+            total = len(self.filtered_rows)
+            return self.filtered_rows.select(total - end_idx, total - start_idx)[::-1]
+        return self.filtered_rows.select(start_idx, end_idx)
+
     def _load_more_items(self):
         start_idx = self.current_page * self.items_per_page
-        if start_idx >= len(self.filtered_items_data):
+        if start_idx >= len(self.filtered_rows):
             return  # No more items to load
 
-        end_idx = min(start_idx + self.items_per_page, len(self.filtered_items_data))
+        end_idx = min(start_idx + self.items_per_page, len(self.filtered_rows))
+        page_entries = self.row_source.take(self._page_positions(start_idx, end_idx)).to_dict('records')
         new_q_items = []
-        for i in range(start_idx, end_idx):
-            entry = self.filtered_items_data[i]
+        for entry in page_entries:
             # Create QTreeWidgetItem with display data
             item = QtWidgets.QTreeWidgetItem([ # Using standard QTreeWidgetItem here, Sortable is for the other tree
                 entry['datetime'],
@@ -192,7 +420,7 @@ class VirtualTreeWidget(QtWidgets.QTreeWidget):
         scrollbar = self.verticalScrollBar()
         # Load more if near the bottom and more data is available
         if (scrollbar.maximum() > 0 and value >= scrollbar.maximum() * 0.8 and
-                len(self.visible_items) < len(self.filtered_items_data)):
+                len(self.visible_items) < len(self.filtered_rows)):
             self._load_more_items()
 
 
@@ -228,6 +456,13 @@ class SearchWidget(QtWidgets.QWidget):
 
     def clear_search(self): self.search_input.clear()  # This will trigger textChanged -> search_changed
 
+    def set_search_text_silently(self, text):
+        """Shows `text` without emitting search_changed (the caller already applied it)."""
+        self.search_timer.stop()
+        self.search_input.blockSignals(True)
+        self.search_input.setText(text)
+        self.search_input.blockSignals(False)
+
 
 class WelcomeWidget(QtWidgets.QWidget):
     """A welcome widget displayed on application startup."""